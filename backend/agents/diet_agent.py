@@ -1,15 +1,14 @@
 from agents.groq_client import get_llm
+from agents.model_profiles import model_profile
+from agents.resilience import resilient
+from agents.prompt_context import build_context, log_prompt
 
-llm = get_llm()
+FALLBACK_REPLY = "- Eat regular, balanced meals with vegetables and protein.\n- Drink enough water through the day."
+llm = resilient(get_llm(model_profile("DietAgent").model), "DietAgent", FALLBACK_REPLY)
 
-def run_diet_agent(state: dict, profile: dict | None) -> str:
-    """
-    Give SHORT, practical diet suggestions.
-    If profile is provided, use it to personalize.
-    Never ask follow-up questions here.
-    """
-
-    prompt = f"""
+def _build_prompt(state: dict, profile: dict | None) -> str:
+    ctx = build_context("DietAgent", None, profile, state)
+    return log_prompt("DietAgent", f"""
 You are the DietAgent in a wellness assistant.
 
 You must:
@@ -20,11 +19,20 @@ You must:
 - Keep the answer short (4–6 lines max).
 - Adapt food suggestions to their diet_type (veg, non-veg, eggetarian, vegan).
 
-User profile (may be null):
-{profile}
+User message:
+\"\"\"{ctx.message}\"\"\"
+
+User profile:
+{ctx.profile}
+
+Previous agent notes:
+{ctx.notes}
+
+Relevant earlier conversation (older turns retrieved for this message):
+{ctx.recall}
 
-Previous agent notes (state):
-{state}
+Recent conversation:
+{ctx.history}
 
 Your output:
 - Directly suggest what to eat and what to avoid.
@@ -36,7 +44,21 @@ Your output:
 - Avoid long explanations or big paragraphs.
 - Do NOT repeat the user's message.
 - Do NOT ask the user for more details if profile already exists.
-"""
+""", ctx)
 
-    response = llm.invoke(prompt).content
+
+async def arun_diet_agent(state: dict, profile: dict | None) -> str:
+    """
+    Give SHORT, practical diet suggestions.
+    If profile is provided, use it to personalize.
+    Never ask follow-up questions here.
+    """
+    response = (await llm.ainvoke(_build_prompt(state, profile))).content
     return response.strip()
+
+
+async def astream_diet_agent(state: dict, profile: dict | None):
+    """Yield the answer in text chunks as the LLM produces them."""
+    async for chunk in llm.astream(_build_prompt(state, profile)):
+        if chunk.content:
+            yield chunk.content
@@ -1,8 +1,13 @@
 from agents.groq_client import get_llm
-llm = get_llm()
+from agents.model_profiles import model_profile
+from agents.resilience import resilient
+from agents.prompt_context import build_context, log_prompt
+FALLBACK_REPLY = "- Start with light activity such as a 20-30 minute walk.\n- Increase intensity gradually and rest when needed."
+llm = resilient(get_llm(model_profile("FitnessAgent").model), "FitnessAgent", FALLBACK_REPLY)
 
-def run_fitness_agent(state, profile):
-    prompt = f"""
+def _build_prompt(state, profile):
+    ctx = build_context("FitnessAgent", None, profile, state)
+    return log_prompt("FitnessAgent", f"""
 You are the FitnessAgent in a Digital Wellness multi-agent system.
 
 Your job:
@@ -11,11 +16,20 @@ Your job:
 - Do NOT repeat what the user already said.
 - Focus on exercises, routine improvements, posture, stamina, energy, motivation.
 
+User message:
+\"\"\"{ctx.message}\"\"\"
+
 User Profile:
-{profile}
+{ctx.profile}
 
 State (information extracted by previous agents):
-{state}
+{ctx.notes}
+
+Relevant earlier conversation (e.g. injuries or limits the user mentioned before):
+{ctx.recall}
+
+Recent conversation:
+{ctx.history}
 
 RESPONSE RULES:
 - Use the MINIMUM number of sentences required to help the user.
@@ -27,5 +41,15 @@ RESPONSE RULES:
 - Do NOT give generic textbook content; personalize it using profile + state.
 
 Now provide a concise, helpful fitness response.
-"""
-    return llm.invoke(prompt).content.strip()
+""", ctx)
+
+
+async def arun_fitness_agent(state, profile):
+    return (await llm.ainvoke(_build_prompt(state, profile))).content.strip()
+
+
+async def astream_fitness_agent(state, profile):
+    """Yield the answer in text chunks as the LLM produces them."""
+    async for chunk in llm.astream(_build_prompt(state, profile)):
+        if chunk.content:
+            yield chunk.content
@@ -1,10 +1,425 @@
-from langchain_groq import ChatGroq
-from config import GROQ_API_KEY, MODEL_NAME
+# backend/agents/groq_client.py
+# One shared, rate-limited chat client per model.
+#
+# get_llm() used to build a fresh ChatGroq (with its own HTTP client) for each
+# agent module. It now returns a process-wide PooledLLM per model: every call
+# goes through pooled keep-alive HTTP clients, a global + per-model
+# concurrency limit and RPM/TPM token buckets. Callers wait in line instead
+# of failing when the limits are reached; limiter_stats() reports the queue.
+import asyncio
+import threading
+import time
+from collections import deque
 
-def get_llm():
+import httpx
+from config import (
+    GROQ_API_KEY,
+    MODEL_NAME,
+    LLM_MAX_CONCURRENCY,
+    LLM_MODEL_CONCURRENCY,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_KEEPALIVE_SECONDS,
+    LLM_REQUEST_TIMEOUT,
+    GROQ_RPM,
+    GROQ_TPM,
+)
+from agents.prompt_context import estimate_tokens
+
+# client defaults; each role's profile (agents/model_profiles.py) overrides
+# max_tokens and temperature per call
+TEMPERATURE = 0.2
+MAX_TOKENS = 512
+
+
+# -------------------------------------------------------------------
+# CONCURRENCY SLOTS (shared by threads and coroutines)
+# -------------------------------------------------------------------
+
+class _Slots:
+    """
+    Counting semaphore usable from worker threads (sync invoke) and from the
+    event loop (ainvoke/astream) at the same time, so both paths share one
+    limit. Waiters are served first come, first served.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()  # threading.Event | _AsyncWaiter
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _try_acquire(self) -> bool:
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._try_acquire():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()  # slot is handed over by release()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_acquire():
+                return
+            waiter = _AsyncWaiter(loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    # still queued, or skipped by a release() that saw the cancelled future
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+            if granted:
+                # slot was handed over just before the cancel: give it back
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                if not waiter.future.done() and not waiter.loop.is_closed():
+                    # recorded under the lock: the waiter owns the slot from here on
+                    waiter.granted = True
+                    waiter.loop.call_soon_threadsafe(_grant, waiter.future)
+                    return
+            self.in_use -= 1
+
+
+class _AsyncWaiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+def _grant(future: asyncio.Future) -> None:
+    # a waiter cancelled after the hand-over gives the slot back itself (see aacquire)
+    if not future.done():
+        future.set_result(None)
+
+
+# -------------------------------------------------------------------
+# TOKEN BUCKETS (requests/minute and tokens/minute)
+# -------------------------------------------------------------------
+
+class _TokenBucket:
+    """
+    Classic token bucket refilled continuously at `per_minute / 60` per second.
+    reserve() always succeeds and returns how long the caller must wait for
+    its share, so callers queue in arrival order instead of getting errors.
+    capacity <= 0 disables the bucket.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)  # a single oversized call still fits eventually
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= amount
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def exhausted(self) -> bool:
+        """True when the next reservation would have to wait."""
+        if self.capacity <= 0:
+            return False
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.level < 1
+
+    def refund(self, amount: float) -> None:
+        if self.capacity <= 0 or amount <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+
+# -------------------------------------------------------------------
+# SHARED HTTP CLIENTS
+# -------------------------------------------------------------------
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_POOL_MAX_CONNECTIONS,
+        keepalive_expiry=LLM_POOL_KEEPALIVE_SECONDS,
+    )
+
+
+# created with the first chat model (building SSL contexts is not free at boot)
+_http_clients: tuple[httpx.Client, httpx.AsyncClient] | None = None
+_http_clients_lock = threading.Lock()
+
+
+def _shared_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    global _http_clients
+    with _http_clients_lock:
+        if _http_clients is None:
+            _http_clients = (
+                httpx.Client(limits=_pool_limits(), timeout=LLM_REQUEST_TIMEOUT),
+                httpx.AsyncClient(limits=_pool_limits(), timeout=LLM_REQUEST_TIMEOUT),
+            )
+        return _http_clients
+
+
+def _build_chat_model(model: str):
+    # langchain_groq pulls in most of LangChain; import it on first use, not at boot
+    from langchain_groq import ChatGroq
+
+    http_client, http_async_client = _shared_http_clients()
     return ChatGroq(
         groq_api_key=GROQ_API_KEY,
-        model=MODEL_NAME,
-        temperature=0.2,
-        max_tokens=512
+        model=model,
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS,
+        http_client=http_client,
+        http_async_client=http_async_client,
     )
+
+
+# -------------------------------------------------------------------
+# RATE-LIMITED CLIENT
+# -------------------------------------------------------------------
+
+_global_slots = _Slots(LLM_MAX_CONCURRENCY)
+_requests_bucket = _TokenBucket(GROQ_RPM)
+_tokens_bucket = _TokenBucket(GROQ_TPM)
+
+
+def _prompt_text(prompt) -> str:
+    return prompt if isinstance(prompt, str) else str(prompt)
+
+
+def _used_tokens(message) -> int | None:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+class PooledLLM:
+    """
+    Drop-in for the chat model the agents used (invoke / ainvoke / astream).
+    Each call waits for its RPM/TPM budget, then for a per-model and a global
+    concurrency slot, and only then reaches the wrapped model. A caller that
+    times the provider passes on_admit=callback; it runs once the call leaves
+    the queue (agents/resilience.py starts its deadline there).
+    """
+
+    def __init__(self, model: str, chat_model=None, concurrency: int | None = None):
+        self.model = model
+        self._chat_model = chat_model
+        self._build_lock = threading.Lock()
+        self.slots = _Slots(concurrency or LLM_MODEL_CONCURRENCY.get(model) or LLM_MAX_CONCURRENCY)
+        self._wait_samples: deque = deque(maxlen=1000)
+        self._stats = {"calls": 0, "queued_calls": 0, "rate_limited_calls": 0,
+                       "max_queue_depth": 0, "reserved_tokens": 0, "used_tokens": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def chat_model(self):
+        """The wrapped ChatGroq, built on first use (or by warm_up())."""
+        if self._chat_model is None:
+            with self._build_lock:
+                if self._chat_model is None:
+                    self._chat_model = _build_chat_model(self.model)
+        return self._chat_model
+
+    # -- limiter --------------------------------------------------------
+
+    def _reserve(self, prompt, max_tokens: int | None) -> tuple[float, int]:
+        """Take RPM + TPM budget; returns (seconds to wait, tokens reserved)."""
+        tokens = estimate_tokens(_prompt_text(prompt)) + (max_tokens or MAX_TOKENS)
+        delay = max(_requests_bucket.reserve(1), _tokens_bucket.reserve(tokens))
+        return delay, tokens
+
+    def _must_queue(self) -> bool:
+        queued = self.slots.in_use >= self.slots.limit or _global_slots.in_use >= _global_slots.limit
+        if queued:
+            with self._stats_lock:
+                depth = self.slots.queued + _global_slots.queued + 1
+                self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+        return queued
+
+    def _record(self, waited: float, delay: float, queued: bool, reserved: int) -> None:
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["queued_calls"] += int(queued)
+            self._stats["rate_limited_calls"] += int(delay > 0)
+            self._stats["reserved_tokens"] += reserved
+            self._wait_samples.append(waited * 1000)
+
+    def _settle(self, reserved: int, message) -> None:
+        """Give back the part of the token reservation the call did not use."""
+        used = _used_tokens(message)
+        if used is None:
+            return
+        _tokens_bucket.refund(reserved - used)
+        with self._stats_lock:
+            self._stats["used_tokens"] += used
+
+    def _acquire(self, prompt, max_tokens: int | None) -> int:
+        started = time.perf_counter()
+        delay, reserved = self._reserve(prompt, max_tokens)
+        if delay:
+            time.sleep(delay)
+        queued = self._must_queue()
+        self.slots.acquire()
+        _global_slots.acquire()
+        self._record(time.perf_counter() - started, delay, queued, reserved)
+        return reserved
+
+    async def _aacquire(self, prompt, max_tokens: int | None) -> int:
+        started = time.perf_counter()
+        delay, reserved = self._reserve(prompt, max_tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        queued = self._must_queue()
+        await self.slots.aacquire()
+        try:
+            await _global_slots.aacquire()
+        except BaseException:
+            self.slots.release()
+            raise
+        self._record(time.perf_counter() - started, delay, queued, reserved)
+        return reserved
+
+    def _release(self) -> None:
+        _global_slots.release()
+        self.slots.release()
+
+    def saturated(self) -> bool:
+        """True when a new call would have to wait in the limiter right now."""
+        return (self.slots.in_use >= self.slots.limit or _global_slots.in_use >= _global_slots.limit
+                or _requests_bucket.exhausted() or _tokens_bucket.exhausted())
+
+    # -- chat model API -------------------------------------------------
+
+    def invoke(self, prompt, on_admit=None, **kwargs):
+        reserved = self._acquire(prompt, kwargs.get("max_tokens"))
+        try:
+            if on_admit is not None:
+                on_admit()
+            message = self.chat_model.invoke(prompt, **kwargs)
+        finally:
+            self._release()
+        self._settle(reserved, message)
+        return message
+
+    async def ainvoke(self, prompt, on_admit=None, **kwargs):
+        reserved = await self._aacquire(prompt, kwargs.get("max_tokens"))
+        try:
+            if on_admit is not None:
+                on_admit()
+            message = await self.chat_model.ainvoke(prompt, **kwargs)
+        finally:
+            self._release()
+        self._settle(reserved, message)
+        return message
+
+    async def astream(self, prompt, on_admit=None, **kwargs):
+        # the slot is held until the last chunk, since the request is open until then
+        reserved = await self._aacquire(prompt, kwargs.get("max_tokens"))
+        last = None
+        try:
+            if on_admit is not None:
+                on_admit()
+            async for chunk in self.chat_model.astream(prompt, **kwargs):
+                last = chunk
+                yield chunk
+        finally:
+            self._release()
+        # usage (when the provider reports it) arrives on the final chunk
+        self._settle(reserved, last)
+
+    def stats(self) -> dict:
+        samples = sorted(self._wait_samples)
+        with self._stats_lock:
+            out = dict(self._stats)
+        out.update({
+            "concurrency_limit": self.slots.limit,
+            "in_flight": self.slots.in_use,
+            "queue_depth": self.slots.queued,
+            "wait_ms_avg": round(sum(samples) / len(samples), 1) if samples else 0.0,
+            "wait_ms_p95": round(samples[int(0.95 * (len(samples) - 1))], 1) if samples else 0.0,
+        })
+        return out
+
+
+# -------------------------------------------------------------------
+# REGISTRY
+# -------------------------------------------------------------------
+
+_registry: dict[str, PooledLLM] = {}
+_registry_lock = threading.Lock()
+
+
+def get_llm(model: str | None = None) -> PooledLLM:
+    """Shared client for `model` (default MODEL_NAME); created on first use."""
+    model = model or MODEL_NAME
+    with _registry_lock:
+        llm = _registry.get(model)
+        if llm is None:
+            llm = _registry[model] = PooledLLM(model)
+        return llm
+
+
+def register_llm(model: str, chat_model, concurrency: int | None = None) -> PooledLLM:
+    """Put any chat model (e.g. a benchmark stub) behind the shared limiter."""
+    with _registry_lock:
+        llm = _registry[model] = PooledLLM(model, chat_model, concurrency)
+        return llm
+
+
+def warm_up() -> None:
+    """Build every registered chat model now (startup warm-up off the request path)."""
+    with _registry_lock:
+        llms = list(_registry.values())
+    for llm in llms:
+        llm.chat_model
+
+
+def limiter_stats() -> dict:
+    with _registry_lock:
+        models = {name: llm.stats() for name, llm in _registry.items()}
+    return {
+        "global": {
+            "concurrency_limit": _global_slots.limit,
+            "in_flight": _global_slots.in_use,
+            "queue_depth": _global_slots.queued,
+            "rpm_limit": GROQ_RPM,
+            "tpm_limit": GROQ_TPM,
+        },
+        "models": models,
+    }
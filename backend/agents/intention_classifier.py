@@ -1,7 +1,12 @@
 import json
 from agents.groq_client import get_llm
+from agents.model_profiles import model_profile
+from agents.resilience import resilient
+from agents.local_intent import local_classify
 
-llm = get_llm()
+# Degraded answer: same default _parse_intent uses when the reply is unusable
+FALLBACK_REPLY = '{"is_wellness": true}'
+llm = resilient(get_llm(model_profile("IntentClassifier").model), "IntentClassifier", FALLBACK_REPLY)
 
 def _extract_json(text: str):
     """
@@ -18,8 +23,8 @@ def _extract_json(text: str):
     except json.JSONDecodeError:
         return None
 
-def classify_intent(message: str):
-    prompt = f"""
+def _build_prompt(message: str) -> str:
+    return f"""
 You are an intention classifier for a digital wellness assistant.
 
 Task:
@@ -34,12 +39,23 @@ DO NOT add any explanation or extra text.
 
 User message: "{message}"
 """
-    res = llm.invoke(prompt)
-    raw = res.content or ""
+
+
+def _parse_intent(raw: str):
     data = _extract_json(raw)
 
     # If parsing fails, default to treating it as wellness (so the app continues)
     if not data or "is_wellness" not in data:
-        data = {"is_wellness": True}
+        return {"is_wellness": True, "source": "default"}
+
+    return {"is_wellness": data["is_wellness"], "source": "llm"}
+
+
+async def aclassify_intent(message: str):
+    # Obvious messages are decided locally; only the uncertain band costs an LLM call
+    local = local_classify(message)
+    if local is not None:
+        return local
 
-    return data
+    res = await llm.ainvoke(_build_prompt(message))
+    return _parse_intent(res.content or "")
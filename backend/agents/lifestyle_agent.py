@@ -1,14 +1,14 @@
 from agents.groq_client import get_llm
+from agents.model_profiles import model_profile
+from agents.resilience import resilient
+from agents.prompt_context import build_context, log_prompt
 
-llm = get_llm()
+FALLBACK_REPLY = "- Keep a regular sleep schedule.\n- Take short breaks to manage stress during the day."
+llm = resilient(get_llm(model_profile("LifestyleAgent").model), "LifestyleAgent", FALLBACK_REPLY)
 
-def run_lifestyle_agent(message: str, profile: dict | None) -> str:
-    """
-    Provides short, actionable lifestyle improvements.
-    No long lists, no questionnaires, no generic lectures.
-    """
-
-    prompt = f"""
+def _build_prompt(message: str, profile: dict | None, state: dict | None = None) -> str:
+    ctx = build_context("LifestyleAgent", message, profile, state)
+    return log_prompt("LifestyleAgent", f"""
 You are the LifestyleAgent in a wellness assistant.
 
 Your job:
@@ -31,13 +31,32 @@ RESPONSE RULES:
 .
 
 User message:
-\"\"\"{message}\"\"\"
+\"\"\"{ctx.message}\"\"\"
 
 Profile:
-{profile}
+{ctx.profile}
+
+Relevant earlier conversation (older turns retrieved for this message):
+{ctx.recall}
+
+Recent conversation:
+{ctx.history}
 
 Give ONLY helpful lifestyle tips.
-"""
+""", ctx)
 
-    response = llm.invoke(prompt).content
+
+async def arun_lifestyle_agent(message: str, profile: dict | None, state: dict | None = None) -> str:
+    """
+    Provides short, actionable lifestyle improvements.
+    No long lists, no questionnaires, no generic lectures.
+    """
+    response = (await llm.ainvoke(_build_prompt(message, profile, state))).content
     return response.strip()
+
+
+async def astream_lifestyle_agent(message: str, profile: dict | None, state: dict | None = None):
+    """Yield the answer in text chunks as the LLM produces them."""
+    async for chunk in llm.astream(_build_prompt(message, profile, state)):
+        if chunk.content:
+            yield chunk.content
@@ -0,0 +1,146 @@
+# backend/agents/local_intent.py
+# Local fast path for the intention classifier.
+#
+# Stage 1: keyword lexicon. A message with a strong wellness word and no
+#          off-topic word at all (or the reverse) is decided immediately.
+# Stage 2: logistic regression over hashed n-grams (weights in intent_model.json,
+#          produced by tools/train_intent_model.py).
+#
+# Only messages whose probability lands between INTENT_LOCAL_LOW and
+# INTENT_LOCAL_HIGH are sent on to the Groq classifier.
+
+import json
+import math
+import os
+import threading
+from typing import Dict, Optional
+
+from agents.text_features import hashed_ngrams, tokenize
+from config import INTENT_LOCAL_ENABLED, INTENT_LOCAL_LOW, INTENT_LOCAL_HIGH
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_model.json")
+
+# Strong words are about wellness (or clearly not) in nearly any sentence; only
+# these let the lexicon decide on its own. Weak words also have everyday senses
+# ("run a container", "water leak", "my phone") or show up in wellness questions
+# ("my knee hurts after football", "homework on the nervous system"), so they
+# only count as evidence: a message with weak hits, or with hits on both
+# sides, goes to the model / LLM.
+WELLNESS_STRONG = {
+    "health", "healthy", "wellness", "diet", "nutrition", "calories", "protein",
+    "hydration", "hydrated", "bmi", "vegan", "vegetarian",
+    "workout", "workouts", "exercise", "exercises", "gym", "fitness", "cardio",
+    "muscle", "muscles", "stretch", "stretches", "stretching", "yoga", "posture", "stamina",
+    "sleep", "sleeping", "insomnia", "fatigue", "exhausted",
+    "stress", "stressed", "anxiety", "anxious", "burnout", "depressed",
+    "headache", "migraine", "dizzy", "dizziness", "nausea",
+    "bloating", "bloated", "digestion", "constipation", "cramps", "injury",
+    "meditation", "knee", "knees", "neck",
+}
+WELLNESS_WEAK = {
+    "eat", "eating", "food", "meal", "meals", "breakfast", "lunch", "dinner", "snack",
+    "water", "weight", "fat", "run", "running", "tired", "energy", "mood",
+    "pain", "ache", "aches", "hurt", "hurts", "sore", "stiff", "awake",
+    "back", "shoulder", "routine", "habits", "relax", "relaxation",
+}
+
+OFF_TOPIC_STRONG = {
+    "python", "javascript", "sql", "compile", "docker", "kubernetes", "programming",
+    "crypto", "bitcoin", "election", "lyrics", "minecraft", "netflix",
+    "translate", "poem", "equation",
+}
+OFF_TOPIC_WEAK = {
+    "code", "coding", "program", "bug", "database", "weather", "forecast",
+    "movie", "movies", "song", "football", "cricket", "score", "stock", "stocks",
+    "president", "capital", "joke", "math", "laptop", "phone", "iphone",
+    "game", "games", "leak", "container", "homework",
+}
+
+_lock = threading.Lock()
+_stats = {"lexicon": 0, "model": 0, "llm_fallback": 0}
+
+
+class LocalIntentModel:
+    """Sparse logistic regression over text_features.hashed_ngrams."""
+
+    def __init__(self, weights: Dict[int, float], bias: float, n_features: int):
+        self.weights = weights
+        self.bias = bias
+        self.n_features = n_features
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> Optional["LocalIntentModel"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        weights = {int(k): float(v) for k, v in data["weights"].items()}
+        return cls(weights, float(data["bias"]), int(data["n_features"]))
+
+    def predict_proba(self, message: str) -> float:
+        """Probability that the message is wellness-related."""
+        z = self.bias
+        for index, value in hashed_ngrams(message, self.n_features).items():
+            z += self.weights.get(index, 0.0) * value
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+
+_model = LocalIntentModel.load()
+
+
+def reload_model(path: str = MODEL_PATH) -> None:
+    """Pick up a freshly trained intent_model.json without restarting."""
+    global _model
+    _model = LocalIntentModel.load(path)
+
+
+def _record(outcome: str) -> None:
+    with _lock:
+        _stats[outcome] += 1
+
+
+def local_classify(message: str) -> Optional[dict]:
+    """
+    Return {"is_wellness": bool, "source": "lexicon"|"model"} when the local
+    stages are confident, or None when the message should go to the LLM.
+    """
+    if not INTENT_LOCAL_ENABLED:
+        return None
+
+    tokens = set(tokenize(message))
+    wellness_strong = bool(tokens & WELLNESS_STRONG)
+    wellness_any = wellness_strong or bool(tokens & WELLNESS_WEAK)
+    off_topic_strong = bool(tokens & OFF_TOPIC_STRONG)
+    off_topic_any = off_topic_strong or bool(tokens & OFF_TOPIC_WEAK)
+
+    if wellness_strong and not off_topic_any:
+        _record("lexicon")
+        return {"is_wellness": True, "source": "lexicon"}
+    if off_topic_strong and not wellness_any:
+        _record("lexicon")
+        return {"is_wellness": False, "source": "lexicon"}
+
+    if _model is not None:
+        proba = _model.predict_proba(message)
+        if proba >= INTENT_LOCAL_HIGH:
+            _record("model")
+            return {"is_wellness": True, "source": "model"}
+        # a refusal costs more than an LLM call: with any wellness word, only the LLM says no
+        if proba <= INTENT_LOCAL_LOW and not wellness_any:
+            _record("model")
+            return {"is_wellness": False, "source": "model"}
+
+    _record("llm_fallback")
+    return None
+
+
+def intent_stats() -> dict:
+    """Counters for how often the local stages answered without the LLM."""
+    with _lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    short_circuited = stats["lexicon"] + stats["model"]
+    stats["total"] = total
+    stats["short_circuit_rate"] = round(short_circuited / total, 4) if total else 0.0
+    stats["model_loaded"] = _model is not None
+    return stats
@@ -0,0 +1,85 @@
+# backend/agents/model_profiles.py
+# Which model each LLM role uses, and how.
+#
+# Every agent module used to share one global MODEL_NAME with max_tokens=512,
+# even the intent classifier and the supervisor, whose whole answer is a JSON
+# object of a few tokens. Each role now has a profile; its max_tokens and
+# temperature are sent with every call (and size the TPM reservation), its
+# timeout bounds the call, and latency_budget / alternate drive the
+# latency-aware model selection in agents/resilience.py.
+from dataclasses import dataclass, fields, replace
+
+from config import (
+    LLM_CONTROL_MODEL,
+    LLM_AGENT_MODEL,
+    LLM_ALTERNATE_MODEL,
+    LLM_CALL_TIMEOUT,
+    LLM_PROFILE_OVERRIDES,
+)
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    model: str
+    max_tokens: int
+    temperature: float
+    timeout: float
+    # rolling average latency (seconds) above which calls move to `alternate`
+    latency_budget: float
+    alternate: str | None = None
+
+    def call_kwargs(self) -> dict:
+        """Per-call parameters passed to the chat model."""
+        return {"max_tokens": self.max_tokens, "temperature": self.temperature}
+
+
+_CONTROL = {"model": LLM_CONTROL_MODEL, "temperature": 0.0,
+            "timeout": min(LLM_CALL_TIMEOUT, 8.0), "latency_budget": 1.5}
+_CONTENT = {"model": LLM_AGENT_MODEL, "max_tokens": 512, "temperature": 0.2,
+            "timeout": LLM_CALL_TIMEOUT, "latency_budget": 6.0}
+
+DEFAULT_PROFILES = {
+    # {"is_wellness": true}
+    "IntentClassifier": ModelProfile(**_CONTROL, max_tokens=16),
+    # {"next_agent": "..."} in step mode, {"agents": [up to four names]} in plan mode
+    "Supervisor": ModelProfile(**_CONTROL, max_tokens=48),
+    "SymptomAgent": ModelProfile(**_CONTENT),
+    "DietAgent": ModelProfile(**_CONTENT),
+    "FitnessAgent": ModelProfile(**_CONTENT),
+    "LifestyleAgent": ModelProfile(**_CONTENT),
+    # background: folds old turns into the rolling memory summary
+    "Summarizer": replace(ModelProfile(**_CONTENT), temperature=0.0, max_tokens=256),
+}
+
+_FIELDS = {f.name for f in fields(ModelProfile)}
+_CASTS = {"max_tokens": int, "temperature": float, "timeout": float, "latency_budget": float}
+
+
+def _apply_overrides(role: str, profile: ModelProfile) -> ModelProfile:
+    changes = {}
+    for name, value in LLM_PROFILE_OVERRIDES.get(role.lower(), {}).items():
+        name = name.strip()
+        if name not in _FIELDS:
+            print(f"WARNING: LLM_PROFILE_{role.upper()}: unknown field {name!r} ignored.")
+            continue
+        try:
+            changes[name] = _CASTS.get(name, str)(value.strip())
+        except ValueError:
+            print(f"WARNING: LLM_PROFILE_{role.upper()}: bad value for {name!r} ignored.")
+    return replace(profile, **changes)
+
+
+def model_profile(role: str) -> ModelProfile:
+    """Profile for `role` (defaults + LLM_PROFILE_<ROLE> overrides); unknown roles get a content profile."""
+    profile = DEFAULT_PROFILES.get(role) or ModelProfile(**_CONTENT)
+    if LLM_ALTERNATE_MODEL:
+        profile = replace(profile, alternate=LLM_ALTERNATE_MODEL)
+    profile = _apply_overrides(role, profile)
+    if profile.alternate == profile.model or not profile.alternate:
+        profile = replace(profile, alternate=None)
+    return profile
+
+
+def profiles() -> dict[str, dict]:
+    """Effective profile of every known role (for /stats)."""
+    return {role: vars(model_profile(role)) for role in DEFAULT_PROFILES}
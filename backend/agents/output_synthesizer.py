@@ -1,7 +1,3 @@
-from agents.groq_client import get_llm
-
-llm = get_llm()
-
 def synthesize_output(state: dict) -> str:
     """
     Generate a SHORT, SIMPLE, USER-FRIENDLY summary.
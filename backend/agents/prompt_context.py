@@ -0,0 +1,209 @@
+# backend/agents/prompt_context.py
+# Compact, token-budgeted context for agent / supervisor prompts.
+#
+# Agents used to interpolate the raw profile document (Mongo _id, avatar_url,
+# bio, ...) and the whole orchestration state (intent + full conversation
+# history) into every prompt. build_context() renders only what each role
+# needs, and keeps the rendered context under PROMPT_CONTEXT_MAX_TOKENS.
+import threading
+from dataclasses import dataclass
+from config import PROMPT_CONTEXT_MAX_TOKENS, PROMPT_LOG_TOKENS
+
+# Profile fields worth showing to an LLM, in display order
+PROFILE_FIELDS = [
+    "age", "gender", "weight_kg", "height_cm", "bmi", "diet_type",
+    "activity_level", "sleep_hours", "health_conditions", "goal",
+]
+
+# Which profile fields each role actually uses (None = all of PROFILE_FIELDS)
+ROLE_PROFILE_FIELDS = {
+    "SymptomAgent": ["age", "gender", "sleep_hours", "health_conditions"],
+    "DietAgent": ["age", "gender", "weight_kg", "height_cm", "bmi", "diet_type",
+                  "activity_level", "health_conditions", "goal"],
+    "FitnessAgent": ["age", "gender", "weight_kg", "height_cm", "bmi",
+                     "activity_level", "health_conditions", "goal"],
+    "LifestyleAgent": ["age", "activity_level", "sleep_hours", "health_conditions", "goal"],
+    "Supervisor": None,
+    "Planner": None,
+}
+
+# Which sections each role gets: message, profile, notes (other agents' output),
+# recall (older turns retrieved for this message, orchestrator/turn_index.py), history
+ROLE_SECTIONS = {
+    "SymptomAgent": ("message", "profile", "recall", "history"),
+    "DietAgent": ("message", "profile", "notes", "recall", "history"),
+    "FitnessAgent": ("message", "profile", "notes", "recall", "history"),
+    "LifestyleAgent": ("message", "profile", "recall", "history"),
+    "Supervisor": ("history", "message", "profile", "notes", "recall"),
+    "Planner": ("history", "message", "profile", "recall"),
+}
+
+# The supervisor only needs to know what is already covered, not the full advice
+NOTE_TOKEN_CAP = {"Supervisor": 40}
+
+# Retrieved older turns never take more than this from the budget
+RECALL_TOKEN_CAP = 200
+
+# Content agents get only the tail of the history: recall skips the newest
+# MEMORY_RECENT_TURNS turns, so this is where they see the last exchanges
+HISTORY_TOKEN_CAP = {"SymptomAgent": 250, "DietAgent": 250, "FitnessAgent": 250, "LifestyleAgent": 250}
+
+# Orchestration state keys that hold agent output (see orchestrator.AGENT_STATE_KEYS)
+NOTE_KEYS = ["symptoms", "diet", "fitness", "lifestyle", "note"]
+
+NO_PROFILE = "not provided"
+NO_NOTES = "none yet"
+NO_HISTORY = "No previous conversation yet."
+NO_RECALL = "none"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def _truncate(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    """Cut text to roughly max_tokens; keep_tail keeps the most recent part."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(max_tokens, 0) * 4
+    if max_chars <= 3:
+        return ""
+    if keep_tail:
+        cut = text[-(max_chars - 3):]
+        # start at a line boundary so history never begins mid-sentence
+        newline = cut.find("\n")
+        if 0 <= newline < len(cut) // 2:
+            cut = cut[newline + 1:]
+        return "..." + cut
+    return text[: max_chars - 3].rstrip() + "..."
+
+
+def render_profile(profile: dict | None, role: str | None = None) -> str:
+    """'age: 29, diet_type: veg, ...' with only the fields this role uses."""
+    if not profile:
+        return NO_PROFILE
+    fields = ROLE_PROFILE_FIELDS.get(role) or PROFILE_FIELDS
+    parts = []
+    for field in fields:
+        value = profile.get(field)
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(v) for v in value)
+        parts.append(f"{field}: {value}")
+    return ", ".join(parts) or NO_PROFILE
+
+
+def _render_notes(state: dict, budget: int, per_note_cap: int | None) -> str:
+    notes = [(key, str(state[key]).strip()) for key in NOTE_KEYS if state.get(key)]
+    if not notes:
+        return NO_NOTES
+    cap = budget // len(notes)
+    if per_note_cap is not None:
+        cap = min(cap, per_note_cap)
+    return "\n".join(f"- {key}: {_truncate(text, cap)}" for key, text in notes)
+
+
+def _raw_context(message: str, profile: dict | None, state: dict, sections) -> str:
+    """What the prompt used to interpolate for the same sections (for logging)."""
+    raw = [message, str(profile)]
+    if "notes" in sections or "history" in sections:
+        raw.append(str({k: v for k, v in state.items() if k != "user_message"}))
+    return "\n".join(raw)
+
+
+@dataclass
+class PromptContext:
+    message: str
+    profile: str
+    notes: str
+    recall: str
+    history: str
+    tokens: int      # estimated tokens of the rendered sections
+    raw_tokens: int  # same estimate for the raw dicts/history these replace
+
+
+def build_context(role: str, message: str | None, profile: dict | None,
+                  state: dict | None = None, max_tokens: int | None = None) -> PromptContext:
+    """
+    Render the context sections `role` uses within a token budget.
+    Priority when over budget: the user message (up to half the budget),
+    then the profile, then agent notes, then retrieved older turns (at most
+    RECALL_TOKEN_CAP); conversation history gets whatever is left (at most
+    HISTORY_TOKEN_CAP for the role), most recent lines first.
+    """
+    state = state or {}
+    budget = PROMPT_CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    sections = ROLE_SECTIONS[role]
+    if message is None:
+        message = str(state.get("user_message", ""))
+
+    message_text = _truncate(message.strip(), budget // 2)
+    profile_text = render_profile(profile, role)
+    remaining = budget - estimate_tokens(message_text) - estimate_tokens(profile_text)
+
+    notes_text = ""
+    if "notes" in sections:
+        notes_text = _render_notes(state, max(remaining, 0), NOTE_TOKEN_CAP.get(role))
+        remaining -= estimate_tokens(notes_text)
+
+    recall_text = ""
+    if "recall" in sections:
+        recall = str(state.get("relevant_turns") or "").strip()
+        recall_text = _truncate(recall, min(max(remaining, 0), RECALL_TOKEN_CAP)) if recall else ""
+        remaining -= estimate_tokens(recall_text)
+        recall_text = recall_text or NO_RECALL
+
+    history_text = ""
+    if "history" in sections:
+        history = str(state.get("conversation_history") or "").strip()
+        cap = min(max(remaining, 0), HISTORY_TOKEN_CAP.get(role, remaining))
+        history_text = _truncate(history, cap, keep_tail=True) if history else ""
+        history_text = history_text or NO_HISTORY
+
+    rendered = [message_text, profile_text, notes_text, recall_text, history_text]
+    return PromptContext(
+        message=message_text,
+        profile=profile_text,
+        notes=notes_text,
+        recall=recall_text,
+        history=history_text,
+        tokens=sum(estimate_tokens(t) for t in rendered),
+        raw_tokens=estimate_tokens(_raw_context(message, profile, state, sections)),
+    )
+
+
+# -------------------------------------------------------------------
+# PROMPT SIZE LOGGING
+# -------------------------------------------------------------------
+
+_stats_lock = threading.Lock()
+_prompt_stats: dict[str, dict] = {}
+
+
+def log_prompt(role: str, prompt: str, ctx: PromptContext) -> str:
+    """Record (and optionally print) prompt tokens before/after compaction; returns prompt."""
+    after = estimate_tokens(prompt)
+    before = after - ctx.tokens + ctx.raw_tokens
+    with _stats_lock:
+        entry = _prompt_stats.setdefault(role, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+        entry["calls"] += 1
+        entry["tokens_before"] += before
+        entry["tokens_after"] += after
+    if PROMPT_LOG_TOKENS:
+        print(f"prompt tokens role={role} before~{before} after~{after}")
+    return prompt
+
+
+def prompt_stats() -> dict:
+    with _stats_lock:
+        out = {}
+        for role, entry in _prompt_stats.items():
+            calls = entry["calls"]
+            out[role] = {
+                **entry,
+                "avg_before": round(entry["tokens_before"] / calls, 1),
+                "avg_after": round(entry["tokens_after"] / calls, 1),
+            }
+        return out
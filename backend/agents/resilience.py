@@ -0,0 +1,558 @@
+# backend/agents/resilience.py
+# Deadlines, hedged requests and a circuit breaker around agent LLM calls.
+#
+# Each agent module wraps its shared client:  llm = resilient(get_llm(), role, fallback)
+# - every call gets a deadline: min(the role profile's timeout, time left in
+#   the turn), counted from the moment the shared limiter admits the call;
+#   waiting in our own RPM/TPM/concurrency queue is bounded only by the turn
+#   and never counts as a provider failure or latency sample
+# - a call still running after the model's rolling p95 latency gets one
+#   hedged duplicate (unless the limiter is full); whichever reply arrives
+#   first wins
+# - after BREAKER_FAILURE_THRESHOLD consecutive failures the model's breaker
+#   opens and calls fail fast to the role's fallback (a degraded answer)
+#   until a probe succeeds after BREAKER_COOLDOWN_SECONDS
+# - with an alternate model in the role's profile, calls are routed to it
+#   while the primary's rolling latency is over the profile's budget or its
+#   breaker is open (agents/model_profiles.py)
+# The orchestrator calls begin_turn() at the start of every turn; the turn's
+# deadline and its "degraded" flag travel with the request context.
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from config import (
+    TURN_TIMEOUT,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_HEDGE_MAX_RATIO,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_COOLDOWN_SECONDS,
+    LLM_ALTERNATE_PROBE_RATIO,
+)
+from agents.groq_client import PooledLLM, get_llm
+from agents.model_profiles import ModelProfile, model_profile
+from agents.prompt_context import estimate_tokens
+from utils.metrics import Counter
+
+# latency samples needed before p95 is trusted for hedging
+MIN_HEDGE_SAMPLES = 20
+# weight of the newest sample in the rolling latency used for model selection
+LATENCY_EWMA_ALPHA = 0.2
+# while a slow primary is bypassed, every n-th call still goes to it
+_PROBE_EVERY = round(1 / LLM_ALTERNATE_PROBE_RATIO) if LLM_ALTERNATE_PROBE_RATIO > 0 else 0
+
+# Prometheus metrics (GET /metrics); tokens come from the provider's usage
+# report when present, otherwise from the chars/4 estimate
+LLM_TOKENS = Counter("wellness_llm_tokens", "LLM tokens per agent role", ["role", "kind"])
+LLM_REQUESTS = Counter("wellness_llm_requests", "Agent LLM calls by result", ["role", "outcome"])
+ALTERNATE_ROUTES = Counter(
+    "wellness_llm_alternate_routes", "Calls sent to the alternate model, by reason", ["role", "reason"]
+)
+
+
+# -------------------------------------------------------------------
+# PER-TURN BUDGET
+# -------------------------------------------------------------------
+
+@dataclass
+class TurnBudget:
+    deadline: float
+    degraded: bool = False
+    llm_calls: int = 0  # requests actually sent, hedges included
+    reasons: list[str] = field(default_factory=list)
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def mark_degraded(self, reason: str) -> None:
+        self.degraded = True
+        self.reasons.append(reason)
+
+
+_turn: contextvars.ContextVar[TurnBudget | None] = contextvars.ContextVar("llm_turn_budget", default=None)
+
+
+def begin_turn(timeout: float | None = None) -> TurnBudget:
+    """Start the deadline for a new turn in the current context and return it."""
+    budget = TurnBudget(deadline=time.monotonic() + (timeout or TURN_TIMEOUT))
+    _turn.set(budget)
+    return budget
+
+
+def current_turn() -> TurnBudget | None:
+    return _turn.get()
+
+
+# -------------------------------------------------------------------
+# PER-MODEL HEALTH: latency window + circuit breaker + counters
+# -------------------------------------------------------------------
+
+class _Health:
+    def __init__(self, model: str):
+        self.model = model
+        self._lock = threading.Lock()
+        self._latencies = {"call": deque(maxlen=200), "first_chunk": deque(maxlen=200)}
+        self._ewma: dict[str, float] = {}
+        self.state = "closed"  # closed | open | half_open
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.counters = {
+            "calls": 0, "successes": 0, "failures": 0, "timeouts": 0,
+            "hedges_sent": 0, "hedges_won": 0, "short_circuited": 0,
+            "turn_deadline_exceeded": 0, "fallbacks": 0, "breaker_opened": 0,
+        }
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def hedge_delay(self, kind: str) -> float | None:
+        """Rolling p95 (floored at LLM_HEDGE_MIN_DELAY), or None if hedging is off/untrained."""
+        if not LLM_HEDGE_ENABLED:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies[kind])
+            if len(samples) < MIN_HEDGE_SAMPLES:
+                return None
+            # cap duplicate load: only a small share of calls may be hedged
+            if self.counters["hedges_sent"] >= LLM_HEDGE_MAX_RATIO * max(self.counters["calls"], 1):
+                return None
+        return max(samples[int(0.95 * (len(samples) - 1))], LLM_HEDGE_MIN_DELAY)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= BREAKER_COOLDOWN_SECONDS:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True  # let exactly one probe through
+                return True
+            self.counters["short_circuited"] += 1
+            return False
+
+    def degraded(self, kind: str, latency_budget: float) -> str | None:
+        """"breaker_open" / "slow" when calls should avoid this model right now, else None."""
+        with self._lock:
+            cooling = self.state == "open" and time.monotonic() - self.opened_at < BREAKER_COOLDOWN_SECONDS
+            if cooling or (self.state == "half_open" and self._probe_in_flight):
+                return "breaker_open"
+            if self._ewma.get(kind, 0.0) > latency_budget:
+                return "slow"
+        return None
+
+    def success(self, kind: str, latency: float) -> None:
+        with self._lock:
+            self._latencies[kind].append(latency)
+            previous = self._ewma.get(kind)
+            self._ewma[kind] = latency if previous is None else previous + LATENCY_EWMA_ALPHA * (latency - previous)
+            self.counters["successes"] += 1
+            self.consecutive_failures = 0
+            recovered = self.state != "closed"
+            self.state = "closed"
+            self._probe_in_flight = False
+        if recovered:
+            print(f"Circuit breaker for {self.model} closed; calls resume.")
+
+    def failure(self, timed_out: bool) -> None:
+        with self._lock:
+            self.counters["failures"] += 1
+            self.counters["timeouts"] += int(timed_out)
+            self.consecutive_failures += 1
+            reopen = self.state == "half_open"
+            self._probe_in_flight = False
+            opened = reopen or (self.state == "closed" and self.consecutive_failures >= BREAKER_FAILURE_THRESHOLD)
+            if opened:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.counters["breaker_opened"] += 1
+            failures = self.consecutive_failures
+        # one line per state change; individual fallbacks are only counted
+        if opened:
+            print(f"WARNING: circuit breaker for {self.model} opened after "
+                  f"{failures} consecutive failures; using fallback answers.")
+
+    def abandon(self) -> None:
+        """A call was cancelled by its caller: neither success nor failure."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = sorted(self._latencies["call"])
+            return {
+                **self.counters,
+                "breaker_state": self.state,
+                "latency_p95_ms": round(calls[int(0.95 * (len(calls) - 1))] * 1000, 1) if calls else 0.0,
+                "latency_ewma_ms": round(self._ewma.get("call", 0.0) * 1000, 1),
+            }
+
+
+_health: dict[str, _Health] = {}
+_health_lock = threading.Lock()
+
+
+def _health_for(model: str) -> _Health:
+    with _health_lock:
+        if model not in _health:
+            _health[model] = _Health(model)
+        return _health[model]
+
+
+_routes: dict[str, dict[str, int]] = {}
+
+
+def _count_route(role: str, target: str) -> None:
+    with _health_lock:
+        counts = _routes.setdefault(role, {})
+        counts[target] = counts.get(target, 0) + 1
+
+
+def resilience_stats() -> dict:
+    with _health_lock:
+        return {model: health.stats() for model, health in _health.items()}
+
+
+def routing_stats() -> dict:
+    """Primary / alternate call counts per role (only roles with an alternate model)."""
+    with _health_lock:
+        return {role: dict(counts) for role, counts in _routes.items()}
+
+
+# -------------------------------------------------------------------
+# RESILIENT CLIENT
+# -------------------------------------------------------------------
+
+def _fallback_message(text: str, chunk: bool = False):
+    # imported here so importing the agents does not load langchain_core
+    from langchain_core.messages import AIMessage, AIMessageChunk
+
+    return AIMessageChunk(content=text) if chunk else AIMessage(content=text)
+
+
+class _Unavailable(Exception):
+    """Breaker open or turn deadline already spent; answer with the fallback."""
+
+
+async def _cancel(tasks) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _on_admit(llm, kwargs: dict, callback) -> dict:
+    """kwargs that run `callback` once the limiter admits the call (at once for unpooled clients)."""
+    if isinstance(llm, PooledLLM):
+        return {**kwargs, "on_admit": callback}
+    callback()
+    return kwargs
+
+
+def _queueing(llm) -> bool:
+    """A duplicate sent now would only wait in our own limiter, so hedging cannot help."""
+    return isinstance(llm, PooledLLM) and llm.saturated()
+
+
+class ResilientLLM:
+    """
+    Same invoke / ainvoke / astream API as the client it wraps. Failures,
+    timeouts and an open breaker never raise: the call answers with
+    `fallback` and the current turn is marked degraded.
+    The role's ModelProfile supplies max_tokens / temperature for every call
+    and the call timeout; with an alternate model configured, calls move to
+    it while the primary is slower than the profile's latency_budget or its
+    breaker is open.
+    """
+
+    def __init__(self, llm, role: str, fallback: str, profile: ModelProfile | None = None):
+        self.llm = llm
+        self.role = role
+        self.fallback = fallback
+        self.profile = profile or model_profile(role)
+        self.model = getattr(llm, "model", None) or getattr(llm, "model_name", None) or role
+        self.health = _health_for(self.model)
+        self.alternate = self.alternate_health = None
+        if self.profile.alternate and self.profile.alternate != self.model:
+            self.alternate = get_llm(self.profile.alternate)
+            self.alternate_health = _health_for(self.profile.alternate)
+        self._routed = itertools.count()
+
+    def _kwargs(self, kwargs: dict) -> dict:
+        return {**self.profile.call_kwargs(), **kwargs}
+
+    # -- model selection --------------------------------------------------
+
+    def _route(self, kind: str):
+        """(llm, health) for this call: the primary unless it is slow / broken and the alternate is not."""
+        if self.alternate is None:
+            return self.llm, self.health
+        reason = self.health.degraded(kind, self.profile.latency_budget)
+        if reason is None or self.alternate_health.degraded(kind, float("inf")) is not None:
+            _count_route(self.role, "primary")
+            return self.llm, self.health
+        # a share of the calls keeps measuring a slow primary, so traffic returns once it recovers
+        if reason == "slow" and _PROBE_EVERY and next(self._routed) % _PROBE_EVERY == 0:
+            _count_route(self.role, "primary_probe")
+            return self.llm, self.health
+        _count_route(self.role, f"alternate_{reason}")
+        ALTERNATE_ROUTES.labels(self.role, reason).inc()
+        return self.alternate, self.alternate_health
+
+    def _timeout(self, health: "_Health") -> float:
+        """Seconds a call admitted now may take; raises _Unavailable once the turn is out of time."""
+        timeout = self.profile.timeout
+        budget = current_turn()
+        if budget is not None:
+            if budget.remaining() <= 0:
+                health.count("turn_deadline_exceeded")
+                raise _Unavailable("turn deadline exceeded")
+            timeout = min(timeout, budget.remaining())
+        return timeout
+
+    def _start(self, health: "_Health") -> None:
+        """Count the call; raises _Unavailable when it may not run at all."""
+        self._timeout(health)
+        if not health.allow():
+            raise _Unavailable("circuit open")
+        health.count("calls")
+        self._count_turn_call()
+
+    async def _admission(self, health: "_Health", admitted: asyncio.Event, task) -> float:
+        """
+        Wait until the limiter admits `task`, bounded only by the turn's
+        deadline, and return the call's timeout counted from admission.
+        """
+        budget = current_turn()
+        waiter = asyncio.ensure_future(admitted.wait())
+        try:
+            await asyncio.wait({waiter, task}, timeout=budget.remaining() if budget else None,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if not admitted.is_set() and not task.done():
+            health.count("turn_deadline_exceeded")
+            raise _Unavailable("turn deadline exceeded in the limiter queue")
+        return self._timeout(health)
+
+    def _timed_out(self, health: "_Health", timeout: float, what: str) -> Exception:
+        """A provider timeout, unless the turn's remaining time was the tighter limit."""
+        if timeout < self.profile.timeout:
+            health.count("turn_deadline_exceeded")
+            return _Unavailable("turn deadline exceeded")
+        return TimeoutError(f"{what} within {timeout:.1f}s")
+
+    def _count_turn_call(self) -> None:
+        budget = current_turn()
+        if budget is not None:
+            budget.llm_calls += 1
+
+    def _record_tokens(self, prompt, message=None, text: str | None = None) -> None:
+        """Count prompt/completion tokens of one answered call."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens")
+        completion_tokens = usage.get("output_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(text if text is not None else str(message.content))
+        LLM_TOKENS.labels(self.role, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(self.role, "completion").inc(completion_tokens)
+        LLM_REQUESTS.labels(self.role, "ok").inc()
+
+    def _degrade(self, health: "_Health", reason: str) -> None:
+        LLM_REQUESTS.labels(self.role, "fallback").inc()
+        health.count("fallbacks")
+        budget = current_turn()
+        if budget is not None:
+            budget.mark_degraded(f"{self.role}: {reason}")
+
+    # -- sync -----------------------------------------------------------
+
+    def invoke(self, prompt, **kwargs):
+        """
+        Blocking call for background threads (the memory summarizer). The
+        breaker, model routing and fallback apply; there is no hedging and no
+        deadline beyond the HTTP client's own timeout. Chat turns use
+        ainvoke / astream.
+        """
+        llm, health = self._route("call")
+        try:
+            self._start(health)
+        except _Unavailable as e:
+            self._degrade(health, str(e))
+            return _fallback_message(self.fallback)
+        admitted_at: list[float] = []
+        try:
+            message = llm.invoke(prompt, **_on_admit(llm, self._kwargs(kwargs),
+                                                     lambda: admitted_at.append(time.monotonic())))
+        except Exception as e:
+            health.failure(isinstance(e, TimeoutError))
+            self._degrade(health, type(e).__name__)
+            return _fallback_message(self.fallback)
+        health.success("call", time.monotonic() - admitted_at[0])
+        self._record_tokens(prompt, message)
+        return message
+
+    # -- async ----------------------------------------------------------
+
+    async def _acall(self, llm, health: "_Health", prompt, kwargs):
+        admitted = asyncio.Event()
+        first = asyncio.ensure_future(llm.ainvoke(prompt, **_on_admit(llm, kwargs, admitted.set)))
+        tasks = [first]
+        try:
+            timeout = await self._admission(health, admitted, first)
+            started = time.monotonic()
+            hedge_after = health.hedge_delay("call")
+            if hedge_after is not None and hedge_after < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done and not _queueing(llm):
+                    tasks.append(asyncio.ensure_future(llm.ainvoke(prompt, **kwargs)))
+                    health.count("hedges_sent")
+                    self._count_turn_call()
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                left = timeout - (time.monotonic() - started)
+                done, pending = await asyncio.wait(pending, timeout=max(left, 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise self._timed_out(health, timeout, "no reply")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            health.count("hedges_won")
+                        health.success("call", time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # cancelling the loser frees its limiter slot and HTTP connection
+            await _cancel([t for t in tasks if not t.done()])
+
+    async def ainvoke(self, prompt, **kwargs):
+        llm, health = self._route("call")
+        try:
+            self._start(health)
+        except _Unavailable as e:
+            self._degrade(health, str(e))
+            return _fallback_message(self.fallback)
+        try:
+            message = await self._acall(llm, health, prompt, self._kwargs(kwargs))
+        except asyncio.CancelledError:
+            health.abandon()
+            raise
+        except _Unavailable as e:
+            # the turn ran out of time, not the provider
+            health.abandon()
+            self._degrade(health, str(e))
+            return _fallback_message(self.fallback)
+        except Exception as e:
+            health.failure(isinstance(e, TimeoutError))
+            self._degrade(health, type(e).__name__)
+            return _fallback_message(self.fallback)
+        self._record_tokens(prompt, message)
+        return message
+
+    # -- streaming ------------------------------------------------------
+
+    async def _first_chunk(self, llm, health: "_Health", prompt, kwargs):
+        """
+        Open the stream (hedged on time-to-first-chunk); returns (stream,
+        first chunk, monotonic deadline for the rest of the stream).
+        """
+        admitted = asyncio.Event()
+        streams = [llm.astream(prompt, **_on_admit(llm, kwargs, admitted.set))]
+        first = asyncio.ensure_future(streams[0].__anext__())
+        tasks = {first: streams[0]}
+        try:
+            timeout = await self._admission(health, admitted, first)
+            started = time.monotonic()
+            hedge_after = health.hedge_delay("first_chunk")
+            if hedge_after is not None and hedge_after < timeout:
+                done, _ = await asyncio.wait(list(tasks), timeout=hedge_after)
+                if not done and not _queueing(llm):
+                    streams.append(llm.astream(prompt, **kwargs))
+                    tasks[asyncio.ensure_future(streams[1].__anext__())] = streams[1]
+                    health.count("hedges_sent")
+                    self._count_turn_call()
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                left = timeout - (time.monotonic() - started)
+                done, pending = await asyncio.wait(pending, timeout=max(left, 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise self._timed_out(health, timeout, "no first chunk")
+                for task in done:
+                    if task.exception() is None or isinstance(task.exception(), StopAsyncIteration):
+                        winner = tasks.pop(task)
+                        if winner is not streams[0]:
+                            health.count("hedges_won")
+                        health.success("first_chunk", time.monotonic() - started)
+                        chunk = None if task.exception() else task.result()
+                        return winner, chunk, started + timeout
+                    error = task.exception()
+            raise error
+        finally:
+            losers = [t for t in tasks if not t.done()]
+            await _cancel(losers)
+            for stream in tasks.values():
+                await stream.aclose()
+
+    async def astream(self, prompt, **kwargs):
+        llm, health = self._route("first_chunk")
+        try:
+            self._start(health)
+        except _Unavailable as e:
+            self._degrade(health, str(e))
+            yield _fallback_message(self.fallback, chunk=True)
+            return
+
+        try:
+            stream, chunk, deadline = await self._first_chunk(llm, health, prompt, self._kwargs(kwargs))
+        except asyncio.CancelledError:
+            health.abandon()
+            raise
+        except _Unavailable as e:
+            health.abandon()
+            self._degrade(health, str(e))
+            yield _fallback_message(self.fallback, chunk=True)
+            return
+        except Exception as e:
+            health.failure(isinstance(e, TimeoutError))
+            self._degrade(health, type(e).__name__)
+            yield _fallback_message(self.fallback, chunk=True)
+            return
+
+        parts: list[str] = []
+        usage_chunk = None
+        try:
+            while chunk is not None:
+                parts.append(str(chunk.content))
+                if getattr(chunk, "usage_metadata", None):
+                    usage_chunk = chunk  # providers report usage on the last chunk
+                yield chunk
+                left = deadline - time.monotonic()
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(left, 0))
+                except StopAsyncIteration:
+                    chunk = None
+            self._record_tokens(prompt, usage_chunk, "".join(parts))
+        except Exception as e:
+            # part of the answer is already out; stop here rather than append a fallback
+            health.failure(isinstance(e, TimeoutError))
+            self._degrade(health, f"stream interrupted: {type(e).__name__}")
+        finally:
+            await stream.aclose()
+
+
+def resilient(llm, role: str, fallback: str) -> ResilientLLM:
+    return ResilientLLM(llm, role, fallback)
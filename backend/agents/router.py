@@ -0,0 +1,164 @@
+# backend/agents/router.py
+# Pluggable agent routing.
+#
+# A Router looks at the user message (and optionally profile/state) and
+# returns the full list of agents to run, or None when it is not sure.
+# The orchestrator uses the configured router first and only falls back to the
+# supervisor LLM when the router abstains.
+#
+# LocalRouter: hashed n-gram TF-IDF features + one logistic regression per
+# agent (multi-label), NumPy only. Weights live in agents/router_model.npz,
+# produced by tools/train_router.py from historical agents_used.
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from agents.text_features import hashed_ngrams
+from config import ROUTER_BACKEND, ROUTER_MIN_CONFIDENCE
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_model.npz")
+
+ROUTER_N_FEATURES = 2 ** 14
+
+
+@dataclass
+class RouteDecision:
+    agents: List[str]
+    confidence: float
+    source: str
+
+
+class Router:
+    """Base interface: return a RouteDecision, or None to defer to the supervisor LLM."""
+
+    name = "base"
+
+    def route(self, message: str, profile: dict | None, state: dict) -> Optional[RouteDecision]:
+        raise NotImplementedError
+
+
+class NullRouter(Router):
+    """Always defers: every turn goes through the supervisor LLM (original behaviour)."""
+
+    name = "llm"
+
+    def route(self, message, profile, state):
+        return None
+
+
+def featurize(texts: List[str], n_features: int = ROUTER_N_FEATURES) -> np.ndarray:
+    """Dense term-frequency matrix (rows = texts) over hashed unigrams + bigrams."""
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for index, value in hashed_ngrams(text, n_features).items():
+            matrix[row, index] = value
+    return matrix
+
+
+class LocalRouter(Router):
+    """Multi-label logistic regression over TF-IDF weighted hashed n-grams."""
+
+    name = "local"
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, idf: np.ndarray,
+                 labels: List[str], min_confidence: float = ROUTER_MIN_CONFIDENCE):
+        self.weights = weights  # (n_features, n_labels)
+        self.bias = bias        # (n_labels,)
+        self.idf = idf          # (n_features,)
+        self.labels = labels
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> Optional["LocalRouter"]:
+        if not os.path.exists(path):
+            return None
+        data = np.load(path, allow_pickle=False)
+        return cls(data["weights"], data["bias"], data["idf"], [str(x) for x in data["labels"]])
+
+    def save(self, path: str = MODEL_PATH) -> None:
+        np.savez_compressed(
+            path,
+            weights=self.weights.astype(np.float32),
+            bias=self.bias.astype(np.float32),
+            idf=self.idf.astype(np.float32),
+            labels=np.array(self.labels),
+        )
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        """TF-IDF rows, L2-normalised."""
+        x = featurize(texts, self.idf.shape[0]) * self.idf
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return x / norms
+
+    def predict_proba(self, message: str) -> np.ndarray:
+        """Per-agent probabilities, in self.labels order (sparse path, no dense row)."""
+        features = hashed_ngrams(message, self.idf.shape[0])
+        z = self.bias.copy()
+        if features:
+            index = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+            values = np.fromiter(features.values(), dtype=np.float32, count=len(features)) * self.idf[index]
+            norm = np.linalg.norm(values)
+            if norm:
+                z += (values / norm) @ self.weights[index]
+        return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+    def route(self, message, profile, state):
+        proba = self.predict_proba(message)
+        selected = [label for label, p in zip(self.labels, proba) if p >= 0.5]
+        if not selected:
+            return None
+
+        # Confidence = the weakest per-agent decision (distance from 0.5, rescaled to 0..1)
+        confidence = float(np.min(np.abs(proba - 0.5)) * 2)
+        if confidence < self.min_confidence:
+            return None
+        return RouteDecision(agents=selected, confidence=confidence, source=self.name)
+
+
+_lock = threading.Lock()
+_stats = {"local": 0, "fallback": 0}
+_router: Optional[Router] = None
+
+
+def _build_router() -> Router:
+    if ROUTER_BACKEND == "local":
+        local = LocalRouter.load()
+        if local is not None:
+            return local
+        print("WARNING: ROUTER_BACKEND=local but no router_model.npz found; using the supervisor LLM.")
+    return NullRouter()
+
+
+def get_router() -> Router:
+    global _router
+    if _router is None:
+        _router = _build_router()
+    return _router
+
+
+def set_router(router: Optional[Router]) -> None:
+    """Swap the active router (None = rebuild from config on next use)."""
+    global _router
+    _router = router
+
+
+def route(message: str, profile: dict | None, state: dict) -> Optional[RouteDecision]:
+    """Ask the active router; count whether it answered or deferred to the LLM."""
+    decision = get_router().route(message, profile, state)
+    with _lock:
+        _stats["local" if decision else "fallback"] += 1
+    return decision
+
+
+def router_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+    total = stats["local"] + stats["fallback"]
+    stats["backend"] = get_router().name
+    stats["local_rate"] = round(stats["local"] / total, 4) if total else 0.0
+    return stats
@@ -0,0 +1,37 @@
+# backend/agents/summarizer_agent.py
+# Folds older conversation turns into a short running summary
+# (orchestrator/summary_memory.py calls it off the request path).
+from agents.groq_client import get_llm
+from agents.model_profiles import model_profile
+from agents.resilience import resilient
+
+# Degraded answer: empty, so the memory keeps its previous summary
+FALLBACK_REPLY = ""
+llm = resilient(get_llm(model_profile("Summarizer").model), "Summarizer", FALLBACK_REPLY)
+
+
+def _build_prompt(summary: str, turns: list[tuple[str, str]], max_words: int) -> str:
+    transcript = "\n".join(f"Human: {user}\nAI: {ai}" for user, ai in turns)
+    return f"""
+You maintain the running summary of a conversation between a user and a digital wellness assistant.
+
+CURRENT SUMMARY:
+{summary or "(empty)"}
+
+NEW TURNS TO FOLD IN:
+{transcript}
+
+Write the updated running summary:
+- Keep facts about the user (symptoms, goals, diet, routines, constraints) and the advice already given.
+- Drop greetings, repetition and wording details.
+- At most {max_words} words, plain sentences, no Markdown.
+
+Return ONLY the updated summary.
+"""
+
+
+def summarize(summary: str, turns: list[tuple[str, str]], max_tokens: int) -> str:
+    """Updated summary covering `summary` + `turns`; "" when the LLM call degraded."""
+    # ~0.75 words per token
+    reply = llm.invoke(_build_prompt(summary, turns, max(int(max_tokens * 0.75), 20)))
+    return str(reply.content).strip()
@@ -2,8 +2,32 @@
 
 import json
 from agents.groq_client import get_llm
+from agents.model_profiles import model_profile
+from agents.resilience import resilient
+from agents.prompt_context import build_context, log_prompt
 
-llm = get_llm()
+# Degraded answer: stop selecting agents (plan mode parses this as an empty plan)
+FALLBACK_REPLY = '{"next_agent": "FINISH"}'
+llm = resilient(get_llm(model_profile("Supervisor").model), "Supervisor", FALLBACK_REPLY)
+
+AGENT_NAMES = ["SymptomAgent", "DietAgent", "FitnessAgent", "LifestyleAgent"]
+
+AGENT_DESCRIPTIONS = """AVAILABLE AGENTS AND WHAT THEY DO:
+
+1. SymptomAgent
+   - Understands physical and mental symptoms.
+   - Use when the user talks about pain, discomfort, fatigue, dizziness, headaches, stress, or feeling unwell.
+
+2. DietAgent
+   - Handles food, nutrition, digestion, bloating, hydration, weight change, diet plans.
+   - Use when diet or eating patterns matter.
+
+3. FitnessAgent
+   - Handles exercise, workouts, gym progress, posture, stamina, muscle gain, not seeing results from workouts.
+
+4. LifestyleAgent
+   - Handles sleep, stress, habits, routines, burnout, time management, consistency.
+"""
 
 
 def _extract_json(text: str):
@@ -26,22 +50,12 @@ def _extract_json(text: str):
         return None
 
 
-def supervisor(user_message: str, profile: dict | None, state: dict) -> str:
-    """
-    Supervisor LLM:
-    - Receives current user message, user profile, and the orchestration state.
-    - Uses reasoning (not keyword matching) to decide which ONE agent to call next.
-    - Reads conversation_history from LangChain ConversationBufferMemory via state["conversation_history"].
-    - Returns: "SymptomAgent" | "DietAgent" | "FitnessAgent" | "LifestyleAgent" | "FINISH"
-    """
-
-    conversation_history = state.get("conversation_history", "No previous conversation yet.")
+def _build_prompt(user_message: str, profile: dict | None, state: dict) -> str:
     intent = state.get("intent", {})
+    # history tail, relevant profile fields and short agent notes, within the token budget
+    ctx = build_context("Supervisor", user_message, profile, state)
 
-    # Remove large or irrelevant fields from state when showing to LLM
-    cleaned_state = {k: v for k, v in state.items() if k not in ["conversation_history", "intent"]}
-
-    SUPERVISOR_PROMPT = f"""
+    return log_prompt("Supervisor", f"""
 You are the SUPERVISOR of a multi-agent Digital Wellness Assistant.
 
 Your role:
@@ -50,38 +64,26 @@ Your role:
 - You must consider:
   - The current user message
   - The user's stored profile
-  - The previous conversation history
+  - The previous conversation history and the relevant earlier turns
   - The outputs of any agents already called in this turn (state)
   - The user's general intent: {intent}
 
 CONVERSATION HISTORY (from LangChain ConversationBufferMemory):
-{conversation_history}
+{ctx.history}
+
+RELEVANT EARLIER TURNS (older messages retrieved for this one):
+{ctx.recall}
 
 CURRENT USER MESSAGE:
-\"\"\"{user_message}\"\"\"
+\"\"\"{ctx.message}\"\"\"
 
 USER PROFILE:
-{profile}
+{ctx.profile}
 
 CURRENT ORCHESTRATION STATE (agent outputs so far in THIS turn):
-{cleaned_state}
-
-AVAILABLE AGENTS AND WHAT THEY DO:
-
-1. SymptomAgent
-   - Understands physical and mental symptoms.
-   - Use when the user talks about pain, discomfort, fatigue, dizziness, headaches, stress, or feeling unwell.
-
-2. DietAgent
-   - Handles food, nutrition, digestion, bloating, hydration, weight change, diet plans.
-   - Use when diet or eating patterns matter.
-
-3. FitnessAgent
-   - Handles exercise, workouts, gym progress, posture, stamina, muscle gain, not seeing results from workouts.
-
-4. LifestyleAgent
-   - Handles sleep, stress, habits, routines, burnout, time management, consistency.
+{ctx.notes}
 
+{AGENT_DESCRIPTIONS}
 SELECTION GUIDELINES (VERY IMPORTANT):
 
 - Use as FEW agents as possible to answer the user well.
@@ -104,9 +106,10 @@ Or:
 {{
   "next_agent": "FINISH"
 }}
-"""
+""", ctx)
+
 
-    raw = llm.invoke(SUPERVISOR_PROMPT).content.strip()
+def _parse_next_agent(raw: str) -> str:
     data = _extract_json(raw)
 
     if not data or "next_agent" not in data:
@@ -114,3 +117,87 @@ Or:
         return "FINISH"
 
     return data["next_agent"]
+
+
+async def asupervisor(user_message: str, profile: dict | None, state: dict) -> str:
+    """
+    Supervisor LLM:
+    - Receives current user message, user profile, and the orchestration state.
+    - Uses reasoning (not keyword matching) to decide which ONE agent to call next.
+    - Reads conversation_history from LangChain ConversationBufferMemory via state["conversation_history"].
+    - Returns: "SymptomAgent" | "DietAgent" | "FitnessAgent" | "LifestyleAgent" | "FINISH"
+    """
+    raw = (await llm.ainvoke(_build_prompt(user_message, profile, state))).content.strip()
+    return _parse_next_agent(raw)
+
+
+# -------------------------------------------------------------------
+# PLAN MODE: pick the whole set of agents in ONE call
+# -------------------------------------------------------------------
+
+def _build_plan_prompt(user_message: str, profile: dict | None, state: dict) -> str:
+    intent = state.get("intent", {})
+    ctx = build_context("Planner", user_message, profile, state)
+
+    return log_prompt("Planner", f"""
+You are the SUPERVISOR of a multi-agent Digital Wellness Assistant.
+
+Your role:
+- Decide the COMPLETE set of specialized agents needed to answer this message.
+- The selected agents will run at the same time and their answers will be merged.
+- Use deep reasoning, not simple keyword matching.
+- The user's general intent: {intent}
+
+CONVERSATION HISTORY (from LangChain ConversationBufferMemory):
+{ctx.history}
+
+RELEVANT EARLIER TURNS (older messages retrieved for this one):
+{ctx.recall}
+
+CURRENT USER MESSAGE:
+\"\"\"{ctx.message}\"\"\"
+
+USER PROFILE:
+{ctx.profile}
+
+{AGENT_DESCRIPTIONS}
+SELECTION GUIDELINES (VERY IMPORTANT):
+
+- Use as FEW agents as possible to answer the user well.
+- Most questions need ONLY 1 or 2 agents.
+- DO NOT select all agents unless the situation really involves many dimensions.
+- DO NOT rely on exact keyword matching. Infer the user's real needs from meaning & context.
+- List each agent at most once.
+
+OUTPUT FORMAT (STRICT):
+
+You MUST respond with ONLY valid JSON, no extra text, no Markdown, no explanation.
+
+Example:
+{{
+  "agents": ["SymptomAgent", "DietAgent"]
+}}
+""", ctx)
+
+
+def _parse_plan(raw: str) -> list[str]:
+    data = _extract_json(raw)
+    if not data or not isinstance(data.get("agents"), list):
+        # Fallback: if LLM misbehaves, do not break the system.
+        return []
+
+    plan: list[str] = []
+    for name in data["agents"]:
+        if name in AGENT_NAMES and name not in plan:
+            plan.append(name)
+    return plan
+
+
+async def aplan_agents(user_message: str, profile: dict | None, state: dict) -> list[str]:
+    """
+    Planning supervisor:
+    - Same inputs as asupervisor(), but asks for ALL agents needed in one call.
+    - Returns an ordered, de-duplicated list of agent names (may be empty).
+    """
+    raw = (await llm.ainvoke(_build_plan_prompt(user_message, profile, state))).content.strip()
+    return _parse_plan(raw)
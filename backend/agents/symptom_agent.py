@@ -1,14 +1,14 @@
 from agents.groq_client import get_llm
+from agents.model_profiles import model_profile
+from agents.resilience import resilient
+from agents.prompt_context import build_context, log_prompt
 
-llm = get_llm()
+FALLBACK_REPLY = "- Rest and drink water.\n- See a doctor if the symptoms are severe or getting worse."
+llm = resilient(get_llm(model_profile("SymptomAgent").model), "SymptomAgent", FALLBACK_REPLY)
 
-def run_symptom_agent(message: str, profile: dict | None) -> str:
-    """
-    Understand symptoms AND provide short, actionable wellness suggestions.
-    No long summaries. No repeating user's message. No medical advice.
-    """
-
-    prompt = f"""
+def _build_prompt(message: str, profile: dict | None, state: dict | None = None) -> str:
+    ctx = build_context("SymptomAgent", message, profile, state)
+    return log_prompt("SymptomAgent", f"""
 You are the SymptomAgent in a wellness assistant.
 
 Your job:
@@ -17,10 +17,16 @@ Your job:
 - Give helpful, practical suggestions to feel better.
 
 User message:
-\"\"\"{message}\"\"\"
+\"\"\"{ctx.message}\"\"\"
+
+User profile:
+{ctx.profile}
 
-User profile (may be None):
-{profile}
+Relevant earlier conversation (older turns retrieved for this message):
+{ctx.recall}
+
+Recent conversation:
+{ctx.history}
 
 RESPONSE RULES:
 - Use the FEWEST number of sentences needed to help the user.
@@ -31,6 +37,20 @@ RESPONSE RULES:
 - Do NOT ask questions unless absolutely necessary.
 
 Write a concise response now.
-"""
-    response = llm.invoke(prompt).content
-    return response.strip()
\ No newline at end of file
+""", ctx)
+
+
+async def arun_symptom_agent(message: str, profile: dict | None, state: dict | None = None) -> str:
+    """
+    Understand symptoms AND provide short, actionable wellness suggestions.
+    No long summaries. No repeating user's message. No medical advice.
+    """
+    response = (await llm.ainvoke(_build_prompt(message, profile, state))).content
+    return response.strip()
+
+
+async def astream_symptom_agent(message: str, profile: dict | None, state: dict | None = None):
+    """Yield the answer in text chunks as the LLM produces them."""
+    async for chunk in llm.astream(_build_prompt(message, profile, state)):
+        if chunk.content:
+            yield chunk.content
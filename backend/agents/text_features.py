@@ -0,0 +1,35 @@
+# backend/agents/text_features.py
+# Tiny text featurizer shared by the local (non-LLM) models.
+# Word unigrams + bigrams, hashed into a fixed-size space with crc32 so the
+# indices are stable across processes (Python's hash() is salted).
+
+import re
+import zlib
+from typing import Dict, List
+
+N_FEATURES = 2 ** 18
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def hashed_ngrams(text: str, n_features: int = N_FEATURES) -> Dict[int, float]:
+    """
+    Return a sparse {feature_index: value} dict for unigrams and bigrams.
+    Values are counts scaled by 1/sqrt(n_terms) so long messages don't dominate.
+    """
+    tokens = tokenize(text)
+    terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not terms:
+        return {}
+
+    features: Dict[int, float] = {}
+    for term in terms:
+        index = zlib.crc32(term.encode("utf-8")) % n_features
+        features[index] = features.get(index, 0.0) + 1.0
+
+    scale = 1.0 / (len(terms) ** 0.5)
+    return {index: count * scale for index, count in features.items()}
@@ -0,0 +1,67 @@
+# backend/benchmarks/bench_chat_concurrency.py
+# Compare concurrent /chat throughput: a plain `def` route blocking on
+# process_query (one event loop per request on Starlette's threadpool) vs
+# async aprocess_query on one event loop. The LLM and Mongo calls are stubbed with fixed latencies,
+# so the numbers show orchestration concurrency, not Groq speed.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_chat_concurrency --requests 400 --llm-latency 0.3
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# every request asks the same question with the same profile: with the response
+# cache on, the async pass would be served from what the sync pass just stored
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+from benchmarks.stubs import StubLLM, install_stub_llm, install_stub_db  # noqa: E402
+
+# Starlette's default threadpool (anyio) allows 40 concurrent sync handlers
+STARLETTE_THREADPOOL_SIZE = 40
+
+
+def bench_sync(orchestrator, n_requests: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=STARLETTE_THREADPOOL_SIZE) as pool:
+        futures = [
+            pool.submit(orchestrator.process_query, f"user-{i}", "I feel tired all day")
+            for i in range(n_requests)
+        ]
+        for f in futures:
+            f.result()
+    return time.perf_counter() - start
+
+
+async def bench_async(orchestrator, n_requests: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        orchestrator.aprocess_query(f"user-{i}", "I feel tired all day")
+        for i in range(n_requests)
+    ))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async /chat concurrency benchmark")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per stub LLM call")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds per stub DB call")
+    args = parser.parse_args()
+
+    install_stub_llm(StubLLM(args.llm_latency))
+    orchestrator = install_stub_db(args.db_latency)
+
+    sync_elapsed = bench_sync(orchestrator, args.requests)
+    async_elapsed = asyncio.run(bench_async(orchestrator, args.requests))
+
+    print(f"requests={args.requests} llm_latency={args.llm_latency}s db_latency={args.db_latency}s")
+    print(f"{'mode':<28}{'elapsed (s)':>12}{'req/s':>10}")
+    print(f"{'sync (threadpool=40)':<28}{sync_elapsed:>12.2f}{args.requests / sync_elapsed:>10.1f}")
+    print(f"{'async (event loop)':<28}{async_elapsed:>12.2f}{args.requests / async_elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# backend/benchmarks/bench_google_callback.py
+# Google OAuth callback latency against a local OAuth stand-in server.
+#
+# The stand-in (uvicorn on a free port, --google-latency seconds per request)
+# serves /token (access_token + an RS256 id_token signed with a throwaway
+# key), /userinfo and /certs (JWKS). Two rounds through the ASGI app, the
+# same mix of new and returning users each:
+#   legacy   the previous handler: sync route, `requests` without a session,
+#            token exchange + userinfo, find user then insert
+#            (re-created here as /bench/google-callback-legacy)
+#   current  GET /auth/google/callback: shared async client, local id_token
+#            check against the cached JWKS, one upsert
+# Reports callbacks/s, p50/p95/p99 latency, stand-in requests per callback
+# and Mongo operations per callback.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_google_callback --requests 400 --concurrency 16 --google-latency 0.05
+
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+from benchmarks.stubs import install_memory_db, percentile
+
+CLIENT_ID = "bench-client.apps.googleusercontent.com"
+KEY_ID = "bench-key"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# -------------------------------------------------------------------
+# LOCAL OAUTH STAND-IN
+# -------------------------------------------------------------------
+
+class OAuthStandIn:
+    """Token, userinfo and JWKS endpoints shaped like Google's, in a background thread."""
+
+    def __init__(self, latency: float):
+        import jwt
+        import uvicorn
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from fastapi import FastAPI, Header, Request
+        from fastapi.responses import JSONResponse
+
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.requests = Counter()
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+        jwks = {"keys": [{**jwk, "kid": KEY_ID, "alg": "RS256", "use": "sig"}]}
+        app = FastAPI()
+
+        def identity(code: str) -> dict:
+            # code "<round>:<n>" signs in user n of that round
+            round_name, n = code.split(":")
+            return {"email": f"user{n}@{round_name}.bench", "email_verified": True, "name": f"User {n}"}
+
+        @app.post("/token")
+        async def token(request: Request):
+            self.requests["token"] += 1
+            code = parse_qs((await request.body()).decode())["code"][0]
+            await asyncio.sleep(latency)
+            now = int(time.time())
+            claims = {**identity(code), "iss": "https://accounts.google.com", "aud": CLIENT_ID,
+                      "sub": code, "iat": now, "exp": now + 3600}
+            id_token = jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": KEY_ID})
+            return {"access_token": code, "id_token": id_token, "token_type": "Bearer", "expires_in": 3599}
+
+        @app.get("/userinfo")
+        async def userinfo(authorization: str = Header(...)):
+            self.requests["userinfo"] += 1
+            await asyncio.sleep(latency)
+            return identity(authorization.removeprefix("Bearer "))
+
+        @app.get("/certs")
+        async def certs():
+            self.requests["certs"] += 1
+            await asyncio.sleep(latency)
+            return JSONResponse(jwks, headers={"Cache-Control": "public, max-age=3600"})
+
+        self._server = uvicorn.Server(uvicorn.Config(app, port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(5)
+
+
+def add_legacy_callback_route(app) -> None:
+    """The callback as it was: sync def, two `requests` calls, find then insert."""
+    import requests
+    from fastapi import HTTPException
+    from database import get_user_by_email, save_user
+    from utils.jwt_handler import create_jwt_token
+    from utils.password_hash import hash_password
+
+    @app.get("/bench/google-callback-legacy")
+    def google_callback_legacy(code: str):
+        token_resp = requests.post(os.environ["GOOGLE_TOKEN_URL"], data={"code": code, "client_id": CLIENT_ID})
+        if token_resp.status_code != 200:
+            raise HTTPException(status_code=400, detail="Failed to obtain tokens from Google")
+        access_token = token_resp.json()["access_token"]
+        userinfo = requests.get(os.environ["GOOGLE_USERINFO_URL"],
+                                headers={"Authorization": f"Bearer {access_token}"}).json()
+        user = get_user_by_email(userinfo["email"])
+        if not user:
+            try:
+                user = save_user({"email": userinfo["email"], "name": userinfo["name"],
+                                  "password_hash": hash_password(os.urandom(16).hex())})
+            except ValueError:
+                user = get_user_by_email(userinfo["email"])
+        return {"token": create_jwt_token(user["id"])}
+
+
+async def run_round(client, path: str, round_name: str, n_requests: int, n_users: int,
+                    concurrency: int) -> tuple[list[float], int, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, params={"code": f"{round_name}:{i % n_users}"})
+            if response.status_code in (200, 307):
+                samples.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return samples, errors, time.perf_counter() - started
+
+
+async def bench(args, stand_in: OAuthStandIn, db) -> None:
+    import httpx
+    from main import app
+    from utils import google_oauth
+
+    add_legacy_callback_route(app)
+    rounds = [("legacy", "/bench/google-callback-legacy"), ("current", "/auth/google/callback")]
+    print(f"requests={args.requests} concurrency={args.concurrency} users={args.users} "
+          f"google_latency={args.google_latency}s db_latency={args.db_latency}s")
+    print(f"{'round':<10}{'cb/s':>8}{'p50':>10}{'p95':>10}{'p99':>10}"
+          f"{'google req/cb':>15}{'db ops/cb':>11}{'errors':>8}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=60) as client:
+        for round_name, path in rounds:
+            google_before, db_before = sum(stand_in.requests.values()), db.ops()
+            samples, errors, elapsed = await run_round(
+                client, path, round_name, args.requests, args.users, args.concurrency
+            )
+            google_calls = sum(stand_in.requests.values()) - google_before
+            db_ops = db.ops() - db_before
+            print(f"{round_name:<10}{len(samples) / elapsed:>8.1f}"
+                  f"{percentile(samples, 50) * 1000:>8.1f}ms{percentile(samples, 95) * 1000:>8.1f}ms"
+                  f"{percentile(samples, 99) * 1000:>8.1f}ms{google_calls / args.requests:>15.2f}"
+                  f"{db_ops / args.requests:>11.2f}{errors:>8}")
+    print(f"\nstand-in requests: {dict(stand_in.requests)}")
+    print(f"google_oauth: {google_oauth.google_oauth_stats()}")
+    await google_oauth.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google OAuth callback latency against a local stand-in")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=100, help="distinct accounts (rest are returning users)")
+    parser.add_argument("--google-latency", type=float, default=0.05, help="seconds per stand-in request")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds per in-memory DB call")
+    args = parser.parse_args()
+
+    with OAuthStandIn(args.google_latency) as stand_in:
+        # read by config.py, so set before the app is imported
+        os.environ.update({
+            "GOOGLE_CLIENT_ID": CLIENT_ID,
+            "GOOGLE_TOKEN_URL": f"{stand_in.base_url}/token",
+            "GOOGLE_USERINFO_URL": f"{stand_in.base_url}/userinfo",
+            "GOOGLE_JWKS_URL": f"{stand_in.base_url}/certs",
+        })
+        db = install_memory_db(args.db_latency)
+        db["users"].create_index("email", unique=True)
+        asyncio.run(bench(args, stand_in, db))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# backend/benchmarks/bench_login.py
+# Login throughput under concurrent chat load, through the ASGI app.
+#
+# For a fixed duration, --chat-clients loop on POST /chat (with a bearer
+# token, stub LLM, in-memory Mongo) while --login-clients loop on a login
+# route. Three rounds:
+#   chat only       baseline chat latency
+#   inline login    the previous handler: sync route, pbkdf2 verify on the
+#                   Starlette threadpool (re-created here as /bench/login-inline)
+#   pooled login    POST /auth/login: async route, verify in the password
+#                   process pool (PASSWORD_HASH_WORKERS)
+# Reports logins/s, chat req/s and p50/p95 latency of both, plus the JWT
+# claims cache hit rate.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_login --duration 10 --chat-clients 32 --login-clients 16
+#   PASSWORD_HASH_WORKERS=4 PASSWORD_HASH_ROUNDS=100000 python -m benchmarks.bench_login
+
+import argparse
+import asyncio
+import itertools
+import time
+
+from benchmarks.stubs import StubLLM, install_stub_llm, install_memory_db, percentile
+
+PASSWORD = "correct horse battery staple"
+# shared by all rounds so no chat message repeats (a repeat is a response-cache hit)
+_sequence = itertools.count()
+
+
+def add_inline_login_route(app) -> None:
+    """The /auth/login handler as it was: sync def, blocking Mongo and pbkdf2."""
+    from fastapi import HTTPException
+    from database import get_user_by_email
+    from routers.auth import LoginRequest
+    from utils.jwt_handler import create_jwt_token
+    from utils.password_hash import verify_password
+
+    @app.post("/bench/login-inline")
+    def login_inline(req: LoginRequest):
+        user = get_user_by_email(req.email)
+        if not user or not verify_password(req.password, user["password_hash"]):
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        return {"id": user["id"], "token": create_jwt_token(str(user["id"]))}
+
+
+def seed_users(n_users: int) -> list[dict]:
+    """Users sharing one password hash (hashing is not what is measured here)."""
+    import database
+    from utils.jwt_handler import create_jwt_token
+    from utils.password_hash import hash_password
+
+    password_hash = hash_password(PASSWORD)
+    users = []
+    for i in range(n_users):
+        user = database.save_user({"email": f"user{i}@bench.local", "name": f"User {i}",
+                                   "password_hash": password_hash, "profile_complete": True})
+        users.append({"email": user["email"], "token": create_jwt_token(user["id"])})
+    return users
+
+
+def _summary(samples: list[float], duration: float) -> dict:
+    return {
+        "count": len(samples),
+        "per_s": len(samples) / duration,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+    }
+
+
+async def run_round(client, users: list[dict], login_path: str | None, duration: float,
+                    chat_clients: int, login_clients: int) -> dict:
+    chat_samples: list[float] = []
+    login_samples: list[float] = []
+    errors = {"chat": 0, "login": 0}
+    deadline = time.perf_counter() + duration
+
+    async def chat_loop(worker: int):
+        user = users[worker % len(users)]
+        headers = {"Authorization": f"Bearer {user['token']}"}
+        while time.perf_counter() < deadline:
+            # unique text: every turn runs the orchestrator instead of the response cache
+            message = f"I feel tired after lunch, day {next(_sequence)}"
+            started = time.perf_counter()
+            response = await client.post("/chat", json={"message": message}, headers=headers)
+            if response.status_code == 200:
+                chat_samples.append(time.perf_counter() - started)
+            else:
+                errors["chat"] += 1
+
+    async def login_loop(worker: int):
+        while time.perf_counter() < deadline:
+            user = users[next(_sequence) % len(users)]
+            started = time.perf_counter()
+            response = await client.post(login_path, json={"email": user["email"], "password": PASSWORD})
+            if response.status_code == 200:
+                login_samples.append(time.perf_counter() - started)
+            else:
+                errors["login"] += 1
+
+    started = time.perf_counter()
+    tasks = [chat_loop(i) for i in range(chat_clients)]
+    if login_path:
+        tasks += [login_loop(i) for i in range(login_clients)]
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return {
+        "chat": _summary(chat_samples, elapsed),
+        "login": _summary(login_samples, elapsed) if login_path else None,
+        "errors": errors,
+    }
+
+
+async def bench(args) -> None:
+    import httpx
+    from main import app
+    from orchestrator import memory_store
+    from utils import password_hash
+    from utils.jwt_handler import jwt_cache_stats
+
+    add_inline_login_route(app)
+    users = seed_users(args.users)
+    memory_store.warm_up()
+    # start the worker processes up front, as the app lifespan's warm-up does
+    await asyncio.to_thread(password_hash.warm_up)
+
+    rounds = [("chat only", None), ("inline login", "/bench/login-inline"), ("pooled login", "/auth/login")]
+    transport = httpx.ASGITransport(app=app)
+    print(f"duration={args.duration}s chat_clients={args.chat_clients} login_clients={args.login_clients} "
+          f"llm_latency={args.llm_latency}s {password_hash.password_hash_stats()}")
+    print(f"{'round':<16}{'logins/s':>10}{'login p50':>11}{'login p95':>11}"
+          f"{'chat/s':>9}{'chat p50':>10}{'chat p95':>10}{'errors':>9}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        # unreported chat-only round: memory rehydration and first-call costs
+        await run_round(client, users, None, min(args.duration, 2.0), args.chat_clients, 0)
+        for name, login_path in rounds:
+            result = await run_round(client, users, login_path, args.duration,
+                                     args.chat_clients, args.login_clients)
+            chat, login = result["chat"], result["login"]
+            login_cols = (f"{login['per_s']:>10.1f}{login['p50_ms']:>9.1f}ms{login['p95_ms']:>9.1f}ms"
+                          if login else f"{'-':>10}{'-':>11}{'-':>11}")
+            errors = result["errors"]["chat"] + result["errors"]["login"]
+            print(f"{name:<16}{login_cols}{chat['per_s']:>9.1f}{chat['p50_ms']:>8.1f}ms"
+                  f"{chat['p95_ms']:>8.1f}ms{errors:>9}")
+
+    cache = jwt_cache_stats()
+    print(f"\nJWT claims cache: hit rate {cache['hit_rate']:.1%} "
+          f"({cache['hits']} hits, {cache['misses']} signature checks)")
+    password_hash.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput under concurrent chat load")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per round")
+    parser.add_argument("--chat-clients", type=int, default=32)
+    parser.add_argument("--login-clients", type=int, default=16)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per stub LLM call")
+    parser.add_argument("--db-latency", type=float, default=0.001, help="seconds per in-memory DB call")
+    args = parser.parse_args()
+
+    install_stub_llm(StubLLM(args.llm_latency))
+    install_memory_db(args.db_latency)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_memory_summary.py
+# Prompt size and latency against conversation length: full buffer memory vs
+# the token-budgeted rolling summary (orchestrator/summary_memory.py).
+#
+# For each conversation length, one user's memory is filled with that many
+# turns in both modes (the summary mode's background summarizer runs on the
+# stub model and is waited for). Reports per length and mode:
+#   history   tokens in load_memory_variables()["history"]
+#   prompt    tokens in the supervisor prompt built from it (prompt_context
+#             trims history to its budget, dropping the oldest turns)
+#   covered   share of the conversation the prompt still carries (a summary
+#             counts as covering every turn it folded in)
+#   build     time to load the history and build the prompt
+#   llm       modelled call latency: --base-latency + prompt tokens * --prefill-ms
+#   memory    resident bytes for the user
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_memory_summary --lengths 5 10 20 50 100 200
+#   python -m benchmarks.bench_memory_summary --prefill-ms 0.4 --base-latency 0.3
+
+import argparse
+import os
+import statistics
+import time
+import warnings
+
+# the limiter's Groq quotas would dominate a stub benchmark
+os.environ.setdefault("GROQ_RPM", "0")
+os.environ.setdefault("GROQ_TPM", "0")
+
+from benchmarks.stubs import StubLLM, install_stub_llm  # noqa: E402
+
+USER = ("I have been sleeping badly for a week, waking up at 3am, and I drink about four coffees a day "
+        "because I feel tired. Turn {n}: what should I change first?")
+AI = ("- Cut coffee after noon; caffeine stays in your system for hours\n"
+      "- Keep the same bedtime and wake time, even at weekends\n"
+      "- Dim screens an hour before bed and keep the bedroom cool\n"
+      "- If waking persists for weeks, talk to a doctor (turn {n})")
+
+
+def fill(memory, turns: int) -> None:
+    for n in range(turns):
+        memory.save_context({"input": USER.format(n=n)}, {"output": AI.format(n=n)})
+        # real turns are seconds apart, plenty for the summarizer to keep up
+        wait_for_summaries()
+
+
+def wait_for_summaries(timeout: float = 30.0) -> None:
+    from orchestrator.summary_memory import summary_memory_stats
+
+    deadline = time.monotonic() + timeout
+    while summary_memory_stats()["queued"] and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def covered(memory, prompt: str, turns: int) -> float:
+    from orchestrator.summary_memory import RollingSummaryMemory, SUMMARY_PREFIX
+
+    if not turns:
+        return 1.0
+    shown = sum(1 for n in range(turns) if f"Turn {n}:" in prompt)
+    if isinstance(memory, RollingSummaryMemory) and SUMMARY_PREFIX in prompt:
+        # everything older than the oldest verbatim turn went into the summary
+        oldest = min((n for n in range(turns) if f"Turn {n}:" in prompt), default=turns)
+        shown += oldest
+    return shown / turns
+
+
+def measure(memory, turns: int, reps: int, args) -> dict:
+    from agents.prompt_context import estimate_tokens
+    from agents.supervisor_agent import _build_prompt
+    from orchestrator.memory_store import _estimate_bytes
+
+    message = USER.format(n=turns)
+    profile = {"age": 30, "goals": "sleep better"}
+    timings = []
+    for _ in range(reps):
+        started = time.perf_counter()
+        history = memory.load_memory_variables({})["history"]
+        prompt = _build_prompt(message, profile, {"conversation_history": history})
+        timings.append(time.perf_counter() - started)
+    prompt_tokens = estimate_tokens(prompt)
+    return {
+        "history": estimate_tokens(history),
+        "prompt": prompt_tokens,
+        "covered": covered(memory, prompt, turns),
+        "build_ms": statistics.median(timings) * 1000,
+        "llm_ms": args.base_latency * 1000 + prompt_tokens * args.prefill_ms,
+        "bytes": _estimate_bytes(memory),
+    }
+
+
+def bench(args) -> None:
+    from langchain_classic.memory import ConversationBufferMemory
+    from orchestrator.summary_memory import RollingSummaryMemory, summary_memory_stats
+
+    warnings.filterwarnings("ignore", message=".*deprecated.*")
+    install_stub_llm(StubLLM(args.summary_latency, seed=1))
+    modes = {
+        "buffer": lambda: ConversationBufferMemory(return_messages=False),
+        "summary": RollingSummaryMemory,
+    }
+    print(f"prefill={args.prefill_ms}ms/token base_latency={args.base_latency}s reps={args.reps}")
+    print(f"{'turns':>6}  {'mode':<9}{'history':>9}{'prompt':>8}{'covered':>9}"
+          f"{'build':>10}{'llm':>10}{'memory':>10}")
+    for turns in args.lengths:
+        for mode, factory in modes.items():
+            memory = factory()
+            fill(memory, turns)
+            row = measure(memory, turns, args.reps, args)
+            print(f"{turns:>6}  {mode:<9}{row['history']:>9}{row['prompt']:>8}{row['covered']:>9.0%}"
+                  f"{row['build_ms']:>8.2f}ms{row['llm_ms']:>8.0f}ms{row['bytes'] / 1024:>8.1f}KB")
+    print(f"\nsummary worker: {summary_memory_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation memory prompt size vs conversation length")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[5, 10, 20, 50, 100, 200])
+    parser.add_argument("--reps", type=int, default=50, help="history loads + prompt builds per row")
+    parser.add_argument("--prefill-ms", type=float, default=0.3, help="modelled cost per prompt token")
+    parser.add_argument("--base-latency", type=float, default=0.25, help="modelled fixed cost per call")
+    parser.add_argument("--summary-latency", type=float, default=0.01, help="stub summarizer call latency")
+    args = parser.parse_args()
+    bench(args)
+
+
+if __name__ == "__main__":
+    main()
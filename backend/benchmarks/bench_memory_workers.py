@@ -0,0 +1,147 @@
+# backend/benchmarks/bench_memory_workers.py
+# Load test: is a user's chat context consistent when consecutive turns land
+# on different workers, and does it survive a restart?
+#
+# Every "worker" is its own memory backend instance (what each uvicorn worker
+# process holds); all of them share one database (the in-memory Mongo
+# stand-in, --db-latency per operation). --users users chat concurrently,
+# --turns turns each, one turn at a time per user; each turn goes to a random
+# worker, like a load balancer without sticky sessions. A turn:
+#   aget (load memory) -> check the previous turn is in the history ->
+#   --llm-latency of "thinking" -> asave_context + append the turn to
+#   conversation_turns (what record_turn does)
+# After the run every worker is replaced by a fresh instance (restart) and
+# each user's context is checked once more.
+# Reported per backend: share of turns that saw the previous turn, share of
+# users whose last turn survived the restart, p50/p95 of the memory load and
+# save, and memory database operations per turn (rehydration reads, memory
+# reads/writes and background summary writes; the conversation_turns insert
+# is not counted).
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_memory_workers --workers 4 --users 50 --turns 20
+#   python -m benchmarks.bench_memory_workers --backends mongo --db-latency 0.002
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+# the limiter's Groq quotas would dominate a stub benchmark
+os.environ.setdefault("GROQ_RPM", "0")
+os.environ.setdefault("GROQ_TPM", "0")
+
+from benchmarks.stubs import StubLLM, install_memory_db, install_stub_llm, percentile  # noqa: E402
+
+
+def marker(user: int, turn: int) -> str:
+    return f"[u{user} t{turn}]"
+
+
+def new_backend(name: str):
+    from orchestrator.memory_store import create_backend
+
+    return create_backend(name)
+
+
+def wait_for_summaries(timeout: float = 30.0) -> None:
+    from orchestrator.summary_memory import summary_memory_stats
+
+    deadline = time.monotonic() + timeout
+    while summary_memory_stats()["queued"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+async def run_backend(name: str, args, db) -> dict:
+    import database
+
+    rng = random.Random(args.seed)
+    workers = [new_backend(name) for _ in range(args.workers)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    loads: list[float] = []
+    saves: list[float] = []
+    seen = 0
+
+    async def chat(user: int):
+        nonlocal seen
+        uid = f"{name}-{user}"
+        for turn in range(args.turns):
+            worker = workers[rng.randrange(len(workers))]
+            async with semaphore:
+                started = time.perf_counter()
+                memory = await worker.aget(uid)
+                history = memory.load_memory_variables({})["history"]
+                loads.append(time.perf_counter() - started)
+                seen += turn == 0 or marker(user, turn - 1) in history
+
+                await asyncio.sleep(args.llm_latency)
+                message = f"{marker(user, turn)} my knee hurts after running, what should I do?"
+                reply = f"{marker(user, turn)} rest, ice and shorter runs for a week"
+
+                started = time.perf_counter()
+                await worker.asave_context(uid, message, reply)
+                saves.append(time.perf_counter() - started)
+                await database.aappend_conversation_turn(uid, message, reply, [])
+
+    turns_ops = args.users * args.turns  # one conversation_turns insert per turn
+    ops_before = db.ops()
+    await asyncio.gather(*(chat(user) for user in range(args.users)))
+    await asyncio.to_thread(wait_for_summaries)
+    memory_ops = db.ops() - ops_before - turns_ops
+
+    # restart: every worker starts empty
+    restarted = new_backend(name)
+    survived = 0
+    for user in range(args.users):
+        memory = await restarted.aget(f"{name}-{user}")
+        survived += marker(user, args.turns - 1) in memory.load_memory_variables({})["history"]
+
+    return {
+        "consistent": seen / (args.users * args.turns),
+        "survived": survived / args.users,
+        "load_p50": percentile(loads, 50), "load_p95": percentile(loads, 95),
+        "save_p50": percentile(saves, 50), "save_p95": percentile(saves, 95),
+        "ops_per_turn": memory_ops / (args.users * args.turns),
+        "stats": workers[0].stats(),
+    }
+
+
+async def bench(args, db) -> None:
+    print(f"workers={args.workers} users={args.users} turns={args.turns} concurrency={args.concurrency} "
+          f"db_latency={args.db_latency}s llm_latency={args.llm_latency}s")
+    print(f"{'backend':<9}{'consistent':>11}{'restart':>9}{'load p50':>11}{'load p95':>11}"
+          f"{'save p50':>11}{'save p95':>11}{'db ops/turn':>13}")
+    results = {}
+    for name in args.backends:
+        row = results[name] = await run_backend(name, args, db)
+        print(f"{name:<9}{row['consistent']:>11.1%}{row['survived']:>9.0%}"
+              f"{row['load_p50'] * 1000:>9.2f}ms{row['load_p95'] * 1000:>9.2f}ms"
+              f"{row['save_p50'] * 1000:>9.2f}ms{row['save_p95'] * 1000:>9.2f}ms{row['ops_per_turn']:>13.2f}")
+    for name, row in results.items():
+        print(f"\n{name} worker 0 stats: {row['stats']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat context consistency across workers and restarts")
+    parser.add_argument("--backends", nargs="+", default=["process", "mongo"], choices=["process", "mongo"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20, help="turns per user")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds per in-memory DB call")
+    parser.add_argument("--llm-latency", type=float, default=0.01, help="seconds between load and save")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    db = install_memory_db(args.db_latency)
+    import database
+
+    database.ensure_indexes()
+    # the background summarizer runs on a fast stub model
+    install_stub_llm(StubLLM(0.005, seed=1))
+    asyncio.run(bench(args, db))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_model_routing.py
+# Latency-aware model selection and per-role output caps, with stub models.
+#
+# A "Supervisor" role gets a primary and an alternate stub model behind the
+# shared limiter (agents/groq_client.register_llm). The primary runs through
+# three phases: healthy, degraded (--degraded-latency per call) and
+# recovered. Each phase is run with the selector off (no alternate in the
+# profile) and on, reporting p50/p95 call latency and the share of calls
+# served by the alternate.
+# It also prints the TPM budget reserved per call for every role profile
+# against the previous flat max_tokens=512.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_model_routing --calls 300 --concurrency 8
+#   python -m benchmarks.bench_model_routing --degraded-latency 1.0 --latency-budget 0.3
+
+import argparse
+import asyncio
+import os
+import time
+
+# the limiter's Groq quotas would dominate a stub benchmark
+os.environ.setdefault("GROQ_RPM", "0")
+os.environ.setdefault("GROQ_TPM", "0")
+
+from benchmarks.stubs import StubLLM, percentile  # noqa: E402
+
+PRIMARY = "bench-primary"
+ALTERNATE = "bench-alternate"
+PROMPT = '{"next_agent": ...} supervisor prompt ' * 40
+
+
+async def run_phase(llm, calls: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list[float] = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await llm.ainvoke(PROMPT)
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return samples
+
+
+async def bench(args) -> None:
+    from dataclasses import replace
+    from agents import groq_client
+    from agents import resilience
+    from agents.model_profiles import DEFAULT_PROFILES, model_profile
+
+    primary_stub = StubLLM(args.healthy_latency, jitter=args.healthy_latency * 0.2, seed=1)
+    alternate_stub = StubLLM(args.alternate_latency, jitter=args.alternate_latency * 0.2, seed=2)
+    groq_client.register_llm(PRIMARY, primary_stub)
+    groq_client.register_llm(ALTERNATE, alternate_stub)
+
+    base = replace(DEFAULT_PROFILES["Supervisor"], model=PRIMARY, timeout=10.0,
+                   latency_budget=args.latency_budget)
+    phases = [("healthy", args.healthy_latency), ("degraded", args.degraded_latency),
+              ("recovered", args.healthy_latency)]
+
+    print(f"calls/phase={args.calls} concurrency={args.concurrency} latency_budget={args.latency_budget}s "
+          f"primary {args.healthy_latency}s -> {args.degraded_latency}s, alternate {args.alternate_latency}s")
+    print(f"{'selector':<10}{'phase':<11}{'p50':>10}{'p95':>10}{'on alternate':>14}")
+    for selector, profile in (("off", replace(base, alternate=None)), ("on", replace(base, alternate=ALTERNATE))):
+        # fresh health (latency averages, breakers) for every configuration
+        resilience._health.clear()
+        resilience._routes.clear()
+        llm = resilience.ResilientLLM(groq_client.get_llm(PRIMARY), "Supervisor", "{}", profile)
+        for phase, latency in phases:
+            primary_stub.latency, primary_stub.jitter = latency, latency * 0.2
+            before = alternate_stub.calls
+            samples = await run_phase(llm, args.calls, args.concurrency)
+            share = (alternate_stub.calls - before) / args.calls
+            print(f"{selector:<10}{phase:<11}{percentile(samples, 50) * 1000:>8.1f}ms"
+                  f"{percentile(samples, 95) * 1000:>8.1f}ms{share:>13.0%}")
+
+    print("\nTPM reserved per call (prompt estimate + max_tokens), previously + 512 for every role:")
+    prompt_tokens = groq_client.estimate_tokens(PROMPT)
+    for role in DEFAULT_PROFILES:
+        profile = model_profile(role)
+        print(f"  {role:<18}{profile.model:<24}max_tokens={profile.max_tokens:<5}"
+              f"reserve={prompt_tokens + profile.max_tokens:<6}(was {prompt_tokens + groq_client.MAX_TOKENS})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency-aware model selection benchmark (stub models)")
+    parser.add_argument("--calls", type=int, default=300, help="calls per phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--healthy-latency", type=float, default=0.05)
+    parser.add_argument("--degraded-latency", type=float, default=0.5)
+    parser.add_argument("--alternate-latency", type=float, default=0.08)
+    parser.add_argument("--latency-budget", type=float, default=0.2,
+                        help="rolling latency above which the alternate takes over")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
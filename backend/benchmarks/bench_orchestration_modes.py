@@ -0,0 +1,65 @@
+# backend/benchmarks/bench_orchestration_modes.py
+# Side-by-side comparison of the "step" and "plan" orchestration modes.
+#
+# Default: stubbed LLM with jittered latency -> p50/p95 per mode.
+# --live: real Groq calls (needs GROQ_API_KEY); also prints each mode's
+#         answer and agents for every prompt so quality can be compared.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_orchestration_modes --runs 50
+#   python -m benchmarks.bench_orchestration_modes --live --runs 1
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import StubLLM, install_stub_llm, install_stub_db, percentile
+
+PROMPTS = [
+    "I feel dizzy during my evening workouts",
+    "I keep waking up at 3am and feel bloated in the morning",
+    "How can I build muscle on a vegetarian diet?",
+    "I'm stressed at work and skipping meals",
+]
+
+
+async def run_mode(orchestrator, mode: str, runs: int, show_answers: bool) -> list[float]:
+    latencies: list[float] = []
+    for run in range(runs):
+        for i, prompt in enumerate(PROMPTS):
+            start = time.perf_counter()
+            answer, agents = await orchestrator.aprocess_query(f"bench-{mode}-{run}-{i}", prompt, mode=mode)
+            latencies.append(time.perf_counter() - start)
+            if show_answers and run == 0:
+                print(f"\n[{mode}] {prompt}\nagents: {agents}\n{answer}")
+    return latencies
+
+
+async def main_async(args):
+    if not args.live:
+        install_stub_llm(StubLLM(args.llm_latency, jitter=args.llm_jitter))
+    orchestrator = install_stub_db(args.db_latency)
+
+    results = {}
+    for mode in ("step", "plan"):
+        results[mode] = await run_mode(orchestrator, mode, args.runs, show_answers=args.live)
+
+    print(f"\n{'mode':<8}{'n':>6}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for mode, latencies in results.items():
+        p50 = percentile(latencies, 50) * 1000
+        p95 = percentile(latencies, 95) * 1000
+        print(f"{mode:<8}{len(latencies):>6}{p50:>12.1f}{p95:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="step vs plan orchestration benchmark")
+    parser.add_argument("--runs", type=int, default=25, help="passes over the prompt set per mode")
+    parser.add_argument("--llm-latency", type=float, default=0.25)
+    parser.add_argument("--llm-jitter", type=float, default=0.15)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--live", action="store_true", help="use the real Groq model")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# backend/benchmarks/bench_startup.py
+# Worker boot cost: `python -X importtime -c "import main"` in fresh
+# interpreters, summarised as total import time, the slowest modules, time
+# per top-level package and whether LangChain was loaded at boot.
+# --serve also starts uvicorn and measures time until /health/live answers.
+#
+# MONGODB_URI defaults to memory:// so nothing connects; pass --mongo-uri
+# (e.g. an unreachable host) to check that boot does not wait on Mongo.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_startup --runs 5
+#   python -m benchmarks.bench_startup --mongo-uri mongodb://10.255.255.1:27017/FitAura --serve
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env(mongo_uri: str) -> dict:
+    env = dict(os.environ)
+    env["MONGODB_URI"] = mongo_uri
+    env.setdefault("GROQ_API_KEY", "bench")
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = int(head.split(":")[1])
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), self_us, int(cumulative_us), depth))
+    return rows
+
+
+def import_run(mongo_uri: str) -> dict:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=_env(mongo_uri), capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    rows = parse_importtime(proc.stderr)
+    main_us = next(cum for name, _, cum, _ in rows if name == "main")
+    packages: dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    return {
+        "wall_s": wall,
+        "import_main_s": main_us / 1e6,
+        "rows": rows,
+        "packages": packages,
+        "langchain_loaded": any(name.startswith("langchain") for name, *_ in rows),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_run(mongo_uri: str, timeout: float) -> float | None:
+    """Seconds from launching uvicorn until GET /health/live returns 200."""
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(mongo_uri), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/live", timeout=0.5) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker import / boot time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--mongo-uri", default="memory://bench")
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn until /health/live is up")
+    parser.add_argument("--serve-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    runs = [import_run(args.mongo_uri) for _ in range(args.runs)]
+    imports = sorted(r["import_main_s"] for r in runs)
+    walls = sorted(r["wall_s"] for r in runs)
+    print(f"runs: {args.runs}   MONGODB_URI={args.mongo_uri}")
+    print(f"import main    median {imports[len(imports) // 2] * 1000:7.1f} ms   "
+          f"min {imports[0] * 1000:7.1f} ms")
+    print(f"process wall   median {walls[len(walls) // 2] * 1000:7.1f} ms   "
+          f"min {walls[0] * 1000:7.1f} ms")
+    print(f"LangChain imported at boot: {'yes' if runs[-1]['langchain_loaded'] else 'no'}")
+
+    last = runs[-1]
+    print("\nslowest modules (cumulative, last run, depth <= 3):")
+    top = sorted((r for r in last["rows"] if r[3] <= 3), key=lambda r: r[2], reverse=True)
+    for name, self_us, cumulative_us, depth in top[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {'  ' * depth}{name}")
+
+    print("\nself time by top-level package (last run):")
+    for package, self_us in sorted(last["packages"].items(), key=lambda kv: kv[1], reverse=True)[:10]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    if args.serve:
+        boot = serve_run(args.mongo_uri, args.serve_timeout)
+        shown = f"{boot * 1000:.0f} ms" if boot is not None else f"not up within {args.serve_timeout}s"
+        print(f"\nuvicorn start -> /health/live 200: {shown}")
+
+
+if __name__ == "__main__":
+    main()
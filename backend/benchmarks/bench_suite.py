@@ -0,0 +1,369 @@
+# backend/benchmarks/bench_suite.py
+# Offline benchmark suite: the full chat path with a stub LLM and the
+# in-memory Mongo stand-in, so orchestration overhead can be measured
+# without Groq or a MongoDB server.
+#
+# Scenarios (each run at every --concurrency level):
+#   process_query  aprocess_query directly (orchestrator without HTTP)
+#   chat           POST /chat through the ASGI app (httpx ASGITransport)
+#   ws             /ws/process-query through the ASGI app, token streaming on
+#
+# Reports throughput, end-to-end p50/p95/p99, time to first token (ws),
+# p50/p95/p99 per orchestration stage, LLM calls, DB operations and memory
+# growth; --output writes the same numbers as JSON for diffing between releases.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_suite --concurrency 1,8,32 --requests 200
+#   python -m benchmarks.bench_suite --distribution lognormal --llm-jitter 0.5 \
+#       --tokens-per-second 150 --output bench-results.json
+
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.stubs import StubLLM, install_stub_llm, install_memory_db, percentile
+
+SCENARIOS = ("process_query", "chat", "ws")
+
+PROMPTS = [
+    "I feel dizzy during my evening workouts",
+    "I keep waking up at 3am and feel bloated in the morning",
+    "How can I build muscle on a vegetarian diet?",
+    "I'm stressed at work and skipping meals",
+]
+
+PROFILE = {
+    "age": 29, "gender": "female", "weight_kg": 62, "height_cm": 168, "bmi": 22.0,
+    "diet_type": "veg", "activity_level": "moderate", "sleep_hours": 6,
+    "health_conditions": "none",
+}
+
+
+# -------------------------------------------------------------------
+# PER-STAGE TIMING (wraps orchestrator functions for the run)
+# -------------------------------------------------------------------
+
+class StageTimer:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def reset(self) -> None:
+        self.samples.clear()
+
+    def _record(self, stage: str, started: float) -> None:
+        self.samples[stage].append(time.perf_counter() - started)
+
+    def wrap(self, owner, attr: str, stage: str, returns_stream: bool = False) -> None:
+        fn = getattr(owner, attr)
+        timer = self
+
+        if returns_stream:
+            # plain function returning an async generator: time the whole stream
+            def wrapper(*args, **kwargs):
+                async def timed():
+                    started = time.perf_counter()
+                    try:
+                        async for item in fn(*args, **kwargs):
+                            yield item
+                    finally:
+                        timer._record(stage, started)
+                return timed()
+        elif inspect.iscoroutinefunction(fn):
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    timer._record(stage, started)
+        else:
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    timer._record(stage, started)
+
+        setattr(owner, attr, wrapper)
+
+    def summary(self) -> dict:
+        return {stage: _latency_summary(samples) for stage, samples in sorted(self.samples.items())}
+
+
+def instrument(orchestrator) -> StageTimer:
+    timer = StageTimer()
+    cache = orchestrator.response_cache
+    store = orchestrator.memory_store
+    index = orchestrator.turn_index
+    for owner, attr, stage in [
+        (orchestrator, "aget_profile", "profile"),
+        (cache, "aget", "response_cache"),
+        (store, "aget", "memory"),
+        (index, "asearch", "recall"),
+        (orchestrator, "aclassify_intent", "intent"),
+        (orchestrator, "route", "routing"),
+        (orchestrator, "asupervisor", "routing"),
+        (orchestrator, "aplan_agents", "routing"),
+        (orchestrator, "_arun_agent", "agent"),
+        (orchestrator, "synthesize_output", "synthesis"),
+        (orchestrator, "arecord_turn", "persist"),
+    ]:
+        timer.wrap(owner, attr, stage)
+    timer.wrap(orchestrator, "_astream_agent", "agent", returns_stream=True)
+    return timer
+
+
+# -------------------------------------------------------------------
+# SCENARIOS
+# -------------------------------------------------------------------
+
+def _latency_summary(samples: list[float]) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+def _requests(prefix: str, n: int, users: int) -> list[tuple[str, str]]:
+    # distinct messages so neither the response cache nor coalescing hides work
+    return [(f"{prefix}-u{i % users}", f"{PROMPTS[i % len(PROMPTS)]} ({prefix} #{i})") for i in range(n)]
+
+
+async def run_process_query(orchestrator, requests, concurrency: int, mode: str) -> dict:
+    async def one(user_id, message):
+        started = time.perf_counter()
+        await orchestrator.aprocess_query(user_id, message, mode=mode)
+        return time.perf_counter() - started
+
+    results = await _gather_limited(concurrency, [one(u, m) for u, m in requests])
+    latencies = [r for r in results if not isinstance(r, BaseException)]
+    return {"latencies": latencies, "errors": len(results) - len(latencies)}
+
+
+async def _gather_limited(concurrency: int, jobs):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(job):
+        async with semaphore:
+            return await job
+
+    return await asyncio.gather(*(limited(job) for job in jobs), return_exceptions=True)
+
+
+async def run_chat(app, requests, concurrency: int, mode: str) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(user_id, message):
+            started = time.perf_counter()
+            response = await client.post("/chat", json={"user_id": user_id, "message": message, "mode": mode})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        results = await _gather_limited(concurrency, [one(u, m) for u, m in requests])
+    latencies = [r for r in results if not isinstance(r, BaseException)]
+    return {"latencies": latencies, "errors": len(results) - len(latencies)}
+
+
+async def _ws_session(app, payload: dict):
+    """Drive one /ws/process-query session directly over ASGI; yields server events."""
+    to_app: asyncio.Queue = asyncio.Queue()
+    from_app: asyncio.Queue = asyncio.Queue()
+    scope = {
+        "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws",
+        "path": "/ws/process-query", "raw_path": b"/ws/process-query", "root_path": "",
+        "query_string": b"", "headers": [], "subprotocols": [],
+        "server": ("bench", 80), "client": ("bench", 1),
+    }
+    await to_app.put({"type": "websocket.connect"})
+    task = asyncio.create_task(app(scope, to_app.get, from_app.put))
+    try:
+        accepted = await from_app.get()
+        if accepted["type"] != "websocket.accept":
+            raise RuntimeError(f"websocket rejected: {accepted}")
+        await to_app.put({"type": "websocket.receive", "text": json.dumps(payload)})
+        while True:
+            message = await from_app.get()
+            if message["type"] == "websocket.close":
+                return
+            yield json.loads(message["text"])
+    finally:
+        await to_app.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(task, timeout=5)
+
+
+async def run_ws(app, requests, concurrency: int, mode: str) -> dict:
+    ttfts: list[float] = []
+
+    async def one(user_id, message):
+        started = time.perf_counter()
+        first_token = None
+        async for event in _ws_session(app, {"type": "start", "query": message, "user_id": user_id, "mode": mode}):
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - started
+            if event["type"] == "error":
+                raise RuntimeError(event["text"])
+        ttfts.append(first_token if first_token is not None else time.perf_counter() - started)
+        return time.perf_counter() - started
+
+    results = await _gather_limited(concurrency, [one(u, m) for u, m in requests])
+    latencies = [r for r in results if not isinstance(r, BaseException)]
+    return {"latencies": latencies, "errors": len(results) - len(latencies), "ttfts": ttfts}
+
+
+# -------------------------------------------------------------------
+# RUNNER
+# -------------------------------------------------------------------
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource  # peak, not current, where /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def run_scenario(name: str, concurrency: int, args, orchestrator, app, llm: StubLLM, timer: StageTimer) -> dict:
+    prefix = f"{name}-c{concurrency}"
+    requests = _requests(prefix, args.requests, args.users)
+    db = install_memory_db(args.db_latency, {user_id: PROFILE for user_id, _ in requests})
+    timer.reset()
+    gc.collect()
+    rss_before = _rss_mb()
+    heap_before = tracemalloc.get_traced_memory()[0] if args.tracemalloc else 0
+    calls_before, memory_before = llm.calls, orchestrator.memory_store.stats()["estimated_bytes"]
+
+    started = time.perf_counter()
+    if name == "process_query":
+        raw = asyncio.run(run_process_query(orchestrator, requests, concurrency, args.mode))
+    elif name == "chat":
+        raw = asyncio.run(run_chat(app, requests, concurrency, args.mode))
+    else:
+        raw = asyncio.run(run_ws(app, requests, concurrency, args.mode))
+    elapsed = time.perf_counter() - started
+    # queued turns belong to this run's database (and its db_ops count)
+    from orchestrator.turn_writer import turn_writer
+    turn_writer.flush()
+
+    gc.collect()
+    completed = len(raw["latencies"])
+    result = {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "completed": completed,
+        "errors": raw["errors"],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "latency": _latency_summary(raw["latencies"]),
+        "stages": timer.summary(),
+        "llm_calls": llm.calls - calls_before,
+        "db_ops": db.ops(),
+        "memory": {
+            "rss_mb_before": round(rss_before, 1),
+            "rss_mb_after": round(_rss_mb(), 1),
+            "rss_mb_growth": round(_rss_mb() - rss_before, 1),
+            "conversation_memory_bytes_growth":
+                orchestrator.memory_store.stats()["estimated_bytes"] - memory_before,
+        },
+    }
+    if "ttfts" in raw:
+        result["ttft"] = _latency_summary(raw["ttfts"])
+    if args.tracemalloc:
+        result["memory"]["python_heap_mb_growth"] = round(
+            (tracemalloc.get_traced_memory()[0] - heap_before) / 2**20, 2)
+    return result
+
+
+def print_table(results: list[dict]) -> None:
+    print(f"\n{'scenario':<15}{'conc':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'ttft p50':>10}{'err':>5}{'rss +MB':>9}")
+    for r in results:
+        ttft = f"{r['ttft']['p50_ms']:.1f}" if "ttft" in r else "-"
+        print(f"{r['scenario']:<15}{r['concurrency']:>5}{r['throughput_rps']:>9.1f}"
+              f"{r['latency']['p50_ms']:>9.1f}{r['latency']['p95_ms']:>9.1f}{r['latency']['p99_ms']:>9.1f}"
+              f"{ttft:>10}{r['errors']:>5}{r['memory']['rss_mb_growth']:>9.1f}")
+    print("\nper-stage p50 / p95 / p99 (ms), last run of each scenario:")
+    last = {r["scenario"]: r for r in results}
+    for name, r in last.items():
+        stages = ", ".join(f"{s} {v['p50_ms']:.1f}/{v['p95_ms']:.1f}/{v['p99_ms']:.1f}"
+                           for s, v in r["stages"].items())
+        print(f"  {name:<14}{stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline chat benchmark suite (stub LLM, in-memory Mongo)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario and level")
+    parser.add_argument("--users", type=int, default=20, help="distinct users the requests cycle through")
+    parser.add_argument("--mode", choices=("step", "plan"), default="step")
+    parser.add_argument("--llm-latency", type=float, default=0.25, help="median seconds to first token")
+    parser.add_argument("--llm-jitter", type=float, default=0.1,
+                        help="± seconds (uniform) or log-space sigma (lognormal)")
+    parser.add_argument("--distribution", choices=("uniform", "lognormal", "const"), default="uniform")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds per Mongo operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report Python heap growth (slower)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    llm = StubLLM(args.llm_latency, jitter=args.llm_jitter, seed=args.seed,
+                  distribution=args.distribution, tokens_per_second=args.tokens_per_second)
+    install_stub_llm(llm)
+    from orchestrator import orchestrator, memory_store
+    from main import app
+    # what the app lifespan's warm-up does, so the first run is not charged for imports
+    memory_store.warm_up()
+    timer = instrument(orchestrator)
+
+    results = []
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            print(f"running {name} at concurrency {concurrency} ...", flush=True)
+            results.append(run_scenario(name, concurrency, args, orchestrator, app, llm, timer))
+
+    print_table(results)
+    if args.output:
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "args": vars(args),
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
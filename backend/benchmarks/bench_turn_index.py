@@ -0,0 +1,130 @@
+# backend/benchmarks/bench_turn_index.py
+# Top-k retrieval over a user's past turns (orchestrator/turn_index.py) at
+# 1k-20k+ turns per user.
+#
+# For each size, one user's history is generated (filler wellness turns plus
+# a few "needle" turns with a fact that matters later, e.g. a knee injury)
+# and stored with database.insert_conversation_turns in the in-memory Mongo
+# stand-in. Reported per size:
+#   rebuild    first search for the user: read conversation_turns + embed all
+#   add        incremental indexing of one new turn (the turn listener path)
+#   search     top-k latency (embed the query + cosine over every vector)
+#   recall@k   share of needle queries whose needle turn is in the top k
+#   memory     vector bytes held for the user
+# and, for comparison, the tokens of the full linear history the prompts
+# would otherwise carry vs the retrieved turns.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_turn_index --sizes 1000 10000 20000 --queries 200
+#   python -m benchmarks.bench_turn_index --dim 512 --top-k 5
+
+import argparse
+import os
+import random
+import time
+
+from benchmarks.stubs import install_memory_db, percentile
+
+FILLER_USER = [
+    "I slept {h} hours last night and still feel tired",
+    "what should I eat before an evening walk",
+    "how much water should I drink on a hot day",
+    "I get stressed at work around {h} pm, any tips",
+    "is it ok to skip breakfast if I am not hungry",
+    "my screen time is {h} hours a day, how do I cut it",
+    "can you suggest a vegetarian dinner with more protein",
+    "I keep waking up at {h} am and can't fall asleep again",
+    "how do I build a morning routine that sticks",
+    "I feel bloated after lunch most days",
+]
+FILLER_AI = "- Keep a regular schedule\n- Drink water through the day\n- Take short breaks"
+# (fact stated once, question asked much later) pairs
+NEEDLES = [
+    ("I tore a ligament in my left knee skiing last winter",
+     "which leg workouts are safe for my knee ligament"),
+    ("I have mild asthma and use an inhaler when it is cold",
+     "is running outside in cold weather bad for my asthma"),
+    ("I am lactose intolerant so milk upsets my stomach",
+     "what are good protein sources if I am lactose intolerant"),
+    ("my doctor said my blood pressure is borderline high",
+     "which foods help with borderline blood pressure"),
+    ("I work night shifts three times a week at the hospital",
+     "how should I plan sleep around night shifts"),
+]
+
+
+def make_turns(n: int, rng: random.Random) -> tuple[list[tuple[str, str]], list[int]]:
+    turns = [(rng.choice(FILLER_USER).format(h=rng.randint(1, 12)), FILLER_AI) for _ in range(n)]
+    # needles in the older part of the history, where the recent window never reaches
+    positions = rng.sample(range(max(1, n - 50)), len(NEEDLES))
+    for position, (fact, _) in zip(positions, NEEDLES):
+        turns[position] = (fact, "- Noted, I will keep that in mind")
+    return turns, positions
+
+
+def bench(args) -> None:
+    import database
+    from orchestrator.turn_index import HashingEmbedder, TurnIndex, render_turns
+    from agents.prompt_context import estimate_tokens
+
+    install_memory_db(0.0)
+    rng = random.Random(args.seed)
+    print(f"dim={args.dim} top_k={args.top_k} queries={args.queries} (hashing embedder, 1 thread)")
+    print(f"{'turns':>7}{'rebuild':>10}{'add':>10}{'p50':>10}{'p95':>10}{'p99':>10}"
+          f"{'recall@k':>10}{'memory':>10}{'linear tok':>12}{'recall tok':>12}")
+    for size in args.sizes:
+        index = TurnIndex(HashingEmbedder(args.dim))
+        database._turn_listeners[:] = [index.add_turns]
+        uid = f"bench-{size}"
+        turns, positions = make_turns(size, rng)
+        for start in range(0, size, 1000):
+            database.insert_conversation_turns([
+                database.new_turn_document(uid, user, ai, []) for user, ai in turns[start:start + 1000]
+            ])
+
+        started = time.perf_counter()
+        index.search(uid, "warm up", args.top_k)
+        rebuild = time.perf_counter() - started
+
+        adds = []
+        for i in range(args.adds):
+            doc = database.new_turn_document(uid, rng.choice(FILLER_USER).format(h=i % 12), FILLER_AI, [])
+            started = time.perf_counter()
+            index.add_turns([doc])
+            adds.append(time.perf_counter() - started)
+
+        samples, hits, found = [], 0, []
+        for q in range(args.queries):
+            needle = q % len(NEEDLES)
+            fact, question = NEEDLES[needle]
+            started = time.perf_counter()
+            found = index.search(uid, question, args.top_k)
+            samples.append(time.perf_counter() - started)
+            hits += any(user == fact for _, (user, _) in found)
+
+        user_index = index._resident(uid)
+        linear = "\n".join(f"Human: {u}\nAI: {a}" for u, a in turns)
+        print(f"{size:>7}{rebuild:>9.2f}s{percentile(adds, 50) * 1e6:>8.0f}us"
+              f"{percentile(samples, 50) * 1000:>8.2f}ms{percentile(samples, 95) * 1000:>8.2f}ms"
+              f"{percentile(samples, 99) * 1000:>8.2f}ms{hits / args.queries:>10.0%}"
+              f"{user_index.vectors.nbytes / 2 ** 20:>8.1f}MB{estimate_tokens(linear):>12}"
+              f"{estimate_tokens(render_turns(found)):>12}")
+    print(f"\nlast index stats: {index.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-user turn index: top-k latency and recall vs history size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 20000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--adds", type=int, default=200, help="incremental turns indexed per size")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=int(os.getenv("TURN_INDEX_DIM", "256")))
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    # the rebuild reads the whole history, not the default cap
+    os.environ.setdefault("TURN_INDEX_MAX_TURNS", str(max(args.sizes) + args.adds))
+    bench(args)
+
+
+if __name__ == "__main__":
+    main()
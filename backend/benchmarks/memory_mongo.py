@@ -0,0 +1,388 @@
+# backend/benchmarks/memory_mongo.py
+# In-memory stand-in for the subset of pymongo / Motor that database.py uses,
+# so benchmarks exercise the real database.py code (profile cache, per-turn
+# history, response cache, ...) without a MongoDB server.
+#
+#   db, async_db = memory_databases(latency=0.002)
+#   database.bind_database(db, async_db)
+#
+# Every operation sleeps `latency` seconds (time.sleep / asyncio.sleep) to
+# stand in for a network round trip. Supported: find / find_one (equality,
+# $in, $exists, $gt/$gte/$lt/$lte, $or; inclusion/exclusion projections),
+# sort / skip / limit, insert_one, update_one, find_one_and_update,
+# $set / $setOnInsert / $unset / $inc / $push (with $each and $slice),
+# delete_one / delete_many, count_documents, bulk_write(InsertOne / UpdateOne),
+# create_index (unique single-field indexes are enforced, others recorded only).
+import asyncio
+import copy
+import threading
+import time
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+from pymongo import InsertOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+
+
+# -------------------------------------------------------------------
+# QUERY MATCHING / UPDATES
+# -------------------------------------------------------------------
+
+def _get(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(value, op: str, arg) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if op == "$in":
+        return value is not _MISSING and value in arg
+    if op == "$ne":
+        return value != arg
+    if value is _MISSING or value is None:
+        return False
+    if op == "$gt":
+        return value > arg
+    if op == "$gte":
+        return value >= arg
+    if op == "$lt":
+        return value < arg
+    if op == "$lte":
+        return value <= arg
+    raise NotImplementedError(f"memory_mongo: operator {op} not supported")
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            if not all(_compare(value, op, arg) for op, arg in cond.items()):
+                return False
+        elif value is _MISSING or value != cond:
+            return False
+    return True
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include_id = projection.get("_id", 1)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if fields and all(fields.values()):
+        out = {k: copy.deepcopy(doc[k]) for k in fields if k in doc}
+    else:
+        out = {k: copy.deepcopy(v) for k, v in doc.items() if k not in fields}
+    if include_id and "_id" in doc:
+        out["_id"] = doc["_id"]
+    else:
+        out.pop("_id", None)
+    return out
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool) -> None:
+    for op, fields in update.items():
+        if op == "$set":
+            doc.update(copy.deepcopy(fields))
+        elif op == "$setOnInsert":
+            if inserting:
+                doc.update(copy.deepcopy(fields))
+        elif op == "$unset":
+            for key in fields:
+                doc.pop(key, None)
+        elif op == "$inc":
+            for key, amount in fields.items():
+                doc[key] = doc.get(key, 0) + amount
+        elif op == "$push":
+            for key, value in fields.items():
+                items = doc.setdefault(key, [])
+                if isinstance(value, dict) and "$each" in value:
+                    items.extend(copy.deepcopy(value["$each"]))
+                    if "$slice" in value:
+                        # negative: keep the last n, like Mongo
+                        n = value["$slice"]
+                        doc[key] = items[n:] if n < 0 else items[:n]
+                else:
+                    items.append(copy.deepcopy(value))
+        else:
+            raise NotImplementedError(f"memory_mongo: update operator {op} not supported")
+
+
+def _upsert_seed(query: dict) -> dict:
+    """Plain equality fields of the filter become part of an upserted document."""
+    return {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+
+
+# -------------------------------------------------------------------
+# SYNC API (pymongo-like)
+# -------------------------------------------------------------------
+
+class MemoryCursor:
+    def __init__(self, collection: "MemoryCollection", query: dict, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        self._sort = key if isinstance(key, list) else [(key, direction or 1)]
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def _results(self) -> list:
+        docs = self._collection._select(self._query)
+        for key, direction in reversed(self._sort):
+            docs.sort(key=lambda d: (_get(d, key) is _MISSING, _get(d, key) if _get(d, key) is not _MISSING else 0),
+                      reverse=direction == -1)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[: self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    def __iter__(self):
+        self._collection._wait()
+        return iter(self._results())
+
+
+class MemoryCollection:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.docs: list[dict] = []
+        # every database.py query filters on user_id: keep docs bucketed by it
+        self._by_user: dict = {}
+        self.indexes: list = []
+        self._unique: dict[str, set] = {}  # field -> values, for unique single-field indexes
+        self.ops = 0
+        self._lock = threading.RLock()
+
+    def _wait(self) -> None:
+        self.ops += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _candidates(self, query: dict) -> list:
+        uid = query.get("user_id")
+        if uid is not None and not isinstance(uid, dict):
+            return self._by_user.get(uid, [])
+        return self.docs
+
+    def _select(self, query: dict) -> list:
+        with self._lock:
+            return [d for d in self._candidates(query) if matches(d, query)]
+
+    def _insert(self, doc: dict) -> dict:
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        with self._lock:
+            for field, values in self._unique.items():
+                if field in doc and doc[field] in values:
+                    raise DuplicateKeyError(f"E11000 duplicate key error: {field}={doc[field]!r}", 11000)
+            for field, values in self._unique.items():
+                if field in doc:
+                    values.add(doc[field])
+            self.docs.append(doc)
+            self._by_user.setdefault(doc.get("user_id"), []).append(doc)
+        return doc
+
+    def _remove(self, doc: dict) -> None:
+        for field, values in self._unique.items():
+            values.discard(doc.get(field))
+        self.docs.remove(doc)
+        self._by_user.get(doc.get("user_id"), []).remove(doc)
+
+    def _update(self, query: dict, update: dict, upsert: bool):
+        """Returns (before, after) copies; before is None when nothing matched."""
+        with self._lock:
+            for doc in self._candidates(query):
+                if matches(doc, query):
+                    before = copy.deepcopy(doc)
+                    _apply_update(doc, update, inserting=False)
+                    return before, copy.deepcopy(doc)
+            if not upsert:
+                return None, None
+            doc = _upsert_seed(query)
+            _apply_update(doc, update, inserting=True)
+            return None, copy.deepcopy(self._insert(doc))
+
+    # -- operations (no simulated latency; see the wrappers below) --------
+
+    def _op_find_one(self, query: dict | None = None, projection=None):
+        docs = self._select(query or {})
+        return _project(docs[0], projection) if docs else None
+
+    def _op_insert_one(self, doc: dict):
+        inserted = self._insert(doc)
+        doc.setdefault("_id", inserted["_id"])
+        return SimpleNamespace(inserted_id=inserted["_id"])
+
+    def _op_update_one(self, query: dict, update: dict, upsert: bool = False):
+        before, after = self._update(query, update, upsert)
+        matched = int(before is not None)
+        upserted_id = after["_id"] if before is None and after is not None else None
+        return SimpleNamespace(matched_count=matched, modified_count=matched, upserted_id=upserted_id)
+
+    def _op_find_one_and_update(self, query: dict, update: dict, upsert: bool = False,
+                                return_document=ReturnDocument.BEFORE, projection=None):
+        before, after = self._update(query, update, upsert)
+        doc = after if return_document == ReturnDocument.AFTER else before
+        return _project(doc, projection) if doc is not None else None
+
+    def _op_delete_one(self, query: dict):
+        with self._lock:
+            for doc in self._candidates(query):
+                if matches(doc, query):
+                    self._remove(doc)
+                    return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def _op_delete_many(self, query: dict):
+        with self._lock:
+            doomed = [d for d in self._candidates(query) if matches(d, query)]
+            for doc in doomed:
+                self._remove(doc)
+        return SimpleNamespace(deleted_count=len(doomed))
+
+    def _op_count_documents(self, query: dict) -> int:
+        return len(self._select(query))
+
+    def _op_bulk_write(self, requests, ordered: bool = True):
+        inserted = upserted = matched = 0
+        for request in requests:
+            # pymongo's InsertOne / UpdateOne keep their arguments in private attributes
+            if isinstance(request, InsertOne):
+                self._insert(request._doc)
+                inserted += 1
+                continue
+            before, after = self._update(request._filter, request._doc, request._upsert)
+            matched += int(before is not None)
+            upserted += int(before is None and after is not None)
+        return SimpleNamespace(inserted_count=inserted, matched_count=matched, upserted_count=upserted)
+
+    def _op_create_index(self, keys, **kwargs) -> str:
+        keys = [(keys, 1)] if isinstance(keys, str) else keys
+        self.indexes.append((keys, kwargs))
+        if kwargs.get("unique") and len(keys) == 1:
+            field = keys[0][0]
+            with self._lock:
+                self._unique.setdefault(field, {d[field] for d in self.docs if field in d})
+        return kwargs.get("name") or "_".join(f"{k}_{d}" for k, d in keys)
+
+    # -- pymongo API -----------------------------------------------------
+
+    def find(self, query: dict | None = None, projection=None) -> MemoryCursor:
+        return MemoryCursor(self, query or {}, projection)
+
+    def __getattr__(self, name):
+        op = getattr(type(self), "_op_" + name, None)
+        if op is None:
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            self._wait()
+            return op(self, *args, **kwargs)
+
+        return call
+
+
+class MemoryDatabase:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._collections: dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name, self.latency)
+        return self._collections[name]
+
+    def ops(self) -> int:
+        return sum(c.ops for c in self._collections.values())
+
+
+# -------------------------------------------------------------------
+# ASYNC API (Motor-like) over the same documents
+# -------------------------------------------------------------------
+
+class AsyncMemoryCursor:
+    def __init__(self, cursor: MemoryCursor, latency: float):
+        self._cursor = cursor
+        self._latency = latency
+
+    def sort(self, key, direction=None):
+        self._cursor.sort(key, direction)
+        return self
+
+    def skip(self, n: int):
+        self._cursor.skip(n)
+        return self
+
+    def limit(self, n: int):
+        self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None) -> list:
+        self._cursor._collection.ops += 1
+        await asyncio.sleep(self._latency)
+        docs = self._cursor._results()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in await self.to_list():
+            yield doc
+
+
+class AsyncMemoryCollection:
+    def __init__(self, collection: MemoryCollection, latency: float):
+        self._collection = collection
+        self._latency = latency
+
+    def find(self, query: dict | None = None, projection=None) -> AsyncMemoryCursor:
+        return AsyncMemoryCursor(self._collection.find(query, projection), self._latency)
+
+    def __getattr__(self, name):
+        op = getattr(MemoryCollection, "_op_" + name, None)
+        if op is None:
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            self._collection.ops += 1
+            await asyncio.sleep(self._latency)
+            return op(self._collection, *args, **kwargs)
+
+        return call
+
+
+class AsyncMemoryDatabase:
+    def __init__(self, db: MemoryDatabase):
+        self._db = db
+
+    def __getitem__(self, name: str) -> AsyncMemoryCollection:
+        return AsyncMemoryCollection(self._db[name], self._db.latency)
+
+
+def memory_databases(latency: float = 0.0):
+    """(sync db, async db) sharing one set of in-memory collections."""
+    db = MemoryDatabase(latency)
+    return db, AsyncMemoryDatabase(db)
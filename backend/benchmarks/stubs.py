@@ -0,0 +1,178 @@
+# backend/benchmarks/stubs.py
+# Shared stand-ins for benchmarks: a chat model that sleeps instead of calling
+# Groq, plus in-memory replacements for the Mongo calls the orchestrator makes.
+
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGODB_URI", "memory://bench")
+# one line per LLM call would drown the benchmark output (totals are in prompt_stats())
+os.environ.setdefault("PROMPT_LOG_TOKENS", "false")
+
+
+class _Reply:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubLLM:
+    """
+    Chat model stand-in with invoke/ainvoke/astream.
+    Each call waits a sampled latency (time to first token), then produces a
+    canned answer shaped like what the real prompt expects.
+
+    distribution: "uniform" (latency ± jitter), "lognormal" (median latency,
+                  sigma jitter: long right tail like real APIs) or "const"
+    tokens_per_second: output speed; the answer's words are emitted at this
+                  rate after the first one (None: a tenth of the latency in total)
+    All randomness comes from one seeded RNG, so a run is repeatable.
+    """
+
+    model = "stub"  # one shared limiter/breaker entry, like a real model name
+
+    def __init__(self, latency: float, jitter: float = 0.0, seed: int = 0,
+                 distribution: str = "uniform", tokens_per_second: float | None = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.tokens_per_second = tokens_per_second
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _delay(self) -> float:
+        self.calls += 1
+        if self.distribution == "const":
+            return self.latency
+        if self.distribution == "lognormal":
+            return self.latency * math.exp(self._rng.gauss(0.0, self.jitter))
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _token_gap(self, n_words: int) -> float:
+        if self.tokens_per_second:
+            return 1.0 / self.tokens_per_second
+        return self.latency / 10 / n_words
+
+    def _answer(self, prompt: str) -> str:
+        if "running summary" in prompt:
+            return "The user is working on sleep and hydration; advised water and a fixed bedtime."
+        if "intention classifier" in prompt:
+            return '{"is_wellness": true}'
+        if '"agents":' in prompt:
+            return '{"agents": ["SymptomAgent", "DietAgent"]}'
+        if "next_agent" in prompt:
+            # step mode: two agents, then finish (notes render as "- <key>: ...")
+            if "- diet:" in prompt:
+                return '{"next_agent": "FINISH"}'
+            if "- symptoms:" in prompt:
+                return '{"next_agent": "DietAgent"}'
+            return '{"next_agent": "SymptomAgent"}'
+        return "- drink water\n- sleep 8 hours"
+
+    def _generation_time(self, answer: str) -> float:
+        words = answer.split(" ")
+        return self._token_gap(len(words)) * (len(words) - 1)
+
+    def invoke(self, prompt: str, **kwargs) -> _Reply:
+        answer = self._answer(prompt)
+        time.sleep(self._delay() + self._generation_time(answer))
+        return _Reply(answer)
+
+    async def ainvoke(self, prompt: str, **kwargs) -> _Reply:
+        answer = self._answer(prompt)
+        await asyncio.sleep(self._delay() + self._generation_time(answer))
+        return _Reply(answer)
+
+    async def astream(self, prompt: str, **kwargs):
+        words = self._answer(prompt).split(" ")
+        await asyncio.sleep(self._delay())
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self._token_gap(len(words)))
+            yield _Reply(word if i == 0 else " " + word)
+
+
+def install_stub_llm(llm) -> None:
+    """Point every agent module at the given chat model (behind the same resilience wrapper)."""
+    from agents.resilience import ResilientLLM, resilient
+    from agents import (
+        intention_classifier,
+        supervisor_agent,
+        symptom_agent,
+        diet_agent,
+        fitness_agent,
+        lifestyle_agent,
+        summarizer_agent,
+    )
+
+    for module in (intention_classifier, supervisor_agent, symptom_agent,
+                   diet_agent, fitness_agent, lifestyle_agent, summarizer_agent):
+        current = module.llm
+        if isinstance(current, ResilientLLM):
+            module.llm = resilient(llm, current.role, current.fallback)
+        else:
+            module.llm = llm
+
+
+def install_stub_db(db_latency: float):
+    """Replace the orchestrator's Mongo calls with sleeps. Returns the orchestrator module."""
+    import database
+    from orchestrator import orchestrator
+
+    def get_conversation_history(user_id, limit=None):
+        time.sleep(db_latency)
+        return []
+
+    async def aget_conversation_history(user_id, limit=None):
+        await asyncio.sleep(db_latency)
+        return []
+
+    def get_profile(user_id):
+        time.sleep(db_latency)
+        return {"user_id": str(user_id), "age": 30}
+
+    def record_turn(**kwargs):
+        time.sleep(db_latency)
+
+    async def aget_profile(user_id):
+        await asyncio.sleep(db_latency)
+        return {"user_id": str(user_id), "age": 30}
+
+    async def arecord_turn(**kwargs):
+        await asyncio.sleep(db_latency)
+
+    database.get_conversation_history = get_conversation_history
+    database.aget_conversation_history = aget_conversation_history
+    orchestrator.get_profile = get_profile
+    orchestrator.record_turn = record_turn
+    orchestrator.aget_profile = aget_profile
+    orchestrator.arecord_turn = arecord_turn
+    return orchestrator
+
+
+def install_memory_db(db_latency: float = 0.0, profiles: dict | None = None):
+    """
+    Bind database.py to the in-memory Mongo stand-in (benchmarks/memory_mongo.py)
+    so the real database code runs, each operation costing db_latency seconds.
+    profiles: optional {user_id: profile fields} to seed. Returns the sync db.
+    """
+    import database
+    from benchmarks.memory_mongo import memory_databases
+
+    db, async_db = memory_databases(db_latency)
+    database.bind_database(db, async_db)
+    for user_id, fields in (profiles or {}).items():
+        db["profiles"].insert_one({"user_id": str(user_id), **fields})
+    return db
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
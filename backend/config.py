@@ -9,3 +9,152 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 JWT_SECRET = "super_secret_key"
 JWT_ALGORITHM = "HS256"
 MODEL_NAME = "llama-3.1-8b-instant"
+
+# Orchestration mode for /chat: "step" (supervisor per agent) or "plan" (one plan, parallel agents)
+ORCHESTRATION_MODE = os.getenv("ORCHESTRATION_MODE", "step")
+
+# Local intent fast path: lexicon + hashed n-gram model, LLM only in the uncertain band
+INTENT_LOCAL_ENABLED = os.getenv("INTENT_LOCAL_ENABLED", "true").lower() == "true"
+INTENT_LOCAL_LOW = float(os.getenv("INTENT_LOCAL_LOW", "0.1"))
+INTENT_LOCAL_HIGH = float(os.getenv("INTENT_LOCAL_HIGH", "0.9"))
+
+# Agent router in front of the supervisor LLM: "local" (agents/router_model.npz) or "llm"
+ROUTER_BACKEND = os.getenv("ROUTER_BACKEND", "local")
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.8"))
+
+# Response cache in front of the orchestrator (in-process LRU+TTL, optional shared Mongo tier)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MONGO = os.getenv("RESPONSE_CACHE_MONGO", "false").lower() == "true"
+RESPONSE_CACHE_MIN_WORDS = int(os.getenv("RESPONSE_CACHE_MIN_WORDS", "4"))
+
+# Per-user conversation memory bounds (orchestrator/memory_store.py)
+MEMORY_MAX_USERS = int(os.getenv("MEMORY_MAX_USERS", "2000"))
+MEMORY_MAX_BYTES = int(os.getenv("MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+MEMORY_IDLE_SECONDS = float(os.getenv("MEMORY_IDLE_SECONDS", "1800"))
+MEMORY_REHYDRATE_TURNS = int(os.getenv("MEMORY_REHYDRATE_TURNS", "10"))
+# "summary": last MEMORY_RECENT_TURNS turns verbatim + a rolling summary of older
+# turns (orchestrator/summary_memory.py); "buffer": the whole transcript
+MEMORY_MODE = os.getenv("MEMORY_MODE", "summary")
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "4"))
+# hard cap on the history a memory returns, summary included
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "600"))
+MEMORY_SUMMARY_MAX_TOKENS = int(os.getenv("MEMORY_SUMMARY_MAX_TOKENS", "200"))
+# older turns are folded into the summary in batches of this many (one LLM call each)
+MEMORY_SUMMARY_BATCH_TURNS = int(os.getenv("MEMORY_SUMMARY_BATCH_TURNS", "4"))
+MEMORY_SUMMARY_WORKERS = int(os.getenv("MEMORY_SUMMARY_WORKERS", "2"))
+# Where the memory lives (orchestrator/memory_store.py): "process" keeps it in
+# each worker (lost on restart, not shared between --workers); "mongo" keeps
+# one compact document per user in conversation_memory, shared by all workers
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "process")
+# Retrieval of relevant older turns (orchestrator/turn_index.py): per-user
+# vector index over conversation_turns, top-k cosine search for each message.
+# TURN_INDEX_EMBEDDER: "hashing" (NumPy only, word overlap) or
+# "sentence-transformers:<model>" (needs the sentence-transformers package)
+TURN_INDEX_ENABLED = os.getenv("TURN_INDEX_ENABLED", "true").lower() == "true"
+TURN_INDEX_EMBEDDER = os.getenv("TURN_INDEX_EMBEDDER", "hashing")
+TURN_INDEX_DIM = int(os.getenv("TURN_INDEX_DIM", "256"))  # hashing embedder only
+TURN_INDEX_TOP_K = int(os.getenv("TURN_INDEX_TOP_K", "3"))
+TURN_INDEX_MIN_SCORE = float(os.getenv("TURN_INDEX_MIN_SCORE", "0.25"))
+# newest turns kept per user, and vectors kept in the process (all users, LRU by user)
+TURN_INDEX_MAX_TURNS = int(os.getenv("TURN_INDEX_MAX_TURNS", "20000"))
+TURN_INDEX_MAX_VECTORS = int(os.getenv("TURN_INDEX_MAX_VECTORS", "1000000"))
+
+# /chat/stream (Server-Sent Events): comment-line heartbeat interval while no event is ready
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Prompt context builder (agents/prompt_context.py): token budget for the
+# profile/state/history part of each prompt, and per-call before/after logging
+PROMPT_CONTEXT_MAX_TOKENS = int(os.getenv("PROMPT_CONTEXT_MAX_TOKENS", "800"))
+PROMPT_LOG_TOKENS = os.getenv("PROMPT_LOG_TOKENS", "false").lower() == "true"
+
+# Shared LLM client (agents/groq_client.py): concurrency limits, HTTP pool, Groq quotas.
+# LLM_MODEL_CONCURRENCY overrides the per-model limit, e.g. "llama-3.1-8b-instant=8,other=2".
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MODEL_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (
+        item.partition("=") for item in os.getenv("LLM_MODEL_CONCURRENCY", "").split(",") if "=" in item
+    )
+}
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "32"))
+LLM_POOL_KEEPALIVE_SECONDS = float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "60"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+# Requests / tokens per minute allowed by the Groq plan (0 disables that bucket)
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "6000"))
+
+# LLM call resilience (agents/resilience.py): deadlines, hedging, circuit breaker
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "20"))
+TURN_TIMEOUT = float(os.getenv("TURN_TIMEOUT", "45"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "30"))
+
+# Coalescing of identical in-flight chat requests + idempotency keys (orchestrator/singleflight.py)
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+
+# Prometheus /metrics (utils/metrics.py): per-stage latency, LLM tokens, turn shape
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Write-behind persistence of conversation turns (orchestrator/turn_writer.py)
+TURN_WRITE_BEHIND = os.getenv("TURN_WRITE_BEHIND", "true").lower() == "true"
+TURN_WRITE_BATCH_SIZE = int(os.getenv("TURN_WRITE_BATCH_SIZE", "100"))
+TURN_WRITE_FLUSH_SECONDS = float(os.getenv("TURN_WRITE_FLUSH_SECONDS", "0.5"))
+# queued turns beyond this are written directly by the request (backpressure)
+TURN_WRITE_MAX_QUEUE = int(os.getenv("TURN_WRITE_MAX_QUEUE", "10000"))
+TURN_WRITE_MAX_RETRIES = int(os.getenv("TURN_WRITE_MAX_RETRIES", "3"))
+
+# Startup: build the LLM clients (and import LangChain) in the background
+# right after boot instead of on the first chat request
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+# Password hashing (utils/password_hash.py): pbkdf2_sha256 runs in its own
+# process pool so logins never hold the threadpool / event loop chat needs.
+# Rounds apply to new hashes; existing hashes keep verifying with their own.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# 0 runs hashing in a thread instead of a process pool
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# hash/verify jobs allowed to wait for a worker; beyond that /auth answers 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# Decoded bearer tokens (utils/jwt_handler.py): LRU of verified claims, each
+# entry kept until the token's exp (at most JWT_CLAIMS_CACHE_TTL_SECONDS)
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "4096"))
+JWT_CLAIMS_CACHE_TTL_SECONDS = float(os.getenv("JWT_CLAIMS_CACHE_TTL_SECONDS", "300"))
+
+# Google OAuth callback (utils/google_oauth.py): shared async HTTP client and
+# local id_token verification against Google's cached signing keys (JWKS).
+# The URLs are configurable so a local OAuth stand-in can be used in benchmarks.
+GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+GOOGLE_USERINFO_URL = os.getenv("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v3/userinfo")
+GOOGLE_JWKS_URL = os.getenv("GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", "10"))
+# used when the JWKS response has no Cache-Control max-age
+GOOGLE_JWKS_TTL_SECONDS = float(os.getenv("GOOGLE_JWKS_TTL_SECONDS", "3600"))
+
+# Per-role model profiles (agents/model_profiles.py): model, max_tokens,
+# temperature and timeout for the intent classifier, supervisor, each agent and
+# the synthesizer. Control-plane roles (classifier, supervisor) only emit a
+# short JSON decision, so their output is capped at a few tokens.
+# Override single fields of one role with LLM_PROFILE_<ROLE>, e.g.
+#   LLM_PROFILE_SUPERVISOR="model=llama-3.1-8b-instant,max_tokens=48,timeout=5"
+LLM_CONTROL_MODEL = os.getenv("LLM_CONTROL_MODEL", MODEL_NAME)
+LLM_AGENT_MODEL = os.getenv("LLM_AGENT_MODEL", MODEL_NAME)
+LLM_PROFILE_OVERRIDES = {
+    key[len("LLM_PROFILE_"):].lower(): dict(
+        item.split("=", 1) for item in value.split(",") if "=" in item
+    )
+    for key, value in os.environ.items() if key.startswith("LLM_PROFILE_")
+}
+# Latency-aware selection (agents/resilience.py): when a role's primary model
+# is slower than the profile's latency_budget (rolling average) or its breaker
+# is open, calls go to this alternate model; LLM_ALTERNATE_PROBE_RATIO of the
+# calls keep measuring the primary so traffic returns once it recovers.
+LLM_ALTERNATE_MODEL = os.getenv("LLM_ALTERNATE_MODEL", "")
+LLM_ALTERNATE_PROBE_RATIO = float(os.getenv("LLM_ALTERNATE_PROBE_RATIO", "0.1"))
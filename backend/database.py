@@ -6,10 +6,14 @@
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from bson.objectid import ObjectId
-from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo import MongoClient, ReturnDocument, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+import asyncio
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from utils.ttl_cache import TTLCache
 
 load_dotenv()
 
@@ -17,12 +21,22 @@ MONGO_URI = os.getenv("MONGODB_URI")
 if not MONGO_URI:
     raise RuntimeError("MONGODB_URI missing in .env")
 
-# Try to connect but don't let failures crash the process.
+# Collection handles, bound by connect() (or bind_database() in benchmarks).
 client = None
 db = None
 users_collection = None
 profiles_collection = None
 conversation_collection = None
+response_cache_collection = None
+conversation_memory_collection = None
+
+# Async (Motor) handles used by the async /chat path so Mongo I/O never blocks the event loop
+async_client = None
+async_users_collection = None
+async_profiles_collection = None
+async_conversation_collection = None
+async_response_cache_collection = None
+async_conversation_memory_collection = None
 
 # Determine DB name from URI (the path part before query params), fallback to FitAura
 try:
@@ -30,28 +44,139 @@ try:
 except Exception:
     db_name = "FitAura"
 
-try:
-    # Use a short timeout so server starts quickly if DNS/network fails
-    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
-    # Small ping to validate connection
-    client.admin.command("ping")
-    db = client[db_name]
-    users_collection = db["users"]
-    profiles_collection = db["profiles"]
-    conversation_collection = db["conversation_turns"]
-    print("MongoDB connected.")
-except Exception as e:
-    # Keep server alive — log helpful message
-    print("WARNING: MongoDB connection failed at startup:", repr(e))
-    client = None
-    db = None
-    users_collection = None
-    profiles_collection = None
-    conversation_collection = None
-
-
-# Helper to ensure collection availability
-def _ensure_collection(coll, name: str = "collection"):
+# "memory://" skips the connection; benchmarks then bind an in-memory stand-in
+# with bind_database() (see benchmarks/memory_mongo.py)
+MEMORY_URI_PREFIX = "memory://"
+
+MONGO_SERVER_SELECTION_MS = int(os.getenv("MONGO_SERVER_SELECTION_MS", "5000"))
+# seconds between connection attempts while Mongo is down / between readiness pings
+MONGO_RECONNECT_SECONDS = float(os.getenv("MONGO_RECONNECT_SECONDS", "5"))
+
+# Nothing connects at import time (that blocked worker boot for up to the
+# server-selection timeout). The app connects from its lifespan with
+# run_connection_monitor(), which keeps retrying while Mongo is down; scripts
+# connect on their first database call (_ensure_collection).
+_connect_lock = threading.Lock()
+_last_attempt = float("-inf")
+_monitor_running = False
+_status = {"connected": False, "reachable": False, "last_error": None, "connect_attempts": 0}
+
+
+def connect() -> bool:
+    """
+    Connect to MONGODB_URI and bind the collection handles. Returns False
+    (after logging why) when Mongo is unreachable; call again to retry.
+    """
+    global client, async_client, _last_attempt
+    if MONGO_URI.startswith(MEMORY_URI_PREFIX):
+        return db is not None
+    with _connect_lock:
+        if db is not None:
+            return True
+        _last_attempt = time.monotonic()
+        _status["connect_attempts"] += 1
+        new_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_MS)
+        try:
+            # Small ping to validate connection
+            new_client.admin.command("ping")
+        except Exception as e:
+            # Keep server alive — log helpful message
+            print("WARNING: MongoDB connection failed:", repr(e))
+            new_client.close()
+            _status["last_error"] = repr(e)
+            return False
+
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        # Motor connects lazily on first operation; the ping above already validated the URI
+        client = new_client
+        async_client = AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_MS)
+        bind_database(client[db_name], async_client[db_name])
+        print("MongoDB connected.")
+        return True
+
+
+def ping() -> bool:
+    """Round trip to the server; updates the readiness status."""
+    try:
+        if client is not None:
+            client.admin.command("ping")
+        reachable = db is not None
+        if reachable:
+            _status["last_error"] = None
+    except Exception as e:
+        reachable = False
+        _status["last_error"] = repr(e)
+    _status["reachable"] = reachable
+    return reachable
+
+
+def database_status() -> Dict[str, Any]:
+    return {**_status, "connected": db is not None}
+
+
+async def run_connection_monitor(on_connect=None) -> None:
+    """
+    Lifespan task: connect in the background (retrying every
+    MONGO_RECONNECT_SECONDS while Mongo is down), run on_connect() once
+    connected, then keep pinging so readiness reflects reachability.
+    """
+    global _monitor_running
+    _monitor_running = True
+    hooked = on_connect is None
+    try:
+        while True:
+            try:
+                if db is None:
+                    await asyncio.to_thread(connect)
+                if db is not None and not hooked:
+                    await asyncio.to_thread(on_connect)
+                    hooked = True
+            except Exception as e:
+                # retried on the next round; one bad attempt must not end the monitor
+                print("WARNING: MongoDB connect hook failed:", repr(e))
+                _status["last_error"] = repr(e)
+            await asyncio.to_thread(ping)
+            await asyncio.sleep(MONGO_RECONNECT_SECONDS)
+    finally:
+        _monitor_running = False
+
+
+def bind_database(sync_db, async_db=None) -> None:
+    """
+    Point every collection handle at the given database objects (anything with
+    pymongo / Motor collection APIs) and drop the per-process caches.
+    """
+    global db, users_collection, profiles_collection, conversation_collection
+    global response_cache_collection, async_users_collection, async_profiles_collection
+    global async_conversation_collection, async_response_cache_collection
+    global conversation_memory_collection, async_conversation_memory_collection
+    db = sync_db
+    users_collection = sync_db["users"]
+    profiles_collection = sync_db["profiles"]
+    conversation_collection = sync_db["conversation_turns"]
+    response_cache_collection = sync_db["response_cache"]
+    conversation_memory_collection = sync_db["conversation_memory"]
+    if async_db is not None:
+        async_users_collection = async_db["users"]
+        async_profiles_collection = async_db["profiles"]
+        async_conversation_collection = async_db["conversation_turns"]
+        async_response_cache_collection = async_db["response_cache"]
+        async_conversation_memory_collection = async_db["conversation_memory"]
+    _profile_cache.clear()
+    _user_cache.clear()
+    _migrated_users.clear()
+    _status["connected"] = _status["reachable"] = True
+
+
+# Helper to ensure collection availability: `attr` is the module-level handle
+# name (e.g. "users_collection"). Outside the app (scripts, tools) the first
+# call connects on demand, retrying at most every MONGO_RECONNECT_SECONDS.
+def _ensure_collection(attr: str, name: str = "collection"):
+    coll = globals()[attr]
+    if coll is None and not _monitor_running and time.monotonic() - _last_attempt >= MONGO_RECONNECT_SECONDS:
+        connect()
+        coll = globals()[attr]
     if coll is None:
         raise RuntimeError(
             f"Database not connected. '{name}' is unavailable. "
@@ -60,6 +185,97 @@ def _ensure_collection(coll, name: str = "collection"):
     return coll
 
 
+# ------------------------------
+# PROFILE / USER CACHE
+# ------------------------------
+# Profiles and users are read on every /chat and /profile request but
+# change rarely. Both are cached per process with a TTL and size bound and
+# invalidated by every write in this module. With PROFILE_CACHE_CHANGE_STREAM
+# enabled, a background change-stream listener also invalidates entries
+# written by other workers (requires a replica set / Atlas).
+
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+PROFILE_CACHE_CHANGE_STREAM = os.getenv("PROFILE_CACHE_CHANGE_STREAM", "false").lower() == "true"
+
+_profile_cache = TTLCache(PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS)
+_user_cache = TTLCache(PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS)
+_cache_stats = {"writes_skipped": 0, "change_stream_invalidations": 0}
+
+
+def invalidate_profile_cache(user_id: Any) -> None:
+    _profile_cache.pop(str(user_id))
+
+
+def invalidate_user_cache(user_id: Any) -> None:
+    _user_cache.pop(str(user_id))
+
+
+def db_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters; every hit is one Mongo round trip that did not happen."""
+    profile = _profile_cache.stats()
+    user = _user_cache.stats()
+    return {
+        "profile": profile,
+        "user": user,
+        "round_trips_saved": profile["hits"] + user["hits"] + _cache_stats["writes_skipped"],
+        "writes_skipped": _cache_stats["writes_skipped"],
+        "change_stream_invalidations": _cache_stats["change_stream_invalidations"],
+        "change_stream_enabled": PROFILE_CACHE_CHANGE_STREAM,
+    }
+
+
+def _watch_cache_invalidations() -> None:
+    """Blocking loop: invalidate cached profiles/users changed by any worker."""
+    import time
+
+    while True:
+        try:
+            pipeline = [{"$match": {"ns.coll": {"$in": ["profiles", "users"]}}}]
+            with db.watch(pipeline, full_document="updateLookup") as stream:
+                for change in stream:
+                    coll_name = change["ns"]["coll"]
+                    full = change.get("fullDocument") or {}
+                    if coll_name == "users":
+                        invalidate_user_cache(change["documentKey"]["_id"])
+                    elif full.get("user_id"):
+                        invalidate_profile_cache(full["user_id"])
+                    else:
+                        # deletes only carry _id; profiles are keyed by user_id
+                        _profile_cache.clear()
+                    _cache_stats["change_stream_invalidations"] += 1
+        except Exception as e:
+            print("WARNING: cache change stream stopped, retrying in 5s:", repr(e))
+            time.sleep(5)
+
+
+def start_cache_invalidation_listener() -> bool:
+    """Start the change-stream listener thread if enabled and connected."""
+    if not PROFILE_CACHE_CHANGE_STREAM or db is None:
+        return False
+    import threading
+
+    threading.Thread(target=_watch_cache_invalidations, name="cache-invalidation", daemon=True).start()
+    return True
+
+
+# Callbacks run after conversation turns are stored: fn(docs: list of turn documents)
+_turn_listeners = []
+
+
+def add_turn_listener(callback) -> None:
+    """Register a callback that runs after turns are written (used by the turn index)."""
+    _turn_listeners.append(callback)
+
+
+def _notify_turn_listeners(docs: List[Dict[str, Any]]) -> None:
+    for callback in _turn_listeners:
+        try:
+            callback(docs)
+        except Exception as e:
+            print("WARNING: turn listener failed:", repr(e))
+
+
 # ------------------------------
 # USER FUNCTIONS (same names as before)
 # ------------------------------
@@ -68,27 +284,27 @@ def save_user(user_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Save a new user and return the full user record (including its id).
     Raises ValueError for duplicate email, RuntimeError if DB is unavailable.
+    One round trip: the unique email index (ensure_indexes) rejects duplicates,
+    and the record returned is the document we inserted.
     """
-    coll = _ensure_collection(users_collection, "users")
+    coll = _ensure_collection("users_collection", "users")
 
     # default flags
-    if "profile_complete" not in user_data:
-        user_data["profile_complete"] = False
+    user_record = {"profile_complete": False, **user_data}
 
-    existing = coll.find_one({"email": user_data.get("email")})
-    if existing:
+    try:
+        result = coll.insert_one(user_record)
+    except DuplicateKeyError:
         raise ValueError("email_already_registered")
 
-    result = coll.insert_one(user_data)
-    inserted_id = result.inserted_id
-    user_record = coll.find_one({"_id": inserted_id})
-    user_record["id"] = str(user_record["_id"])
+    user_record["_id"] = result.inserted_id
+    user_record["id"] = str(result.inserted_id)
     return user_record
 
 
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Return the user dict for this email, or None if not found."""
-    coll = _ensure_collection(users_collection, "users")
+    coll = _ensure_collection("users_collection", "users")
     user = coll.find_one({"email": email})
     if not user:
         return None
@@ -104,16 +320,68 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     return user
 
 
+async def asave_user(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Async version of save_user (Motor, non-blocking)."""
+    coll = _ensure_collection("async_users_collection", "users")
+    user_record = {"profile_complete": False, **user_data}
+    try:
+        result = await coll.insert_one(user_record)
+    except DuplicateKeyError:
+        raise ValueError("email_already_registered")
+    user_record["_id"] = result.inserted_id
+    user_record["id"] = str(result.inserted_id)
+    return user_record
+
+
+async def aget_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    """Async version of get_user_by_email (Motor, non-blocking)."""
+    coll = _ensure_collection("async_users_collection", "users")
+    user = await coll.find_one({"email": email})
+    if not user:
+        return None
+    user["id"] = str(user["_id"])
+    if "profile_complete" not in user:
+        try:
+            user["profile_complete"] = True
+            await coll.update_one({"_id": user["_id"]}, {"$set": {"profile_complete": True}})
+        except Exception:
+            pass
+    return user
+
+
+async def aupsert_user_by_email(email: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the user with this email, creating it from `defaults` when there is
+    none, in one round trip (find_one_and_update with upsert, Motor).
+    """
+    coll = _ensure_collection("async_users_collection", "users")
+    query = {"email": email}
+    update = {"$setOnInsert": {"profile_complete": False, **defaults}}
+    try:
+        user = await coll.find_one_and_update(
+            query, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # a concurrent upsert for the same new email won the unique index
+        user = await coll.find_one(query)
+    user["id"] = str(user["_id"])
+    return user
+
+
 def get_user_by_id(user_id: Any) -> Optional[Dict[str, Any]]:
     """
     Return the user dict for this user_id (string or ObjectId), or None if not found.
     Accepts either the string form of ObjectId or the literal ObjectId.
     """
-    coll = _ensure_collection(users_collection, "users")
+    coll = _ensure_collection("users_collection", "users")
 
     if user_id is None:
         return None
 
+    cached = _user_cache.get(str(user_id))
+    if cached is not None:
+        return dict(cached)
+
     query = None
     try:
         query = {"_id": ObjectId(user_id)}
@@ -131,6 +399,7 @@ def get_user_by_id(user_id: Any) -> Optional[Dict[str, Any]]:
             coll.update_one({"_id": user["_id"]}, {"$set": {"profile_complete": True}})
         except Exception:
             pass
+    _user_cache.set(str(user_id), dict(user))
     return user
 
 
@@ -139,16 +408,27 @@ def update_user_profile_complete(user_id: Any, profile_complete: bool) -> bool:
     Update a user's profile_complete status.
     Returns True if successful, False if user not found.
     """
-    coll = _ensure_collection(users_collection, "users")
+    coll = _ensure_collection("users_collection", "users")
 
     if user_id is None:
         return False
 
+    # Already in that state according to a fresh cache entry: nothing to write
+    cached = _user_cache.peek(str(user_id))
+    if cached is not None and cached.get("profile_complete") == profile_complete:
+        _cache_stats["writes_skipped"] += 1
+        return True
+
     try:
         res = coll.update_one({"_id": ObjectId(user_id)}, {"$set": {"profile_complete": profile_complete}})
     except Exception:
         res = coll.update_one({"id": str(user_id)}, {"$set": {"profile_complete": profile_complete}})
 
+    # write-through: keep a cached user in step with what we just wrote
+    if cached is not None and res.matched_count:
+        _user_cache.set(str(user_id), {**cached, "profile_complete": profile_complete})
+    else:
+        invalidate_user_cache(user_id)
     return res.matched_count > 0
 
 
@@ -161,7 +441,7 @@ def save_profile(user_id: Any, profile_data: Dict[str, Any]) -> None:
     Create or update a profile for the given user_id.
     Stores profile_data in profiles_collection with user_id (string).
     """
-    coll = _ensure_collection(profiles_collection, "profiles")
+    coll = _ensure_collection("profiles_collection", "profiles")
 
     if user_id is None:
         raise ValueError("user_id_required")
@@ -169,6 +449,7 @@ def save_profile(user_id: Any, profile_data: Dict[str, Any]) -> None:
     uid = str(user_id)
     profile_doc = {"user_id": uid, **profile_data}
     coll.update_one({"user_id": uid}, {"$set": profile_doc}, upsert=True)
+    invalidate_profile_cache(uid)
 
     # Also mark user's profile_complete = True (best effort)
     try:
@@ -182,20 +463,213 @@ def get_profile(user_id: Any) -> Dict[str, Any]:
     Return the profile dict for this user_id.
     If no profile exists, return an empty dict.
     """
-    coll = _ensure_collection(profiles_collection, "profiles")
+    coll = _ensure_collection("profiles_collection", "profiles")
     if user_id is None:
         return {}
     uid = str(user_id)
+    cached = _profile_cache.get(uid)
+    if cached is not None:
+        return dict(cached)
     profile = coll.find_one({"user_id": uid})
     if not profile:
+        # cache the miss too: most chat users never touch their profile again
+        _profile_cache.set(uid, {})
+        return {}
+    profile["id"] = str(profile["_id"])
+    _profile_cache.set(uid, dict(profile))
+    return profile
+
+
+async def aget_profile(user_id: Any) -> Dict[str, Any]:
+    """Async version of get_profile (Motor, non-blocking)."""
+    coll = _ensure_collection("async_profiles_collection", "profiles")
+    if user_id is None:
+        return {}
+    uid = str(user_id)
+    cached = _profile_cache.get(uid)
+    if cached is not None:
+        return dict(cached)
+    profile = await coll.find_one({"user_id": uid})
+    if not profile:
+        _profile_cache.set(uid, {})
         return {}
     profile["id"] = str(profile["_id"])
+    _profile_cache.set(uid, dict(profile))
     return profile
 
 
+# ------------------------------
+# SHARED RESPONSE CACHE (optional second tier for orchestrator/response_cache.py)
+# ------------------------------
+
+def ensure_response_cache_indexes(ttl_seconds: int) -> None:
+    """Unique key + TTL index so Mongo expires old cached answers on its own."""
+    coll = _ensure_collection("response_cache_collection", "response_cache")
+    coll.create_index("key", unique=True)
+    coll.create_index("created_at", expireAfterSeconds=int(ttl_seconds))
+
+
+def get_cached_response(key: str) -> Optional[Dict[str, Any]]:
+    coll = _ensure_collection("response_cache_collection", "response_cache")
+    return coll.find_one({"key": key}, {"_id": 0})
+
+
+async def aget_cached_response(key: str) -> Optional[Dict[str, Any]]:
+    coll = _ensure_collection("async_response_cache_collection", "response_cache")
+    return await coll.find_one({"key": key}, {"_id": 0})
+
+
+def _cache_doc(key: str, fingerprint: str, response: str, agents_used: List[str]) -> Dict[str, Any]:
+    return {
+        "key": key,
+        "fingerprint": fingerprint,
+        "response": response,
+        "agents_used": agents_used,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def set_cached_response(key: str, fingerprint: str, response: str, agents_used: List[str]) -> None:
+    coll = _ensure_collection("response_cache_collection", "response_cache")
+    coll.update_one({"key": key}, {"$set": _cache_doc(key, fingerprint, response, agents_used)}, upsert=True)
+
+
+async def aset_cached_response(key: str, fingerprint: str, response: str, agents_used: List[str]) -> None:
+    coll = _ensure_collection("async_response_cache_collection", "response_cache")
+    await coll.update_one({"key": key}, {"$set": _cache_doc(key, fingerprint, response, agents_used)}, upsert=True)
+
+
 # ------------------------------
 # CONVERSATION HISTORY (same names as before)
 # ------------------------------
+# One document per turn: {user_id, timestamp, user_message, assistant_response, agents_used}
+# served by the (user_id, timestamp, _id) index. Older deployments kept every
+# turn of a user in a single {user_id, turns: [...]} document; those "legacy"
+# documents are split into per-turn documents the first time the user's
+# history is read (or all at once with tools/migrate_conversation_turns.py).
+
+TURN_INDEX_NAME = "user_id_timestamp"
+TURN_FIELDS = {"_id": 0, "timestamp": 1, "user_message": 1, "assistant_response": 1, "agents_used": 1}
+
+# Users whose legacy document is known to be gone, so reads skip the check
+_migrated_users = TTLCache(maxsize=100_000)
+
+
+def ensure_conversation_indexes() -> None:
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
+    coll.create_index([("user_id", 1), ("timestamp", 1), ("_id", 1)], name=TURN_INDEX_NAME)
+
+
+def _build_turn(
+    user_message: str,
+    assistant_response: str,
+    agents_used: List[str],
+    decided_by: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    turn = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "user_message": user_message,
+        "assistant_response": assistant_response,
+        "agents_used": agents_used,
+    }
+    if decided_by:
+        turn["decided_by"] = decided_by
+    return turn
+
+
+def _legacy_turn_ops(doc: Dict[str, Any]) -> List[UpdateOne]:
+    """Idempotent upserts (keyed by legacy_seq) so a retried migration never duplicates turns."""
+    uid = doc["user_id"]
+    return [
+        UpdateOne(
+            {"user_id": uid, "legacy_seq": seq},
+            {"$setOnInsert": {"user_id": uid, "legacy_seq": seq, **turn}},
+            upsert=True,
+        )
+        for seq, turn in enumerate(doc.get("turns", []))
+    ]
+
+
+def migrate_legacy_history(user_id: Any) -> int:
+    """Split one user's legacy single-document history into per-turn documents."""
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
+    uid = str(user_id)
+    doc = coll.find_one({"user_id": uid, "turns": {"$exists": True}})
+    moved = 0
+    if doc:
+        ops = _legacy_turn_ops(doc)
+        if ops:
+            coll.bulk_write(ops, ordered=False)
+        coll.delete_one({"_id": doc["_id"]})
+        moved = len(ops)
+    _migrated_users.set(uid, True)
+    return moved
+
+
+async def amigrate_legacy_history(user_id: Any) -> int:
+    """Async version of migrate_legacy_history."""
+    coll = _ensure_collection("async_conversation_collection", "conversation_turns")
+    uid = str(user_id)
+    doc = await coll.find_one({"user_id": uid, "turns": {"$exists": True}})
+    moved = 0
+    if doc:
+        ops = _legacy_turn_ops(doc)
+        if ops:
+            await coll.bulk_write(ops, ordered=False)
+        await coll.delete_one({"_id": doc["_id"]})
+        moved = len(ops)
+    _migrated_users.set(uid, True)
+    return moved
+
+
+def new_turn_document(
+    user_id: Any,
+    user_message: str,
+    assistant_response: str,
+    agents_used: List[str],
+    decided_by: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    A complete turn document with its _id assigned now, so queued writes keep
+    the (timestamp, _id) order of the turns and a retried batch is idempotent.
+    decided_by records which component made each decision for the turn
+    (e.g. {"intent": "lexicon"}), so the training tools can skip labels the
+    local models produced themselves.
+    """
+    turn = _build_turn(user_message, assistant_response, agents_used, decided_by)
+    return {"_id": ObjectId(), "user_id": str(user_id), **turn}
+
+
+def insert_conversation_turns(docs: List[Dict[str, Any]]) -> int:
+    """
+    Insert prepared turn documents in one unordered bulk_write.
+    Documents already stored (duplicate _id from a retried batch) count as written.
+    Returns the number of documents inserted by this call.
+    """
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
+    try:
+        inserted = coll.bulk_write([InsertOne(doc) for doc in docs], ordered=False).inserted_count
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        inserted = e.details.get("nInserted", 0)
+    # listeners skip _ids they have already seen (retried batches)
+    _notify_turn_listeners(docs)
+    return inserted
+
+
+async def ainsert_conversation_turns(docs: List[Dict[str, Any]]) -> int:
+    """Async version of insert_conversation_turns (Motor, non-blocking)."""
+    coll = _ensure_collection("async_conversation_collection", "conversation_turns")
+    try:
+        inserted = (await coll.bulk_write([InsertOne(doc) for doc in docs], ordered=False)).inserted_count
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        inserted = e.details.get("nInserted", 0)
+    _notify_turn_listeners(docs)
+    return inserted
+
 
 def append_conversation_turn(
     user_id: Any,
@@ -209,31 +683,280 @@ def append_conversation_turn(
     - user_message
     - assistant_response
     - agents_used
-    Keeps turns in an array per user_id doc.
+    Each turn is its own document (constant-size writes, no 16 MB growth).
     """
-    coll = _ensure_collection(conversation_collection, "conversation_turns")
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
     uid = str(user_id)
-    turn = {
-        "timestamp": datetime.now().isoformat(timespec="seconds"),
-        "user_message": user_message,
-        "assistant_response": assistant_response,
-        "agents_used": agents_used,
-    }
-    coll.update_one(
-        {"user_id": uid},
-        {"$push": {"turns": turn}},
-        upsert=True,
-    )
+    doc = {"user_id": uid, **_build_turn(user_message, assistant_response, agents_used)}
+    coll.insert_one(doc)
+    _notify_turn_listeners([doc])
 
 
-def get_conversation_history(user_id: Any) -> List[Dict[str, Any]]:
+async def aappend_conversation_turn(
+    user_id: Any,
+    user_message: str,
+    assistant_response: str,
+    agents_used: List[str],
+) -> None:
+    """Async version of append_conversation_turn (Motor, non-blocking)."""
+    coll = _ensure_collection("async_conversation_collection", "conversation_turns")
+    uid = str(user_id)
+    doc = {"user_id": uid, **_build_turn(user_message, assistant_response, agents_used)}
+    await coll.insert_one(doc)
+    _notify_turn_listeners([doc])
+
+
+def get_conversation_history(user_id: Any, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Return all stored conversation turns for this user.
+    Return stored conversation turns for this user, oldest first.
+    With limit, only the most recent `limit` turns are returned.
     Each item has: timestamp, user_message, assistant_response, agents_used.
     """
-    coll = _ensure_collection(conversation_collection, "conversation_turns")
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
     uid = str(user_id)
-    doc = coll.find_one({"user_id": uid})
-    if not doc:
+    if _migrated_users.get(uid) is None:
+        migrate_legacy_history(uid)
+
+    cursor = coll.find({"user_id": uid}, TURN_FIELDS).sort([("timestamp", -1), ("_id", -1)])
+    if limit:
+        cursor = cursor.limit(limit)
+    turns = list(cursor)
+    turns.reverse()
+    return turns
+
+
+async def aget_conversation_history(user_id: Any, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Async version of get_conversation_history (Motor, non-blocking)."""
+    coll = _ensure_collection("async_conversation_collection", "conversation_turns")
+    uid = str(user_id)
+    if _migrated_users.get(uid) is None:
+        await amigrate_legacy_history(uid)
+
+    cursor = coll.find({"user_id": uid}, TURN_FIELDS).sort([("timestamp", -1), ("_id", -1)])
+    if limit:
+        cursor = cursor.limit(limit)
+    turns = await cursor.to_list(length=None)
+    turns.reverse()
+    return turns
+
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    return f"{doc['timestamp']}|{doc['_id']}"
+
+
+def _decode_cursor(cursor: str) -> tuple[str, ObjectId]:
+    try:
+        timestamp, oid = cursor.rsplit("|", 1)
+        return timestamp, ObjectId(oid)
+    except Exception:
+        raise ValueError("invalid_cursor")
+
+
+def get_conversation_page(
+    user_id: Any,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    order: str = "asc",
+) -> Dict[str, Any]:
+    """
+    One page of a user's turns, walked with an opaque cursor.
+    - order: "asc" (oldest first) or "desc" (newest first)
+    - since / until: inclusive ISO timestamp bounds
+    - cursor: next_cursor from the previous page
+    Returns {"turns": [...], "next_cursor": str | None}.
+    """
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
+    uid = str(user_id)
+    if _migrated_users.get(uid) is None:
+        migrate_legacy_history(uid)
+
+    query: Dict[str, Any] = {"user_id": uid}
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = since
+        if until:
+            query["timestamp"]["$lte"] = until
+
+    direction = 1 if order == "asc" else -1
+    if cursor:
+        timestamp, oid = _decode_cursor(cursor)
+        op = "$gt" if direction == 1 else "$lt"
+        query["$or"] = [
+            {"timestamp": {op: timestamp}},
+            {"timestamp": timestamp, "_id": {op: oid}},
+        ]
+
+    docs = list(
+        coll.find(query, {**TURN_FIELDS, "_id": 1})
+        .sort([("timestamp", direction), ("_id", direction)])
+        .limit(limit + 1)
+    )
+    next_cursor = _encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    turns = []
+    for doc in docs[:limit]:
+        doc.pop("_id", None)
+        turns.append(doc)
+    return {"turns": turns, "next_cursor": next_cursor}
+
+
+def iter_conversation_turns():
+    """
+    Yield (user_id, turn) for every stored turn of every user.
+    Used by the offline training tools in backend/tools/.
+    Handles both per-turn documents and not-yet-migrated legacy documents.
+    """
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
+    for doc in coll.find({}):
+        if "turns" in doc:
+            for turn in doc["turns"]:
+                yield doc.get("user_id"), turn
+        else:
+            yield doc.get("user_id"), doc
+
+
+# ------------------------------
+# CONVERSATION MEMORY (orchestrator/mongo_memory.py)
+# ------------------------------
+# One small document per user with the rolling chat context, shared by every
+# worker: {user_id, summary, summarized_through, turn_count,
+# turns: [[user_message, assistant_response], ...]} where `turns` holds only
+# the last few turns (older ones live in the summary and conversation_turns).
+# Read with one find_one on the unique user_id index, written with one upsert.
+
+MEMORY_FIELDS = {"_id": 0, "summary": 1, "summarized_through": 1, "turn_count": 1, "turns": 1}
+
+
+def _memory_push(user_message: str, assistant_response: str, keep: int) -> Dict[str, Any]:
+    return {
+        "$push": {"turns": {"$each": [[user_message, assistant_response]], "$slice": -keep}},
+        "$inc": {"turn_count": 1},
+        "$set": {"updated_at": datetime.now().isoformat(timespec="seconds")},
+        "$setOnInsert": {"summary": "", "summarized_through": 0},
+    }
+
+
+def _memory_seed(turns: List[List[str]]) -> Dict[str, Any]:
+    return {"$setOnInsert": {
+        "summary": "", "summarized_through": 0, "turn_count": len(turns), "turns": turns,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    }}
+
+
+def get_conversation_memory(user_id: Any) -> Optional[Dict[str, Any]]:
+    coll = _ensure_collection("conversation_memory_collection", "conversation_memory")
+    return coll.find_one({"user_id": str(user_id)}, MEMORY_FIELDS)
+
+
+async def aget_conversation_memory(user_id: Any) -> Optional[Dict[str, Any]]:
+    coll = _ensure_collection("async_conversation_memory_collection", "conversation_memory")
+    return await coll.find_one({"user_id": str(user_id)}, MEMORY_FIELDS)
+
+
+def seed_conversation_memory(user_id: Any, turns: List[List[str]]) -> None:
+    """Create the user's memory document from older history; no-op if another worker already did."""
+    coll = _ensure_collection("conversation_memory_collection", "conversation_memory")
+    try:
+        coll.update_one({"user_id": str(user_id)}, _memory_seed(turns), upsert=True)
+    except DuplicateKeyError:
+        pass
+
+
+async def aseed_conversation_memory(user_id: Any, turns: List[List[str]]) -> None:
+    coll = _ensure_collection("async_conversation_memory_collection", "conversation_memory")
+    try:
+        await coll.update_one({"user_id": str(user_id)}, _memory_seed(turns), upsert=True)
+    except DuplicateKeyError:
+        pass
+
+
+def push_memory_turn(user_id: Any, user_message: str, assistant_response: str, keep: int) -> Dict[str, Any]:
+    """Append one turn (keeping the last `keep`) in one upsert; returns the updated document."""
+    coll = _ensure_collection("conversation_memory_collection", "conversation_memory")
+    return coll.find_one_and_update(
+        {"user_id": str(user_id)}, _memory_push(user_message, assistant_response, keep),
+        upsert=True, return_document=ReturnDocument.AFTER, projection=MEMORY_FIELDS,
+    )
+
+
+async def apush_memory_turn(user_id: Any, user_message: str, assistant_response: str,
+                            keep: int) -> Dict[str, Any]:
+    coll = _ensure_collection("async_conversation_memory_collection", "conversation_memory")
+    return await coll.find_one_and_update(
+        {"user_id": str(user_id)}, _memory_push(user_message, assistant_response, keep),
+        upsert=True, return_document=ReturnDocument.AFTER, projection=MEMORY_FIELDS,
+    )
+
+
+def set_memory_summary(user_id: Any, summary: str, summarized_through: int) -> bool:
+    """
+    Store a newer summary. Only applied when it covers more turns than the stored
+    one, so a slower worker never overwrites a fresher summary. Returns whether it was.
+    """
+    coll = _ensure_collection("conversation_memory_collection", "conversation_memory")
+    result = coll.update_one(
+        {"user_id": str(user_id), "summarized_through": {"$lt": summarized_through}},
+        {"$set": {"summary": summary, "summarized_through": summarized_through}},
+    )
+    return result.modified_count > 0
+
+
+def iter_legacy_history_users():
+    """user_ids that still have a legacy single-document history."""
+    coll = _ensure_collection("conversation_collection", "conversation_turns")
+    for doc in coll.find({"turns": {"$exists": True}}, {"user_id": 1}):
+        yield doc["user_id"]
+
+
+# ------------------------------
+# INDEXES (created at startup, see main.py lifespan)
+# ------------------------------
+# Every hot query is served by one of these; tools/check_query_plans.py
+# explains those queries and fails on any collection scan.
+
+USER_EMAIL_INDEX_NAME = "email_unique"
+PROFILE_USER_INDEX_NAME = "user_id_unique"
+MEMORY_USER_INDEX_NAME = "user_id_unique"
+
+
+def ensure_user_indexes() -> None:
+    coll = _ensure_collection("users_collection", "users")
+    # login / signup lookups; also what makes save_user's duplicate check atomic
+    coll.create_index("email", unique=True, name=USER_EMAIL_INDEX_NAME)
+
+
+def ensure_profile_indexes() -> None:
+    coll = _ensure_collection("profiles_collection", "profiles")
+    # one profile per user (save_profile upserts by user_id)
+    coll.create_index("user_id", unique=True, name=PROFILE_USER_INDEX_NAME)
+
+
+def ensure_memory_indexes() -> None:
+    coll = _ensure_collection("conversation_memory_collection", "conversation_memory")
+    # one memory document per user (push_memory_turn upserts by user_id)
+    coll.create_index("user_id", unique=True, name=MEMORY_USER_INDEX_NAME)
+
+
+def ensure_indexes() -> List[str]:
+    """
+    Create the indexes the app relies on (idempotent). A failure is logged and
+    skipped, e.g. a unique index over existing duplicates. Returns the names
+    of the index groups that could not be created (none when not connected).
+    """
+    if db is None:
         return []
-    return doc.get("turns", [])
+    failed = []
+    for name, create in [
+        ("users.email", ensure_user_indexes),
+        ("profiles.user_id", ensure_profile_indexes),
+        ("conversation_turns.user_id_timestamp", ensure_conversation_indexes),
+        ("conversation_memory.user_id", ensure_memory_indexes),
+    ]:
+        try:
+            create()
+        except Exception as e:
+            print(f"WARNING: could not create {name} index:", repr(e))
+            failed.append(name)
+    return failed
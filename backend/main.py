@@ -1,10 +1,67 @@
 # backend/main.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth, google_auth, profile, chat, history
+from fastapi.responses import JSONResponse
+from routers import auth, google_auth, profile, chat, history, stats, metrics
 from routers.agent_stream import router as agent_stream_router
+from database import (
+    start_cache_invalidation_listener,
+    ensure_indexes,
+    run_connection_monitor,
+    database_status,
+)
+from agents import groq_client
+from orchestrator import memory_store
+from orchestrator.turn_writer import turn_writer
+from utils import google_oauth, password_hash
+from config import GROQ_API_KEY, STARTUP_WARMUP
+
+# Boot does no I/O and loads no LangChain: Mongo connects from the lifespan
+# in the background, and the LLM clients are built by a background warm-up
+# (or on first use). /health/ready turns 200 once both are done.
+_llm_warm = {"ready": not STARTUP_WARMUP, "seconds": None}
+
+
+def _on_database_connected() -> None:
+    ensure_indexes()
+    # keep per-worker profile/user caches coherent across workers (opt-in)
+    if start_cache_invalidation_listener():
+        print("Profile/user cache change-stream listener started.")
+
+
+def _warm_up() -> None:
+    started = time.perf_counter()
+    try:
+        memory_store.warm_up()
+        groq_client.warm_up()
+    except Exception as e:
+        print("WARNING: LLM warm-up failed (clients will be built on first use):", repr(e))
+    _llm_warm["seconds"] = round(time.perf_counter() - started, 2)
+    _llm_warm["ready"] = True
+    try:
+        password_hash.warm_up()
+    except Exception as e:
+        print("WARNING: password hash pool warm-up failed:", repr(e))
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    monitor = asyncio.create_task(run_connection_monitor(on_connect=_on_database_connected))
+    warm_up = asyncio.create_task(asyncio.to_thread(_warm_up)) if STARTUP_WARMUP else None
+    yield
+    monitor.cancel()
+    if warm_up is not None:
+        await asyncio.gather(warm_up, return_exceptions=True)
+    # write every queued conversation turn before the worker exits
+    await asyncio.to_thread(turn_writer.stop)
+    await asyncio.to_thread(password_hash.shutdown)
+    await google_oauth.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Simplified CORS middleware - WORKING VERSION
 app.add_middleware(
@@ -21,6 +78,8 @@ app.include_router(profile.router)
 app.include_router(chat.router)
 app.include_router(history.router)
 app.include_router(google_auth.router)
+app.include_router(stats.router)
+app.include_router(metrics.router)
 # include the router object you imported above:
 app.include_router(agent_stream_router)
 
@@ -29,9 +88,22 @@ def root():
     return {"message": "Wellness AI Assistant API is running"}
 
 @app.get("/health")
+@app.get("/health/live")
 def health_check():
+    """Liveness: the process is up and serving (no dependency checks)."""
     return {"status": "healthy", "jwt": "configured"}
 
+
+@app.get("/health/ready")
+def readiness_check():
+    """Readiness: Mongo reachable and LLM clients configured and warmed up; 503 until then."""
+    database = database_status()
+    llm = {"configured": bool(GROQ_API_KEY), "warmed_up": _llm_warm["ready"],
+           "warm_up_seconds": _llm_warm["seconds"]}
+    ready = database["reachable"] and llm["configured"] and llm["warmed_up"]
+    body = {"status": "ready" if ready else "not_ready", "database": database, "llm": llm}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
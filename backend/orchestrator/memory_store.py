@@ -0,0 +1,257 @@
+# backend/orchestrator/memory_store.py
+# Bounded per-user conversation memory.
+#
+# Replaces the old module-level dict that kept one ConversationBufferMemory
+# per user forever. Users are kept in LRU order and evicted when:
+# - more than MEMORY_MAX_USERS are resident,
+# - the estimated total size exceeds MEMORY_MAX_BYTES, or
+# - they have been idle longer than MEMORY_IDLE_SECONDS.
+# An evicted user's memory is rebuilt lazily from their last
+# MEMORY_REHYDRATE_TURNS stored turns the next time they chat.
+#
+# With MEMORY_MODE=summary (default) each user's memory is a
+# RollingSummaryMemory (orchestrator/summary_memory.py): recent turns verbatim
+# plus a rolling summary, never more than MEMORY_MAX_TOKENS of history.
+# MEMORY_MODE=buffer keeps the full LangChain ConversationBufferMemory.
+#
+# MemoryStore is the in-process MemoryBackend (MEMORY_BACKEND=process).
+# MEMORY_BACKEND=mongo selects orchestrator/mongo_memory.py, which keeps the
+# rolling context in Mongo so it survives restarts and is shared by workers.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import database
+from orchestrator.turn_writer import flush_user, aflush_user
+from config import (
+    MEMORY_MAX_USERS,
+    MEMORY_MAX_BYTES,
+    MEMORY_IDLE_SECONDS,
+    MEMORY_REHYDRATE_TURNS,
+    MEMORY_MODE,
+    MEMORY_BACKEND,
+)
+from orchestrator.summary_memory import RollingSummaryMemory
+
+if TYPE_CHECKING:
+    from langchain_classic.memory import ConversationBufferMemory
+
+# Rough per-message cost of the LangChain message object on top of its text
+_MESSAGE_OVERHEAD_BYTES = 240
+
+
+class _Entry:
+    __slots__ = ("memory", "size", "last_used")
+
+    def __init__(self, memory: "ConversationBufferMemory", size: int):
+        self.memory = memory
+        self.size = size
+        self.last_used = time.monotonic()
+
+
+def _new_memory() -> "ConversationBufferMemory":
+    if MEMORY_MODE == "summary":
+        return RollingSummaryMemory()
+    # LangChain is slow to import; load it with the first conversation, not at boot
+    from langchain_classic.memory import ConversationBufferMemory
+
+    return ConversationBufferMemory(
+        return_messages=False  # we want a text 'history', not message objects
+    )
+
+
+def warm_up() -> None:
+    """Import the memory classes (and the summarizer's model) now (startup warm-up)."""
+    _new_memory()
+    if MEMORY_MODE == "summary":
+        import agents.summarizer_agent  # noqa: F401
+
+
+def _estimate_bytes(memory: "ConversationBufferMemory") -> int:
+    if isinstance(memory, RollingSummaryMemory):
+        return memory.estimated_bytes()
+    messages = memory.chat_memory.messages
+    return sum(len(str(m.content).encode("utf-8")) for m in messages) + _MESSAGE_OVERHEAD_BYTES * len(messages)
+
+
+class MemoryBackend:
+    """Where astream_query gets and updates a user's chat memory."""
+
+    name = "base"
+
+    def get(self, user_id):
+        """The user's memory (anything with load_memory_variables)."""
+        raise NotImplementedError
+
+    async def aget(self, user_id):
+        return self.get(user_id)
+
+    def save_context(self, user_id, user_message: str, assistant_response: str) -> None:
+        """Record one finished turn."""
+        raise NotImplementedError
+
+    async def asave_context(self, user_id, user_message: str, assistant_response: str) -> None:
+        self.save_context(user_id, user_message, assistant_response)
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryStore(MemoryBackend):
+    name = "process"
+
+    def __init__(self, max_users: int, max_bytes: int, idle_seconds: float, rehydrate_turns: int):
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.rehydrate_turns = rehydrate_turns
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "evicted_lru": 0,
+            "evicted_bytes": 0,
+            "evicted_idle": 0,
+            "rehydrations": 0,
+            "rehydration_errors": 0,
+        }
+
+    # -- internal helpers (call with self._lock held) -------------------
+
+    def _drop(self, user_id: str, reason: str) -> None:
+        entry = self._entries.pop(user_id)
+        self._bytes -= entry.size
+        self._stats[f"evicted_{reason}"] += 1
+
+    def _evict(self, keep: str | None = None) -> None:
+        now = time.monotonic()
+        # Oldest entries first: stop at the first one that is still fresh
+        while self._entries:
+            user_id, entry = next(iter(self._entries.items()))
+            if user_id == keep or now - entry.last_used <= self.idle_seconds:
+                break
+            self._drop(user_id, "idle")
+
+        while len(self._entries) > self.max_users:
+            user_id = next(iter(self._entries))
+            if user_id == keep:
+                break
+            self._drop(user_id, "lru")
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            user_id = next(iter(self._entries))
+            if user_id == keep:
+                break
+            self._drop(user_id, "bytes")
+
+    def _lookup(self, uid: str):
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(uid)
+                return entry.memory
+        return None
+
+    def _install(self, uid: str, memory: "ConversationBufferMemory") -> "ConversationBufferMemory":
+        with self._lock:
+            # Another request may have rehydrated the same user meanwhile; keep the first one
+            existing = self._entries.get(uid)
+            if existing is not None:
+                return existing.memory
+            entry = _Entry(memory, _estimate_bytes(memory))
+            self._entries[uid] = entry
+            self._bytes += entry.size
+            self._evict(keep=uid)
+            return memory
+
+    def _rehydrate(self, turns: list) -> "ConversationBufferMemory":
+        memory = _new_memory()
+        for turn in turns[-self.rehydrate_turns:] if self.rehydrate_turns else []:
+            memory.save_context(
+                {"input": turn.get("user_message", "")},
+                {"output": turn.get("assistant_response", "")},
+            )
+        return memory
+
+    # -- public API -----------------------------------------------------
+
+    def get(self, user_id) -> "ConversationBufferMemory":
+        """Return the user's memory, rebuilding it from stored turns if it was evicted."""
+        uid = str(user_id)
+        memory = self._lookup(uid)
+        if memory is not None:
+            return memory
+
+        try:
+            flush_user(uid)
+            turns = database.get_conversation_history(uid, limit=self.rehydrate_turns) if self.rehydrate_turns else []
+            self._stats["rehydrations"] += 1
+        except Exception:
+            turns = []
+            self._stats["rehydration_errors"] += 1
+        return self._install(uid, self._rehydrate(turns))
+
+    async def aget(self, user_id) -> "ConversationBufferMemory":
+        """Async version of get (Motor for the rehydration read)."""
+        uid = str(user_id)
+        memory = self._lookup(uid)
+        if memory is not None:
+            return memory
+
+        try:
+            await aflush_user(uid)
+            turns = await database.aget_conversation_history(uid, limit=self.rehydrate_turns) if self.rehydrate_turns else []
+            self._stats["rehydrations"] += 1
+        except Exception:
+            turns = []
+            self._stats["rehydration_errors"] += 1
+        return self._install(uid, self._rehydrate(turns))
+
+    def save_context(self, user_id, user_message: str, assistant_response: str) -> None:
+        """Append one turn and re-account its size. No-op if the user was evicted meanwhile."""
+        uid = str(user_id)
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is None:
+                # The turn is persisted by record_turn and comes back on rehydration
+                return
+            entry.memory.save_context({"input": user_message}, {"output": assistant_response})
+            new_size = _estimate_bytes(entry.memory)
+            self._bytes += new_size - entry.size
+            entry.size = new_size
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(uid)
+            self._evict(keep=uid)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["resident_users"] = len(self._entries)
+            stats["estimated_bytes"] = self._bytes
+        stats["backend"] = self.name
+        stats["mode"] = MEMORY_MODE
+        stats["max_users"] = self.max_users
+        stats["max_bytes"] = self.max_bytes
+        stats["idle_seconds"] = self.idle_seconds
+        return stats
+
+
+def create_backend(name: str = MEMORY_BACKEND) -> MemoryBackend:
+    if name == "mongo":
+        from orchestrator.mongo_memory import MongoMemoryBackend
+
+        return MongoMemoryBackend(rehydrate_turns=MEMORY_REHYDRATE_TURNS)
+    if name != "process":
+        print(f"WARNING: unknown MEMORY_BACKEND {name!r}; using the in-process store.")
+    return MemoryStore(
+        max_users=MEMORY_MAX_USERS,
+        max_bytes=MEMORY_MAX_BYTES,
+        idle_seconds=MEMORY_IDLE_SECONDS,
+        rehydrate_turns=MEMORY_REHYDRATE_TURNS,
+    )
+
+
+memory_store = create_backend()
@@ -0,0 +1,160 @@
+# backend/orchestrator/mongo_memory.py
+# Conversation memory kept in Mongo (MEMORY_BACKEND=mongo).
+#
+# The in-process MemoryStore is lost on every restart, and under
+# `uvicorn --workers N` a user's consecutive turns land on workers holding
+# different memories. This backend keeps each user's rolling context (summary
+# + the last few turns, see orchestrator/summary_memory.py) in one small
+# conversation_memory document that every worker reads and writes:
+# - get / aget: one find_one on the unique user_id index, rebuilt into a
+#   RollingSummaryMemory for this request
+# - save_context / asave_context: one find_one_and_update upsert that pushes
+#   the turn (capped with $slice) and returns the document; a due summary batch
+#   is scheduled on the summary workers straight from that document
+# - a finished summary is stored only if it covers more turns than the stored
+#   one, so workers racing on the same user never move it backwards
+# Users without a document yet are seeded once from conversation_turns.
+import threading
+from functools import partial
+
+import database
+from config import MEMORY_RECENT_TURNS
+from orchestrator.memory_store import MemoryBackend
+from orchestrator.summary_memory import RollingSummaryMemory, MAX_UNSUMMARIZED_TURNS
+from orchestrator.turn_writer import flush_user, aflush_user
+from utils.ttl_cache import TTLCache
+
+# turns kept in the document: the verbatim window + what may wait for the summarizer
+KEEP_TURNS = MEMORY_RECENT_TURNS + MAX_UNSUMMARIZED_TURNS
+# one summary job per user per worker; a job that failed is retried after this
+SUMMARY_RETRY_SECONDS = 60
+
+
+def _pairs(turns: list) -> list:
+    return [[t.get("user_message", ""), t.get("assistant_response", "")] for t in turns]
+
+
+class MongoMemoryBackend(MemoryBackend):
+    name = "mongo"
+
+    def __init__(self, rehydrate_turns: int, keep_turns: int = KEEP_TURNS):
+        self.rehydrate_turns = rehydrate_turns
+        self.keep_turns = keep_turns
+        self._summarizing = TTLCache(maxsize=100_000, ttl=SUMMARY_RETRY_SECONDS)
+        self._lock = threading.Lock()
+        self._stats = {
+            "loads": 0,
+            "saves": 0,
+            "seeded": 0,
+            "summaries_stored": 0,
+            "summaries_stale": 0,
+            "errors": 0,
+        }
+
+    # -- document <-> memory --------------------------------------------
+
+    def _memory(self, uid: str, doc: dict | None) -> RollingSummaryMemory:
+        on_summary = partial(self._store_summary, uid)
+        if not doc:
+            return RollingSummaryMemory(on_summary=on_summary)
+        turns = doc.get("turns", [])
+        # conversation position of turns[0]; anything before it is in the summary
+        # (or, if the summarizer was down that long, dropped from the context)
+        first = doc.get("turn_count", len(turns)) - len(turns)
+        through = doc.get("summarized_through", 0)
+        pending = turns[max(0, through - first):]
+        return RollingSummaryMemory.from_state(
+            doc.get("summary", ""), pending, max(through, first), on_summary=on_summary
+        )
+
+    def _seed_doc(self, turns: list) -> dict | None:
+        turns = _pairs(turns)[-self.keep_turns:]
+        if not turns:
+            return None
+        self._stats["seeded"] += 1
+        return {"summary": "", "summarized_through": 0, "turn_count": len(turns), "turns": turns}
+
+    def _failed(self, what: str, uid: str, e: Exception) -> None:
+        print(f"WARNING: conversation memory {what} failed for user {uid}:", repr(e))
+        self._stats["errors"] += 1
+
+    # -- summaries ------------------------------------------------------
+
+    def _maybe_summarize(self, uid: str, doc: dict) -> None:
+        with self._lock:
+            if self._summarizing.peek(uid) is not None:
+                return
+            self._summarizing.set(uid, True)
+        if not self._memory(uid, doc).schedule_summary():
+            self._summarizing.pop(uid)
+
+    def _store_summary(self, uid: str, summary: str, summarized_through: int) -> None:
+        # runs on a summary worker thread
+        try:
+            stored = database.set_memory_summary(uid, summary, summarized_through)
+            self._stats["summaries_stored" if stored else "summaries_stale"] += 1
+        except Exception as e:
+            self._failed("summary write", uid, e)
+        finally:
+            self._summarizing.pop(uid)
+
+    # -- MemoryBackend ----------------------------------------------------
+
+    def get(self, user_id) -> RollingSummaryMemory:
+        uid = str(user_id)
+        try:
+            doc = database.get_conversation_memory(uid)
+            if doc is None and self.rehydrate_turns:
+                flush_user(uid)
+                doc = self._seed_doc(database.get_conversation_history(uid, limit=self.rehydrate_turns))
+                if doc:
+                    database.seed_conversation_memory(uid, doc["turns"])
+            self._stats["loads"] += 1
+        except Exception as e:
+            self._failed("read", uid, e)
+            doc = None
+        return self._memory(uid, doc)
+
+    async def aget(self, user_id) -> RollingSummaryMemory:
+        uid = str(user_id)
+        try:
+            doc = await database.aget_conversation_memory(uid)
+            if doc is None and self.rehydrate_turns:
+                await aflush_user(uid)
+                doc = self._seed_doc(await database.aget_conversation_history(uid, limit=self.rehydrate_turns))
+                if doc:
+                    await database.aseed_conversation_memory(uid, doc["turns"])
+            self._stats["loads"] += 1
+        except Exception as e:
+            self._failed("read", uid, e)
+            doc = None
+        return self._memory(uid, doc)
+
+    def save_context(self, user_id, user_message: str, assistant_response: str) -> None:
+        uid = str(user_id)
+        try:
+            doc = database.push_memory_turn(uid, user_message, assistant_response, self.keep_turns)
+            self._stats["saves"] += 1
+        except Exception as e:
+            # the turn itself is still persisted by record_turn
+            self._failed("write", uid, e)
+            return
+        self._maybe_summarize(uid, doc)
+
+    async def asave_context(self, user_id, user_message: str, assistant_response: str) -> None:
+        uid = str(user_id)
+        try:
+            doc = await database.apush_memory_turn(uid, user_message, assistant_response, self.keep_turns)
+            self._stats["saves"] += 1
+        except Exception as e:
+            self._failed("write", uid, e)
+            return
+        self._maybe_summarize(uid, doc)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "backend": self.name,
+            "summaries_in_flight": len(self._summarizing),
+            "keep_turns": self.keep_turns,
+        }
@@ -1,136 +1,452 @@
 # backend/orchestrator/orchestrator.py
 
-from typing import Dict
-from langchain_classic.memory import ConversationBufferMemory
-from agents.intention_classifier import classify_intent
-from agents.supervisor_agent import supervisor
-from agents.symptom_agent import run_symptom_agent
-from agents.diet_agent import run_diet_agent
-from agents.fitness_agent import run_fitness_agent
-from agents.lifestyle_agent import run_lifestyle_agent
+import asyncio
+import time
+from collections import deque
+from agents.intention_classifier import aclassify_intent
+from agents.supervisor_agent import asupervisor, aplan_agents
+from agents.symptom_agent import arun_symptom_agent, astream_symptom_agent
+from agents.diet_agent import arun_diet_agent, astream_diet_agent
+from agents.fitness_agent import arun_fitness_agent, astream_fitness_agent
+from agents.lifestyle_agent import arun_lifestyle_agent, astream_lifestyle_agent
 from agents.output_synthesizer import synthesize_output
-from database import get_profile, append_conversation_turn
+from agents.router import route
+from agents.resilience import begin_turn
+from orchestrator import response_cache, singleflight
+from orchestrator.memory_store import memory_store
+from orchestrator.turn_index import turn_index, render_turns
+from config import ORCHESTRATION_MODE, TURN_INDEX_ENABLED
+from utils.metrics import Histogram
+from orchestrator.turn_writer import arecord_turn
+from database import aget_profile
 
 
 # -------------------------------------------------------------------
-# OFFICIAL CHAT MEMORY (LangChain ConversationBufferMemory per user)
+# OFFICIAL CHAT MEMORY (one memory per user)
 # -------------------------------------------------------------------
+# Served by the MEMORY_BACKEND chosen in orchestrator/memory_store.py: a
+# bounded, evicting in-process store (evicted users are rebuilt from their
+# stored turns on their next message) or one Mongo document per user shared
+# by all workers (orchestrator/mongo_memory.py).
 
-_memory_store: Dict[int, ConversationBufferMemory] = {}
+NON_WELLNESS_RESPONSE = (
+    "This message is not related to wellness. "
+    "I only help with basic health, diet, fitness and lifestyle tips."
+)
 
+MAX_STEPS = 8  # safety cap so we never loop forever
 
-def get_memory(user_id: int) -> ConversationBufferMemory:
+# "step": supervisor picks ONE agent per LLM call, agents run one after another
+# "plan": supervisor picks ALL agents in one call, agents run concurrently
+ORCHESTRATION_MODES = ("step", "plan")
+
+# Which state key each agent writes its output to (read by synthesize_output)
+AGENT_STATE_KEYS = {
+    "SymptomAgent": "symptoms",
+    "DietAgent": "diet",
+    "FitnessAgent": "fitness",
+    "LifestyleAgent": "lifestyle",
+}
+
+MAX_STEPS_NOTE = "The orchestration reached the maximum number of steps and was finished automatically."
+
+# Shown when LLM calls failed or timed out and no agent produced anything
+DEGRADED_RESPONSE = (
+    "Sorry, I'm having trouble generating advice right now. "
+    "Please try again in a moment."
+)
+
+
+# Turns handled since start (denominator for the per-turn numbers on /stats)
+_turn_count = 0
+# Recent time-to-first-token samples (ms) from streamed turns
+_ttft_samples: deque = deque(maxlen=1000)
+
+
+# Prometheus metrics (GET /metrics)
+STAGE_SECONDS = Histogram(
+    "wellness_stage_duration_seconds", "Time spent in each stage of a chat turn", ["stage"]
+)
+TURN_SECONDS = Histogram(
+    "wellness_turn_duration_seconds", "End-to-end chat turn time by how the turn ended",
+    ["mode", "outcome"],
+)
+SUPERVISOR_ITERATIONS = Histogram(
+    "wellness_supervisor_iterations", "Supervisor LLM decisions per step-mode turn",
+    buckets=tuple(range(1, MAX_STEPS + 1)),
+)
+AGENTS_PER_TURN = Histogram(
+    "wellness_agents_per_turn", "Agents run per answered turn", buckets=(0, 1, 2, 3, 4),
+)
+
+# stage label for each agent's arun_* / astream_* call
+AGENT_STAGES = {
+    "SymptomAgent": "symptom_agent",
+    "DietAgent": "diet_agent",
+    "FitnessAgent": "fitness_agent",
+    "LifestyleAgent": "lifestyle_agent",
+}
+
+
+def _stage(name: str):
+    """Context manager timing one stage into STAGE_SECONDS."""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def _observe_turn(mode: str, outcome: str, started: float, agents_used: list[str] | None = None) -> None:
+    TURN_SECONDS.labels(mode, outcome).observe(time.perf_counter() - started)
+    if agents_used is not None:
+        AGENTS_PER_TURN.observe(len(agents_used))
+
+
+def _percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def orchestrator_stats() -> dict:
+    samples = list(_ttft_samples)
+    return {
+        "turns": _turn_count,
+        "ttft_ms_p50": round(_percentile(samples, 50), 1),
+        "ttft_ms_p95": round(_percentile(samples, 95), 1),
+        "ttft_samples": len(samples),
+    }
+
+
+def _resolve_mode(mode: str | None) -> str:
+    mode = mode or ORCHESTRATION_MODE
+    if mode not in ORCHESTRATION_MODES:
+        raise ValueError(f"Unknown orchestration mode: {mode!r}")
+    return mode
+
+
+# -------------------------------------------------------------------
+# AGENT DISPATCH
+# -------------------------------------------------------------------
+
+async def _arun_agent(name: str, message: str, profile: dict, state: dict) -> str:
+    with _stage(AGENT_STAGES[name]):
+        return await _adispatch_agent(name, message, profile, state)
+
+
+async def _adispatch_agent(name: str, message: str, profile: dict, state: dict) -> str:
+    if name == "SymptomAgent":
+        return await arun_symptom_agent(message, profile, state)
+    if name == "DietAgent":
+        return await arun_diet_agent(state, profile)
+    if name == "FitnessAgent":
+        return await arun_fitness_agent(state, profile)
+    return await arun_lifestyle_agent(message, profile, state)
+
+
+# -------------------------------------------------------------------
+# MAIN ORCHESTRATION FUNCTION
+# -------------------------------------------------------------------
+
+def process_query(user_id: int, message: str, mode: str | None = None,
+                  idempotency_key: str | None = None):
     """
-    Get or create a LangChain ConversationBufferMemory instance for this user.
-    This is the ONLY chat memory used by the LLM for context.
+    Blocking aprocess_query for benchmarks and one-off scripts: one event loop
+    per call. The app itself only uses the async pipeline below. Never call it
+    from a running event loop. The shared async HTTP clients keep connections
+    from the first loop, so against the real provider, run many turns under
+    one asyncio.run instead.
     """
-    if user_id not in _memory_store:
-        _memory_store[user_id] = ConversationBufferMemory(
-            return_messages=False  # we want a text 'history', not message objects
-        )
-    return _memory_store[user_id]
+    return asyncio.run(aprocess_query(user_id, message, mode=mode, idempotency_key=idempotency_key))
 
 
 # -------------------------------------------------------------------
-# MAIN ORCHESTRATION FUNCTION
+# ORCHESTRATION (event stream; used by /chat and /ws/process-query)
 # -------------------------------------------------------------------
+# astream_query yields plain dict events as the turn progresses:
+#   {"type": "intent", "is_wellness": bool}
+#   {"type": "supervisor", "next_agent": str}            step mode, per step
+#   {"type": "plan", "agents": [...], "source": str}     router or plan mode
+#   {"type": "agent_start", "agent": str}
+#   {"type": "token", "agent": str, "text": str}         only with stream_tokens
+#   {"type": "agent_end", "agent": str, "text": str}
+#   {"type": "final", "answer": str, "agents_used": [...], "cached": bool, "degraded": bool,
+#    "llm_calls": int, "ttft_ms": float, "total_ms": float}
+
+def _astream_agent(name: str, message: str, profile: dict, state: dict):
+    if name == "SymptomAgent":
+        return astream_symptom_agent(message, profile, state)
+    if name == "DietAgent":
+        return astream_diet_agent(state, profile)
+    if name == "FitnessAgent":
+        return astream_fitness_agent(state, profile)
+    return astream_lifestyle_agent(message, profile, state)
+
+
+async def _agent_events(name: str, message: str, profile: dict, state: dict, stream_tokens: bool):
+    """Run one agent, store its output in state, and describe it as events."""
+    yield {"type": "agent_start", "agent": name}
+    if stream_tokens:
+        started = time.perf_counter()
+        parts: list[str] = []
+        async for text in _astream_agent(name, message, profile, state):
+            parts.append(text)
+            yield {"type": "token", "agent": name, "text": text}
+        result = "".join(parts).strip()
+        STAGE_SECONDS.labels(AGENT_STAGES[name]).observe(time.perf_counter() - started)
+    else:
+        result = await _arun_agent(name, message, profile, state)
+    state[AGENT_STATE_KEYS[name]] = result
+    yield {"type": "agent_end", "agent": name, "text": result}
 
-def process_query(user_id: int, message: str):
+
+async def _merge_events(generators):
+    """Interleave several async event generators as their events arrive."""
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump(gen):
+        try:
+            async for event in gen:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(done)
+
+    tasks = [asyncio.create_task(pump(gen)) for gen in generators]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _astream_orchestrate(mode: str, message: str, profile: dict, state: dict,
+                               agents_used: list[str], stream_tokens: bool):
+    """
+    Pick and run agents for one turn, as events (fills agents_used in place).
+    A confident local router decision replaces every supervisor LLM call;
+    otherwise the supervisor LLM drives the turn in the requested mode.
+    """
+    decision = route(message, profile, state)
+    # who picked the agents; tools/train_router.py only learns from "supervisor"
+    state["routing_source"] = decision.source if decision is not None else "supervisor"
+    if decision is not None:
+        plan, parallel = decision.agents, mode == "plan"
+        yield {"type": "plan", "agents": plan, "source": decision.source}
+    elif mode == "plan":
+        with _stage("planner"):
+            plan, parallel = await aplan_agents(message, profile, state), True
+        yield {"type": "plan", "agents": plan, "source": "supervisor"}
+    else:
+        for step in range(MAX_STEPS):
+            with _stage("supervisor"):
+                next_agent = await asupervisor(message, profile, state)
+            yield {"type": "supervisor", "next_agent": next_agent}
+
+            if next_agent == "FINISH" or next_agent in agents_used or next_agent not in AGENT_STATE_KEYS:
+                break
+
+            agents_used.append(next_agent)
+            async for event in _agent_events(next_agent, message, profile, state, stream_tokens):
+                yield event
+        else:
+            state["note"] = MAX_STEPS_NOTE
+        SUPERVISOR_ITERATIONS.observe(step + 1)
+        return
+
+    agents_used.extend(plan)
+    if parallel:
+        # Every agent sees the same pre-agent state; outputs are merged afterwards
+        generators = [_agent_events(name, message, profile, state, stream_tokens) for name in plan]
+        async for event in _merge_events(generators):
+            yield event
+    else:
+        for name in plan:
+            async for event in _agent_events(name, message, profile, state, stream_tokens):
+                yield event
+
+
+async def astream_query(user_id: int, message: str, mode: str | None = None,
+                        stream_tokens: bool = True, idempotency_key: str | None = None):
+    """
+    Events for one chat message (see _astream_query). An identical
+    (user_id, message) already being answered is joined instead of run twice:
+    the duplicate replays its events so far and then follows it. A known
+    idempotency_key replays its stored result.
+    """
+    mode = _resolve_mode(mode)
+    replay = singleflight.completed_result(user_id, idempotency_key)
+    if replay is not None:
+        answer, agents_used = replay
+        yield {
+            "type": "final",
+            "answer": answer,
+            "agents_used": agents_used,
+            "cached": True,
+            "degraded": False,
+            "llm_calls": 0,
+            "ttft_ms": 0.0,
+            "total_ms": 0.0,
+        }
+        return
+
+    key = singleflight.flight_key(user_id, message, mode, idempotency_key)
+    start = lambda: _astream_query(user_id, message, mode, stream_tokens)
+    async for event in singleflight.astream(key, user_id, idempotency_key, start):
+        # the running turn may stream tokens even if this caller does not want them
+        if event["type"] == "token" and not stream_tokens:
+            continue
+        yield event
+
+
+async def _astream_query(user_id: int, message: str, mode: str, stream_tokens: bool = True):
     """
-    Main orchestration function:
+    Main orchestration, as a stream of events (see above):
     - Loads user profile
-    - Uses LangChain ConversationBufferMemory for chat context
+    - Retrieves older turns relevant to the message (orchestrator/turn_index.py)
+    - Returns a cached answer for a repeated question with the same relevant profile,
+      unless retrieved turns make the answer specific to this user
+    - Uses the per-user chat memory (orchestrator/memory_store.py) for context
     - Classifies intent
-    - Uses supervisor LLM to decide which agent to run next
-    - Stops when supervisor says FINISH or when max_steps is reached
+    - Asks the local router first; a confident decision skips the supervisor LLM
+    - mode="step": supervisor LLM decides which agent to run next, one at a time,
+      until it says FINISH or MAX_STEPS is reached
+    - mode="plan": supervisor LLM returns all agents at once and they run concurrently
     - Logs each turn for /history API (user_message, assistant_response, agents_used)
+    Every LLM call is awaited (ainvoke / astream) and every Mongo call goes
+    through Motor, so a single worker can keep many conversations in flight
+    while waiting on Groq. The last event is always {"type": "final", ...}.
     """
+    global _turn_count
+    _turn_count += 1
+    turn = begin_turn()
+    started = time.perf_counter()
+
+    def final_event(answer: str, agents: list[str], cached: bool, ttft: float | None,
+                    outcome: str) -> dict:
+        _observe_turn(mode, outcome, started, agents if outcome in ("answered", "degraded") else None)
+        total_ms = (time.perf_counter() - started) * 1000
+        ttft_ms = ttft if ttft is not None else total_ms
+        if stream_tokens:
+            _ttft_samples.append(ttft_ms)
+        return {
+            "type": "final",
+            "answer": answer,
+            "agents_used": agents,
+            "cached": cached,
+            "degraded": turn.degraded,
+            "llm_calls": turn.llm_calls,
+            "ttft_ms": round(ttft_ms, 1),
+            "total_ms": round(total_ms, 1),
+        }
 
     # 1) Load user profile (long-term memory)
-    profile = get_profile(user_id)
+    with _stage("profile"):
+        profile = await aget_profile(user_id)
+
+    # Older turns relevant to this message; a personalised answer bypasses the shared cache
+    with _stage("recall"):
+        relevant = await turn_index.asearch(user_id, message) if TURN_INDEX_ENABLED else []
+
+    # Response cache: same question + same relevant profile fields → reuse the answer
+    cache_entry = None if relevant else response_cache.cache_key(message, profile, mode)
+    cached = await response_cache.aget(cache_entry) if cache_entry else None
+    if cached is not None:
+        response_text, agents_used = cached
+        await memory_store.asave_context(user_id, message, response_text)
+        with _stage("persist"):
+            await arecord_turn(
+                user_id=user_id,
+                user_message=message,
+                assistant_response=response_text,
+                agents_used=agents_used,
+                decided_by={"intent": "cache", "routing": "cache"},
+            )
+        yield final_event(response_text, agents_used, True, None, "cached")
+        return
 
     # 2) Get LangChain memory for this user (short-term conversation memory)
-    memory = get_memory(user_id)
+    with _stage("memory"):
+        memory = await memory_store.aget(user_id)
     memory_vars = memory.load_memory_variables({})
     chat_history = memory_vars.get("history", "No previous conversation yet.")
 
     # 3) Intention classification
-    intent = classify_intent(message)
+    with _stage("intent"):
+        intent = await aclassify_intent(message)
     is_wellness = intent.get("is_wellness", True)
+    decided_by = {"intent": intent.get("source", "llm")}
+    yield {"type": "intent", "is_wellness": is_wellness}
 
     if not is_wellness:
-        response_text = (
-            "This message is not related to wellness. "
-            "I only help with basic health, diet, fitness and lifestyle tips."
-        )
-
-        # Save to LangChain memory so context is preserved
-        memory.save_context({"input": message}, {"output": response_text})
-
-        # Also log this turn for /history API (for Postman/debugging)
-        append_conversation_turn(
-            user_id=user_id,
-            user_message=message,
-            assistant_response=response_text,
-            agents_used=[],
-        )
-
-        return response_text, []
+        response_text = NON_WELLNESS_RESPONSE
+        await memory_store.asave_context(user_id, message, response_text)
+        with _stage("persist"):
+            await arecord_turn(
+                user_id=user_id,
+                user_message=message,
+                assistant_response=response_text,
+                agents_used=[],
+                decided_by=decided_by,
+            )
+        yield final_event(response_text, [], False, None, "non_wellness")
+        return
 
     # 4) Orchestration state passed to supervisor & agents
     state: dict = {
         "intent": intent,
-        "conversation_history": chat_history,  # comes from ConversationBufferMemory
+        "user_message": message,
+        "conversation_history": chat_history,
+        "relevant_turns": render_turns(relevant),
     }
     agents_used: list[str] = []
+    ttft = None
 
-    max_steps = 8  # safety cap so we never loop forever
-
-    for step in range(max_steps):
-        # Ask supervisor what to do next, with full context
-        next_agent = supervisor(message, profile, state)
-
-        # If supervisor decides we're done, break loop
-        if next_agent == "FINISH":
-            break
-
-        # Avoid calling the same agent multiple times in one turn
-        if next_agent in agents_used:
-            break
-
-        agents_used.append(next_agent)
+    async for event in _astream_orchestrate(mode, message, profile, state, agents_used, stream_tokens):
+        if ttft is None and event["type"] == "token":
+            ttft = (time.perf_counter() - started) * 1000
+        yield event
 
-        # Call the selected agent
-        if next_agent == "SymptomAgent":
-            state["symptoms"] = run_symptom_agent(message, profile)
+    decided_by["routing"] = state["routing_source"]
 
-        elif next_agent == "DietAgent":
-            state["diet"] = run_diet_agent(state, profile)
+    # 5) Final synthesis (pure string formatting, no I/O)
+    with _stage("synthesis"):
+        final_response = synthesize_output(state) or DEGRADED_RESPONSE
 
-        elif next_agent == "FitnessAgent":
-            state["fitness"] = run_fitness_agent(state, profile)
+    # 6) Save to LangChain memory
+    await memory_store.asave_context(user_id, message, final_response)
 
-        elif next_agent == "LifestyleAgent":
-            state["lifestyle"] = run_lifestyle_agent(state, profile)
-
-    else:
-        # If we exit the for-loop without break → supervisor never said FINISH
-        state["note"] = (
-            "The orchestration reached the maximum number of steps and was finished automatically."
+    # 7) Log this turn for /history API
+    with _stage("persist"):
+        await arecord_turn(
+            user_id=user_id,
+            user_message=message,
+            assistant_response=final_response,
+            agents_used=agents_used,
+            decided_by=decided_by,
         )
 
-    # 5) Final synthesis of all agent outputs
-    final_response = synthesize_output(state)
+    if cache_entry and not turn.degraded:
+        await response_cache.aput(cache_entry, final_response, agents_used)
 
-    # 6) Save to LangChain ConversationBufferMemory (this is the REAL chat memory)
-    memory.save_context({"input": message}, {"output": final_response})
+    outcome = "degraded" if turn.degraded else "answered"
+    yield final_event(final_response, agents_used, False, ttft, outcome)
 
-    # 7) Also log this turn for /history API (metadata: timestamp, agents_used)
-    append_conversation_turn(
-        user_id=user_id,
-        user_message=message,
-        assistant_response=final_response,
-        agents_used=agents_used,
-    )
 
-    return final_response, agents_used
+async def aprocess_query(user_id: int, message: str, mode: str | None = None,
+                         idempotency_key: str | None = None):
+    """Async process_query: run astream_query without token streaming, return (answer, agents_used)."""
+    result = None
+    async for event in astream_query(user_id, message, mode=mode, stream_tokens=False,
+                                     idempotency_key=idempotency_key):
+        if event["type"] == "final":
+            result = event["answer"], event["agents_used"]
+    return result
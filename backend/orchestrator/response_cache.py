@@ -0,0 +1,168 @@
+# backend/orchestrator/response_cache.py
+# Profile-aware response cache in front of the orchestrator (astream_query).
+#
+# Key = normalized message + fingerprint of the profile fields the agents
+# actually use + orchestration mode. Two users with the same relevant profile
+# asking the same question share one answer.
+#
+# Tier 1: in-process LRU + TTL (utils.ttl_cache.TTLCache)
+# Tier 2: optional Mongo collection shared by all workers (RESPONSE_CACHE_MONGO)
+
+import hashlib
+import json
+import re
+import threading
+from typing import Optional
+
+import database
+from config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MONGO,
+    RESPONSE_CACHE_MIN_WORDS,
+)
+from utils.ttl_cache import TTLCache
+
+PROFILE_FINGERPRINT_FIELDS = (
+    "age",
+    "weight_kg",
+    "height_cm",
+    "diet_type",
+    "activity_level",
+    "health_conditions",
+)
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+_local = TTLCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+_lock = threading.Lock()
+_stats = {"shared_hits": 0, "shared_misses": 0, "shared_errors": 0}
+_shared_ready = False
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation, collapse whitespace."""
+    text = _PUNCT_RE.sub(" ", (message or "").lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def profile_fingerprint(profile: dict | None) -> str:
+    relevant = {field: (profile or {}).get(field) for field in PROFILE_FINGERPRINT_FIELDS}
+    raw = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(message: str, profile: dict | None, mode: str) -> Optional[tuple[str, str]]:
+    """
+    Return (key, fingerprint), or None when this message should not be cached.
+    Very short messages ("and dinner?") depend on the conversation, so they skip the cache.
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    normalized = normalize_message(message)
+    if len(normalized.split()) < RESPONSE_CACHE_MIN_WORDS:
+        return None
+    fingerprint = profile_fingerprint(profile)
+    digest = hashlib.sha1(f"{mode}|{fingerprint}|{normalized}".encode("utf-8")).hexdigest()
+    return digest, fingerprint
+
+
+def _record(counter: str) -> None:
+    with _lock:
+        _stats[counter] += 1
+
+
+def _shared_enabled() -> bool:
+    global _shared_ready
+    if not RESPONSE_CACHE_MONGO:
+        return False
+    if not _shared_ready:
+        try:
+            database.ensure_response_cache_indexes(RESPONSE_CACHE_TTL_SECONDS)
+            _shared_ready = True
+        except Exception as e:
+            print("WARNING: shared response cache unavailable:", repr(e))
+            _record("shared_errors")
+            return False
+    return True
+
+
+def get(cache_entry: Optional[tuple[str, str]]):
+    """Return (response, agents_used) or None."""
+    if cache_entry is None:
+        return None
+    key, fingerprint = cache_entry
+    hit = _local.get(key)
+    if hit is not None:
+        return hit[1], hit[2]
+
+    if _shared_enabled():
+        try:
+            doc = database.get_cached_response(key)
+        except Exception:
+            _record("shared_errors")
+            return None
+        if doc:
+            _record("shared_hits")
+            _local.set(key, (fingerprint, doc["response"], doc["agents_used"]))
+            return doc["response"], doc["agents_used"]
+        _record("shared_misses")
+    return None
+
+
+async def aget(cache_entry: Optional[tuple[str, str]]):
+    """Async version of get (Motor for the shared tier)."""
+    if cache_entry is None:
+        return None
+    key, fingerprint = cache_entry
+    hit = _local.get(key)
+    if hit is not None:
+        return hit[1], hit[2]
+
+    if _shared_enabled():
+        try:
+            doc = await database.aget_cached_response(key)
+        except Exception:
+            _record("shared_errors")
+            return None
+        if doc:
+            _record("shared_hits")
+            _local.set(key, (fingerprint, doc["response"], doc["agents_used"]))
+            return doc["response"], doc["agents_used"]
+        _record("shared_misses")
+    return None
+
+
+def put(cache_entry: Optional[tuple[str, str]], response: str, agents_used: list[str]) -> None:
+    if cache_entry is None:
+        return
+    key, fingerprint = cache_entry
+    _local.set(key, (fingerprint, response, list(agents_used)))
+    if _shared_enabled():
+        try:
+            database.set_cached_response(key, fingerprint, response, list(agents_used))
+        except Exception:
+            _record("shared_errors")
+
+
+async def aput(cache_entry: Optional[tuple[str, str]], response: str, agents_used: list[str]) -> None:
+    if cache_entry is None:
+        return
+    key, fingerprint = cache_entry
+    _local.set(key, (fingerprint, response, list(agents_used)))
+    if _shared_enabled():
+        try:
+            await database.aset_cached_response(key, fingerprint, response, list(agents_used))
+        except Exception:
+            _record("shared_errors")
+
+
+def response_cache_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+    stats.update(_local.stats())
+    stats["enabled"] = RESPONSE_CACHE_ENABLED
+    stats["shared_tier"] = RESPONSE_CACHE_MONGO
+    return stats
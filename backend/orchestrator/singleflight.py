@@ -0,0 +1,149 @@
+# backend/orchestrator/singleflight.py
+# In-flight coalescing of identical chat requests, plus idempotency keys.
+#
+# A double-click, client retry or websocket reconnect often re-sends the same
+# (user_id, message) while the first turn is still running. Instead of running
+# the whole LLM chain (and appending a duplicate turn) again, the duplicate
+# attaches to the running turn and gets the same events / result.
+# A client-supplied idempotency key identifies a request explicitly; its
+# completed result is kept for IDEMPOTENCY_TTL_SECONDS and replayed.
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Optional
+
+from config import SINGLEFLIGHT_ENABLED, IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS
+from orchestrator.response_cache import normalize_message
+from utils.ttl_cache import TTLCache
+
+_END = object()
+
+# completed results by (user_id, idempotency key): (answer, agents_used)
+_completed = TTLCache(IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "flights": 0,               # turns actually computed through here
+    "coalesced": 0,             # duplicates that joined a running turn
+    "idempotent_replays": 0,    # completed results returned for a known key
+    "llm_calls_avoided": 0,     # LLM requests the duplicates would have made
+    "duplicate_turns_avoided": 0,
+}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def flight_key(user_id, message: str, mode: str, idempotency_key: Optional[str]) -> tuple:
+    if idempotency_key:
+        return ("key", str(user_id), idempotency_key)
+    return ("msg", str(user_id), mode, normalize_message(message))
+
+
+def completed_result(user_id, idempotency_key: Optional[str]):
+    """(answer, agents_used) stored for this key, or None."""
+    if not idempotency_key:
+        return None
+    result = _completed.get((str(user_id), idempotency_key))
+    if result is not None:
+        _count("idempotent_replays")
+    return result
+
+
+def _remember(user_id, idempotency_key: Optional[str], answer: str, agents_used: list[str]) -> None:
+    if idempotency_key:
+        _completed.set((str(user_id), idempotency_key), (answer, agents_used))
+
+
+def _count_duplicate(llm_calls: int) -> None:
+    with _stats_lock:
+        _stats["coalesced"] += 1
+        _stats["duplicate_turns_avoided"] += 1
+        _stats["llm_calls_avoided"] += llm_calls
+
+
+# -------------------------------------------------------------------
+# FLIGHTS (astream_query): duplicates replay + follow the running event stream
+# -------------------------------------------------------------------
+
+class _Flight:
+    """
+    One running astream_query shared by every subscriber with the same key.
+    Events are kept so late joiners replay what they missed. The turn is
+    cancelled only when its last subscriber goes away (client disconnect).
+    """
+
+    def __init__(self, key: tuple, source: AsyncIterator[dict], user_id, idempotency_key):
+        self.key = key
+        self.user_id = user_id
+        self.idempotency_key = idempotency_key
+        self.history: list = []
+        self.subscribers: set[asyncio.Queue] = set()
+        self.task = asyncio.ensure_future(self._run(source))
+
+    def _publish(self, item) -> None:
+        self.history.append(item)
+        for queue in self.subscribers:
+            queue.put_nowait(item)
+
+    async def _run(self, source: AsyncIterator[dict]) -> None:
+        try:
+            async for event in source:
+                if event["type"] == "final" and not event.get("degraded"):
+                    _remember(self.user_id, self.idempotency_key, event["answer"], event["agents_used"])
+                self._publish(event)
+        except Exception as e:
+            self._publish(e)
+        finally:
+            _async_flights.pop(self.key, None)
+            self._publish(_END)
+
+    async def subscribe(self, duplicate: bool):
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in self.history:
+            queue.put_nowait(item)
+        self.subscribers.add(queue)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                if duplicate and item["type"] == "final":
+                    _count_duplicate(item.get("llm_calls", 0))
+                yield item
+        finally:
+            self.subscribers.discard(queue)
+            if not self.subscribers and not self.task.done():
+                self.task.cancel()
+
+
+_async_flights: dict[tuple, _Flight] = {}
+
+
+async def astream(key: tuple, user_id, idempotency_key: Optional[str],
+                  start: Callable[[], AsyncIterator[dict]]):
+    """Yield the events of the turn for `key`, starting it only if none is running."""
+    if not SINGLEFLIGHT_ENABLED:
+        async for event in start():
+            yield event
+        return
+
+    flight = _async_flights.get(key)
+    duplicate = flight is not None
+    if not duplicate:
+        flight = _async_flights[key] = _Flight(key, start(), user_id, idempotency_key)
+        _count("flights")
+
+    async for event in flight.subscribe(duplicate):
+        yield event
+
+
+def singleflight_stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats)
+    out["in_flight"] = len(_async_flights)
+    out["idempotency_keys"] = len(_completed)
+    return out
@@ -0,0 +1,235 @@
+# backend/orchestrator/summary_memory.py
+# Token-budgeted conversation memory: recent turns verbatim + a rolling summary.
+#
+# ConversationBufferMemory returns the whole transcript as `history`, so a
+# long-running user's history (and the work to build and trim it) grows with
+# every turn, and everything that no longer fits the prompt is simply lost.
+# RollingSummaryMemory keeps the last MEMORY_RECENT_TURNS turns verbatim;
+# older turns are folded into a short summary by agents/summarizer_agent in
+# batches of MEMORY_SUMMARY_BATCH_TURNS, on a background worker, never on
+# the request path. The history it returns never exceeds MEMORY_MAX_TOKENS.
+#
+# Same surface the orchestrator uses on ConversationBufferMemory:
+# save_context({"input": ...}, {"output": ...}) and
+# load_memory_variables({})["history"] in the same "Human: ... / AI: ..." format.
+# from_state() / on_summary let orchestrator/mongo_memory.py keep the state in Mongo.
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    MEMORY_RECENT_TURNS,
+    MEMORY_MAX_TOKENS,
+    MEMORY_SUMMARY_MAX_TOKENS,
+    MEMORY_SUMMARY_BATCH_TURNS,
+    MEMORY_SUMMARY_WORKERS,
+)
+from agents.prompt_context import estimate_tokens
+from utils.metrics import Counter, Histogram
+
+SUMMARY_PREFIX = "Summary of earlier conversation: "
+# turns waiting for the summarizer beyond this are folded in without the LLM
+MAX_UNSUMMARIZED_TURNS = MEMORY_SUMMARY_BATCH_TURNS * 4
+# summary jobs allowed to wait for a worker (all users); more are skipped until the next turn
+MAX_QUEUED_SUMMARIES = 1000
+
+SUMMARIES = Counter("wellness_memory_summaries", "Rolling summary updates by result", ["outcome"])
+SUMMARY_SECONDS = Histogram("wellness_memory_summary_seconds", "Duration of one summary update")
+
+_executor = ThreadPoolExecutor(max_workers=max(1, MEMORY_SUMMARY_WORKERS), thread_name_prefix="memory-summary")
+_queued = 0
+_queued_lock = threading.Lock()
+_stats = {"summaries": 0, "summary_failures": 0, "extractive_folds": 0, "skipped_busy": 0}
+
+
+def _cut(text: str, max_tokens: int) -> str:
+    """Keep roughly the first max_tokens of text (~4 characters per token)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[: max(max_tokens, 0) * 4 - 3].rstrip() + "..." if max_tokens > 0 else ""
+
+
+def _format_turn(user: str, ai: str) -> str:
+    return f"Human: {user}\nAI: {ai}"
+
+
+class RollingSummaryMemory:
+    def __init__(self, recent_turns: int = MEMORY_RECENT_TURNS, max_tokens: int = MEMORY_MAX_TOKENS,
+                 summary_max_tokens: int = MEMORY_SUMMARY_MAX_TOKENS,
+                 batch_turns: int = MEMORY_SUMMARY_BATCH_TURNS, on_summary=None):
+        self.recent_turns = recent_turns
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = min(summary_max_tokens, max_tokens)
+        self.batch_turns = max(1, batch_turns)
+        self.summary = ""
+        self._recent: deque = deque()            # (user, ai), newest last
+        self._unsummarized: list = []            # out of the recent window, not yet in the summary
+        self._folded = 0                         # turns ever removed from the front of _unsummarized
+        self._base = 0                           # turns already in the summary when this was built
+        # on_summary(summary, summarized_through) after each LLM update (persistent backends)
+        self._on_summary = on_summary
+        self._summarizing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_state(cls, summary: str, turns: list, summarized_through: int = 0,
+                   on_summary=None) -> "RollingSummaryMemory":
+        """Rebuild from stored state: `turns` (oldest first) are the ones not yet in `summary`."""
+        memory = cls(on_summary=on_summary)
+        memory.summary = summary
+        memory._base = summarized_through
+        with memory._lock:
+            for user, ai in turns:
+                memory._append((str(user), str(ai)))
+        return memory
+
+    @property
+    def summarized_through(self) -> int:
+        """Number of turns of the conversation the summary covers."""
+        return self._base + self._folded
+
+    # -- ConversationBufferMemory surface ---------------------------------
+
+    def save_context(self, inputs: dict, outputs: dict) -> None:
+        turn = (str(inputs.get("input", "")), str(outputs.get("output", "")))
+        with self._lock:
+            self._append(turn)
+        self.schedule_summary()
+
+    def load_memory_variables(self, _inputs: dict | None = None) -> dict:
+        return {"history": self.render()}
+
+    # -- rendering under the token budget ---------------------------------
+
+    def render(self) -> str:
+        """Summary + as many turns as fit, newest first; never over max_tokens."""
+        with self._lock:
+            summary = self.summary
+            turns = self._unsummarized + list(self._recent)
+        blocks = []
+        remaining = self.max_tokens
+        if summary:
+            summary_block = SUMMARY_PREFIX + _cut(summary, self.summary_max_tokens)
+            remaining -= estimate_tokens(summary_block) + 1
+        for user, ai in reversed(turns):
+            block = _format_turn(user, ai)
+            cost = estimate_tokens(block) + 1
+            if cost > remaining:
+                if not blocks and remaining > 0:
+                    # always show (the start of) the latest turn
+                    blocks.append(_cut(block, remaining - 1))
+                break
+            blocks.append(block)
+            remaining -= cost
+        if summary:
+            blocks.append(summary_block)
+        return "\n".join(reversed(blocks))
+
+    def estimated_bytes(self) -> int:
+        with self._lock:
+            texts = [self.summary] + [u + a for u, a in self._unsummarized] + [u + a for u, a in self._recent]
+        return sum(len(t.encode("utf-8")) for t in texts)
+
+    # -- summary maintenance (background worker) --------------------------
+
+    def _append(self, turn: tuple) -> None:
+        # called with the lock held
+        self._recent.append(turn)
+        while len(self._recent) > self.recent_turns:
+            self._unsummarized.append(self._recent.popleft())
+        if len(self._unsummarized) > MAX_UNSUMMARIZED_TURNS:
+            # summarizer unavailable or far behind: fold the oldest in without the LLM
+            self._fold_extractive(len(self._unsummarized) - MAX_UNSUMMARIZED_TURNS)
+
+    def schedule_summary(self) -> bool:
+        """Queue a background summary update if a batch is due; True if one was queued."""
+        with self._lock:
+            schedule = len(self._unsummarized) >= self.batch_turns and not self._summarizing
+            if schedule:
+                self._summarizing = True
+        if schedule:
+            _submit(self)
+        return schedule
+
+    def _fold_extractive(self, n: int) -> None:
+        # called with the lock held; keeps the user's side, which carries the facts
+        folded, self._unsummarized = self._unsummarized[:n], self._unsummarized[n:]
+        self._folded += n
+        asked = "; ".join(_cut(user, 30) for user, _ in folded)
+        self.summary = _cut(f"{self.summary} The user also mentioned: {asked}.".strip(), self.summary_max_tokens)
+        _stats["extractive_folds"] += 1
+
+    def summarize_pending(self) -> bool:
+        """Fold the unsummarized turns into the summary (one LLM call). Returns False on failure."""
+        from agents.summarizer_agent import summarize
+
+        with self._lock:
+            batch = list(self._unsummarized)
+            summary = self.summary
+            folded_before = self._folded
+        if not batch:
+            return True
+        started = time.perf_counter()
+        updated = summarize(summary, batch, self.summary_max_tokens)
+        SUMMARY_SECONDS.observe(time.perf_counter() - started)
+        if not updated:
+            return False
+        with self._lock:
+            # the batch was a prefix; _fold_extractive may have removed part of it meanwhile
+            remaining = max(0, len(batch) - (self._folded - folded_before))
+            self._unsummarized = self._unsummarized[remaining:]
+            self._folded += remaining
+            self.summary = _cut(updated, self.summary_max_tokens)
+            summary, through = self.summary, self.summarized_through
+        if self._on_summary is not None:
+            self._on_summary(summary, through)
+        return True
+
+    def _run_summary(self) -> None:
+        try:
+            ok = self.summarize_pending()
+        except Exception as e:
+            print("WARNING: memory summary update failed:", repr(e))
+            ok = False
+        SUMMARIES.labels("ok" if ok else "failed").inc()
+        _stats["summaries" if ok else "summary_failures"] += 1
+        with self._lock:
+            self._summarizing = False
+            again = ok and len(self._unsummarized) >= self.batch_turns
+            if again:
+                self._summarizing = True
+        if again:
+            _submit(self)
+
+
+def _submit(memory: RollingSummaryMemory) -> None:
+    global _queued
+    with _queued_lock:
+        if _queued >= MAX_QUEUED_SUMMARIES:
+            _stats["skipped_busy"] += 1
+            busy = True
+        else:
+            _queued += 1
+            busy = False
+    if busy:
+        # retried on this user's next turn; the budget holds meanwhile
+        with memory._lock:
+            memory._summarizing = False
+        return
+    _executor.submit(_run_and_release, memory)
+
+
+def _run_and_release(memory: RollingSummaryMemory) -> None:
+    global _queued
+    try:
+        memory._run_summary()
+    finally:
+        with _queued_lock:
+            _queued -= 1
+
+
+def summary_memory_stats() -> dict:
+    with _queued_lock:
+        queued = _queued
+    return {**_stats, "queued": queued}
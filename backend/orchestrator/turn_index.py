@@ -0,0 +1,344 @@
+# backend/orchestrator/turn_index.py
+# Per-user local vector index over past conversation turns.
+#
+# The prompt's history is the recent window plus a rolling summary, so an
+# older turn that matters for the current message (an earlier note about knee
+# pain when the user now asks for a workout) is often no longer in it. Every
+# stored turn is embedded and appended to its user's index as it is written
+# (database turn listener: append_conversation_turn / the turn writer's
+# batches); astream_query retrieves the TURN_INDEX_TOP_K most
+# similar older turns for the message (cosine, NumPy) and hands them to the
+# supervisor and agents as state["relevant_turns"].
+#
+# Embedders are pluggable (set_embedder / TURN_INDEX_EMBEDDER). The default
+# hashes content words and word pairs into a small dense vector: NumPy only,
+# microseconds per turn, but it only matches shared words.
+# "sentence-transformers:<model>" uses that package when it is installed.
+# Indexes live per process, bounded in total vectors (LRU by user), and are
+# rebuilt from conversation_turns the first time a user is queried.
+import asyncio
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+import database
+from agents.text_features import tokenize
+from config import (
+    TURN_INDEX_ENABLED,
+    TURN_INDEX_EMBEDDER,
+    TURN_INDEX_DIM,
+    TURN_INDEX_TOP_K,
+    TURN_INDEX_MIN_SCORE,
+    TURN_INDEX_MAX_TURNS,
+    TURN_INDEX_MAX_VECTORS,
+    MEMORY_RECENT_TURNS,
+)
+from utils.metrics import Histogram
+
+# retrieved turns are cut to this many characters each (user side / assistant side)
+MAX_RECALL_CHARS = 240
+
+SEARCH_SECONDS = Histogram("wellness_turn_index_search_seconds", "Top-k search over one user's past turns")
+
+# Words that carry no topic; without them short questions match on "what should I"
+STOP_WORDS = frozenset("""
+a about after again all am an and any are as at be because been before being but by can could
+did do does doing for from had has have having he her here him his how i if in into is it its
+just me more most my no not now of on once only or other our out over should so some such than
+that the their them then there these they this to too up very was we were what when where which
+while who why will with would you your im i'm i've don't can't
+""".split())
+
+
+# -------------------------------------------------------------------
+# EMBEDDERS
+# -------------------------------------------------------------------
+
+class Embedder:
+    """Turns texts into an (n, dim) float32 matrix with L2-normalised rows."""
+
+    dim: int
+    # embedding is cheap enough to run inline on the event loop
+    inline = False
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+class HashingEmbedder(Embedder):
+    """Signed feature hashing of content words + adjacent pairs (crc32, stable across processes)."""
+
+    # pairs are rarer than single words; at full weight they drown a shared keyword
+    PAIR_WEIGHT = 0.5
+
+    inline = True
+
+    def __init__(self, dim: int = TURN_INDEX_DIM):
+        self.dim = dim
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w for w in tokenize(text) if w not in STOP_WORDS]
+            terms = [(w, 1.0) for w in words]
+            terms += [(f"{a} {b}", self.PAIR_WEIGHT) for a, b in zip(words, words[1:])]
+            for term, weight in terms:
+                h = zlib.crc32(term.encode("utf-8"))
+                matrix[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        return _normalize(matrix)
+
+
+class SentenceTransformerEmbedder(Embedder):
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = self._model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.astype(np.float32)
+
+
+def _build_embedder(spec: str = TURN_INDEX_EMBEDDER) -> Embedder:
+    name, _, model = spec.partition(":")
+    if name == "sentence-transformers":
+        try:
+            return SentenceTransformerEmbedder(model or "all-MiniLM-L6-v2")
+        except ImportError:
+            print("WARNING: sentence-transformers not installed; using the hashing embedder for turn retrieval.")
+    elif name != "hashing":
+        print(f"WARNING: unknown TURN_INDEX_EMBEDDER {spec!r}; using the hashing embedder.")
+    return HashingEmbedder()
+
+
+# -------------------------------------------------------------------
+# INDEX
+# -------------------------------------------------------------------
+
+class _UserIndex:
+    """One user's turn vectors (preallocated, grown by a quarter) and texts, oldest first."""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.turns: list[tuple[str, str]] = []
+        self.turn_ids: list = []  # parallel to turns; None for turns loaded by a rebuild
+        self.ids: set = set()
+        self.lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.turns)
+
+    def add(self, vectors: np.ndarray, turns: list, ids: list) -> int:
+        with self.lock:
+            keep = [i for i, turn_id in enumerate(ids) if turn_id is None or turn_id not in self.ids]
+            if not keep:
+                return 0
+            vectors = vectors[keep]
+            needed = self.count + len(keep)
+            if needed > len(self.vectors):
+                capacity = max(needed, len(self.vectors) + max(64, len(self.vectors) // 4))
+                grown = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+                grown[: self.count] = self.vectors[: self.count]
+                self.vectors = grown
+            self.vectors[self.count: needed] = vectors
+            self.turns.extend(turns[i] for i in keep)
+            self.turn_ids.extend(ids[i] for i in keep)
+            self.ids.update(ids[i] for i in keep if ids[i] is not None)
+            if self.count > TURN_INDEX_MAX_TURNS:
+                # keep the newest; rare enough that a copy is fine
+                drop = self.count - TURN_INDEX_MAX_TURNS
+                self.vectors = self.vectors[drop:].copy()
+                del self.turns[:drop]
+                self.ids.difference_update(i for i in self.turn_ids[:drop] if i is not None)
+                del self.turn_ids[:drop]
+            return len(keep)
+
+    def search(self, query: np.ndarray, k: int, skip_newest: int, min_score: float) -> list[tuple[float, tuple]]:
+        with self.lock:
+            n = self.count - skip_newest
+            if n <= 0 or k <= 0:
+                return []
+            scores = self.vectors[:n] @ query
+            k = min(k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            found, seen = [], set()
+            for i in top:
+                # a turn written while the index was being rebuilt can be in it twice
+                if scores[i] >= min_score and self.turns[i] not in seen:
+                    seen.add(self.turns[i])
+                    found.append((float(scores[i]), self.turns[i]))
+            return found
+
+
+class TurnIndex:
+    def __init__(self, embedder: Embedder | None = None, max_vectors: int = TURN_INDEX_MAX_VECTORS):
+        self.embedder = embedder
+        self.max_vectors = max_vectors
+        self._users: "OrderedDict[str, _UserIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"turns_indexed": 0, "searches": 0, "hits": 0, "builds": 0, "build_errors": 0,
+                       "evicted_users": 0}
+
+    def _embedder(self) -> Embedder:
+        if self.embedder is None:
+            self.embedder = _build_embedder()
+        return self.embedder
+
+    @staticmethod
+    def _text(user_message: str) -> str:
+        # the user's side carries the facts; answers share too much boilerplate advice
+        return user_message or ""
+
+    # -- residency (LRU over users, bounded by total vectors) -------------
+
+    def _resident(self, uid: str) -> _UserIndex | None:
+        with self._lock:
+            index = self._users.get(uid)
+            if index is not None:
+                self._users.move_to_end(uid)
+            return index
+
+    def _install(self, uid: str, index: _UserIndex) -> _UserIndex:
+        with self._lock:
+            existing = self._users.get(uid)
+            if existing is not None:
+                return existing
+            self._users[uid] = index
+            self._evict(uid)
+            return index
+
+    def _evict(self, uid: str) -> None:
+        """Drop least recently used users (never `uid`) until the total fits max_vectors. Caller holds _lock."""
+        total = sum(i.count for i in self._users.values())
+        for victim in list(self._users):
+            if total <= self.max_vectors:
+                break
+            if victim == uid:
+                continue
+            total -= self._users.pop(victim).count
+            self._stats["evicted_users"] += 1
+
+    def _build(self, turns: list) -> _UserIndex:
+        embedder = self._embedder()
+        index = _UserIndex(embedder.dim, capacity=max(64, len(turns)))
+        if turns:
+            vectors = embedder.embed([self._text(t.get("user_message", "")) for t in turns])
+            pairs = [(t.get("user_message", ""), t.get("assistant_response", "")) for t in turns]
+            index.add(vectors, pairs, [None] * len(turns))
+        self._stats["builds"] += 1
+        return index
+
+    # -- writes (database turn listener) ----------------------------------
+
+    def add_turns(self, docs: list[dict]) -> None:
+        """Append stored turns to their users' indexes; users not resident are rebuilt on their next search."""
+        by_user: dict[str, list[dict]] = {}
+        for doc in docs:
+            by_user.setdefault(str(doc.get("user_id")), []).append(doc)
+        for uid, user_docs in by_user.items():
+            index = self._resident(uid)
+            if index is None:
+                continue
+            vectors = self._embedder().embed([self._text(d.get("user_message", "")) for d in user_docs])
+            pairs = [(d.get("user_message", ""), d.get("assistant_response", "")) for d in user_docs]
+            added = index.add(vectors, pairs, [d.get("_id") for d in user_docs])
+            self._stats["turns_indexed"] += added
+            if added:
+                with self._lock:
+                    self._evict(uid)
+
+    # -- reads --------------------------------------------------------------
+
+    def _search(self, index: _UserIndex, query: np.ndarray, k: int, skip_newest: int) -> list:
+        started = time.perf_counter()
+        found = index.search(query, k, skip_newest, TURN_INDEX_MIN_SCORE)
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        self._stats["searches"] += 1
+        self._stats["hits"] += len(found)
+        return found
+
+    def search(self, user_id, message: str, k: int = TURN_INDEX_TOP_K,
+               skip_newest: int = MEMORY_RECENT_TURNS) -> list[tuple[float, tuple]]:
+        """
+        Up to k (score, (user_message, assistant_response)) of the user's older
+        turns most similar to message, best first. The newest skip_newest turns
+        are left out: they are already in the verbatim history.
+        """
+        uid = str(user_id)
+        index = self._resident(uid)
+        if index is None:
+            from orchestrator.turn_writer import flush_user
+
+            try:
+                flush_user(uid)
+                turns = database.get_conversation_history(uid, limit=TURN_INDEX_MAX_TURNS)
+            except Exception as e:
+                print("WARNING: turn index rebuild failed:", repr(e))
+                self._stats["build_errors"] += 1
+                return []
+            index = self._install(uid, self._build(turns))
+        return self._search(index, self._embedder().embed([message])[0], k, skip_newest)
+
+    async def asearch(self, user_id, message: str, k: int = TURN_INDEX_TOP_K,
+                      skip_newest: int = MEMORY_RECENT_TURNS) -> list[tuple[float, tuple]]:
+        """Async search: Motor for the rebuild read, embedding / rebuild off the event loop."""
+        uid = str(user_id)
+        index = self._resident(uid)
+        if index is None:
+            from orchestrator.turn_writer import aflush_user
+
+            try:
+                await aflush_user(uid)
+                turns = await database.aget_conversation_history(uid, limit=TURN_INDEX_MAX_TURNS)
+            except Exception as e:
+                print("WARNING: turn index rebuild failed:", repr(e))
+                self._stats["build_errors"] += 1
+                return []
+            index = self._install(uid, await asyncio.to_thread(self._build, turns))
+        embedder = self._embedder()
+        if embedder.inline:
+            query = embedder.embed([message])[0]
+        else:
+            query = (await asyncio.to_thread(embedder.embed, [message]))[0]
+        return self._search(index, query, k, skip_newest)
+
+    def stats(self) -> dict:
+        with self._lock:
+            users = len(self._users)
+            vectors = sum(i.count for i in self._users.values())
+        return {**self._stats, "enabled": TURN_INDEX_ENABLED, "resident_users": users,
+                "vectors": vectors, "max_vectors": self.max_vectors,
+                "embedder": type(self.embedder).__name__ if self.embedder else None}
+
+
+def render_turns(found: list[tuple[float, tuple]]) -> str:
+    """Retrieved turns as "Human: ... / AI: ..." lines, best match first."""
+    lines = []
+    for _, (user, ai) in found:
+        lines.append(f"Human: {user[:MAX_RECALL_CHARS]}\nAI: {ai[:MAX_RECALL_CHARS]}")
+    return "\n".join(lines)
+
+
+turn_index = TurnIndex()
+
+
+def set_embedder(embedder: Embedder) -> None:
+    """Swap the embedder; every index is rebuilt with it on the user's next search."""
+    with turn_index._lock:
+        turn_index.embedder = embedder
+        turn_index._users.clear()
+
+
+if TURN_INDEX_ENABLED:
+    database.add_turn_listener(turn_index.add_turns)
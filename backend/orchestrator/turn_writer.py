@@ -0,0 +1,246 @@
+# backend/orchestrator/turn_writer.py
+# Write-behind persistence for conversation turns.
+#
+# Every chat turn used to end with its own insert_one, so the user waited on
+# a Mongo round trip after the answer already existed. record_turn() now only
+# queues the prepared document; a background thread writes queued turns from
+# all users in one bulk_write when TURN_WRITE_BATCH_SIZE turns are waiting or
+# TURN_WRITE_FLUSH_SECONDS have passed.
+# - bounded: when TURN_WRITE_MAX_QUEUE turns are queued, the request writes
+#   its turn directly (backpressure instead of unbounded memory)
+# - read-your-writes: history reads call flush_user() first, which only
+#   waits when that user still has queued turns
+# - drained on shutdown by stop() (FastAPI lifespan, and atexit for scripts)
+import asyncio
+import atexit
+import threading
+import time
+from collections import defaultdict, deque
+
+import database
+from config import (
+    TURN_WRITE_BEHIND,
+    TURN_WRITE_BATCH_SIZE,
+    TURN_WRITE_FLUSH_SECONDS,
+    TURN_WRITE_MAX_QUEUE,
+    TURN_WRITE_MAX_RETRIES,
+)
+from utils.metrics import Counter, Gauge, Histogram
+
+TURNS = Counter(
+    "wellness_turn_writes", "Conversation turns by how they were persisted", ["path"]
+)
+BATCH_SIZE = Histogram(
+    "wellness_turn_write_batch_size", "Turns per bulk_write",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500),
+)
+FLUSH_SECONDS = Histogram("wellness_turn_write_flush_seconds", "Duration of one bulk_write of turns")
+
+
+class TurnWriter:
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int, max_retries: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._queue: deque = deque()
+        self._pending: dict[str, int] = defaultdict(int)  # queued or being written, per user
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._stats = {
+            "queued": 0, "written": 0, "direct_writes": 0, "batches": 0,
+            "failed_batches": 0, "dropped": 0, "max_queue_depth": 0,
+        }
+
+    # -- producer side --------------------------------------------------
+
+    def _start(self) -> None:
+        # called with the lock held
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="turn-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, doc: dict) -> bool:
+        """Queue one turn document; False when the queue is full (write it yourself)."""
+        with self._cond:
+            if len(self._queue) >= self.max_queue or self._stopping:
+                return False
+            self._start()
+            self._queue.append(doc)
+            self._pending[doc["user_id"]] += 1
+            self._stats["queued"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def count_direct(self) -> None:
+        TURNS.labels("direct").inc()
+        with self._cond:
+            self._stats["direct_writes"] += 1
+
+    def has_pending(self, user_id) -> bool:
+        return self._pending.get(str(user_id), 0) > 0
+
+    def flush_user(self, user_id, timeout: float = 5.0) -> bool:
+        """Write this user's queued turns now; returns False on timeout."""
+        uid = str(user_id)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending.get(uid, 0) > 0:
+                self._flush_requested = True
+                self._cond.notify_all()
+                left = deadline - time.monotonic()
+                if left <= 0 or self._thread is None or not self._thread.is_alive():
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Write every queued turn now; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                self._flush_requested = True
+                self._cond.notify_all()
+                left = deadline - time.monotonic()
+                if left <= 0 or self._thread is None or not self._thread.is_alive():
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Drain the queue and stop the writer thread (application shutdown)."""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"WARNING: turn writer did not drain within {timeout}s; {len(self._queue)} turns unwritten.")
+
+    # -- writer thread --------------------------------------------------
+
+    def _next_batch(self) -> list[dict] | None:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while (len(self._queue) < self.batch_size and not self._flush_requested
+                   and not self._stopping):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            if not self._queue:
+                self._flush_requested = False
+                return None if self._stopping else []
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if not self._queue:
+                self._flush_requested = False
+            return batch
+
+    def _write(self, batch: list[dict]) -> None:
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                database.insert_conversation_turns(batch)
+                FLUSH_SECONDS.observe(time.perf_counter() - started)
+                BATCH_SIZE.observe(len(batch))
+                TURNS.labels("batched").inc(len(batch))
+                with self._cond:
+                    self._stats["batches"] += 1
+                    self._stats["written"] += len(batch)
+                return
+            except Exception as e:
+                with self._cond:
+                    self._stats["failed_batches"] += 1
+                if attempt == self.max_retries:
+                    print(f"WARNING: dropping {len(batch)} conversation turns after "
+                          f"{attempt + 1} failed writes: {e!r}")
+                    TURNS.labels("dropped").inc(len(batch))
+                    with self._cond:
+                        self._stats["dropped"] += len(batch)
+                    return
+                time.sleep(min(0.2 * 2 ** attempt, 2.0))
+
+    def _done(self, batch: list[dict]) -> None:
+        with self._cond:
+            for doc in batch:
+                uid = doc["user_id"]
+                self._pending[uid] -= 1
+                if self._pending[uid] <= 0:
+                    del self._pending[uid]
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                try:
+                    self._write(batch)
+                finally:
+                    self._done(batch)
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out["queue_depth"] = len(self._queue)
+            out["users_pending"] = len(self._pending)
+        out["avg_batch_size"] = round(out["written"] / out["batches"], 1) if out["batches"] else 0.0
+        return out
+
+
+turn_writer = TurnWriter(
+    TURN_WRITE_BATCH_SIZE, TURN_WRITE_FLUSH_SECONDS, TURN_WRITE_MAX_QUEUE, TURN_WRITE_MAX_RETRIES
+)
+# scripts and tests that never run the FastAPI lifespan still get their turns written
+atexit.register(turn_writer.stop)
+
+Gauge(
+    "wellness_turn_write_queue_depth", "Conversation turns waiting to be written", [],
+    lambda: {(): turn_writer.stats()["queue_depth"]},
+)
+
+
+# -------------------------------------------------------------------
+# PUBLIC API (used by the orchestrator, history reads and the lifespan)
+# -------------------------------------------------------------------
+
+def record_turn(user_id, user_message: str, assistant_response: str, agents_used: list[str],
+                decided_by: dict | None = None) -> None:
+    """Persist one turn: queued when write-behind is on, else (or when full) written now."""
+    doc = database.new_turn_document(user_id, user_message, assistant_response, agents_used, decided_by)
+    if TURN_WRITE_BEHIND and turn_writer.submit(doc):
+        return
+    turn_writer.count_direct()
+    database.insert_conversation_turns([doc])
+
+
+async def arecord_turn(user_id, user_message: str, assistant_response: str, agents_used: list[str],
+                       decided_by: dict | None = None) -> None:
+    """Async record_turn; a direct write (queue full / disabled) goes through Motor."""
+    doc = database.new_turn_document(user_id, user_message, assistant_response, agents_used, decided_by)
+    if TURN_WRITE_BEHIND and turn_writer.submit(doc):
+        return
+    turn_writer.count_direct()
+    await database.ainsert_conversation_turns([doc])
+
+
+def flush_user(user_id) -> None:
+    """Make this user's queued turns visible to a following history read."""
+    if turn_writer.has_pending(user_id) and not turn_writer.flush_user(user_id):
+        print(f"WARNING: queued turns for user {user_id} not yet written; history may lag.")
+
+
+async def aflush_user(user_id) -> None:
+    if turn_writer.has_pending(user_id):
+        await asyncio.to_thread(flush_user, user_id)
+
+
+def turn_writer_stats() -> dict:
+    return {"enabled": TURN_WRITE_BEHIND, **turn_writer.stats()}
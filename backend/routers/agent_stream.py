@@ -1,63 +1,55 @@
 # backend/routers/agent_stream.py
-from fastapi import APIRouter, WebSocket
-import asyncio
-from typing import List, Dict, Any
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from orchestrator.orchestrator import astream_query
+from utils.jwt_handler import decode_jwt_token
 
 router = APIRouter()
 
-async def simulate_orchestrator(query: str) -> Dict[str, Any]:
-    """
-    Placeholder for your actual orchestrator / LLM call.
-    Replace this with the real call that returns:
-      {
-        "agents_used": ["symptom_agent","fitness_agent"],
-        "final_text": "The LLM answer..."
-      }
-    OR, if your orchestrator streams, yield events and final_text.
-    """
-    # Simulate agent calls and a final answer (demo only)
-    await asyncio.sleep(0.5)
-    agents_used = ["symptom_agent", "lifestyle_agent", "fitness_agent", "diet_agent"]
-    # This is where you'd run your multi-agent orchestration & LLM call
-    final_text = f"REAL LLM ANSWER — (replace simulate_orchestrator with your orchestrator) for: {query}"
-    return {"agents_used": agents_used, "final_text": final_text}
+
+def _resolve_user_id(init: dict):
+    """Prefer the user id inside a valid JWT; fall back to an explicit user_id."""
+    token = init.get("token")
+    if token:
+        payload = decode_jwt_token(token)
+        if payload and payload.get("user_id"):
+            return str(payload["user_id"])
+    return init.get("user_id")
+
 
 @router.websocket("/ws/process-query")
 async def process_query_ws(websocket: WebSocket):
+    """
+    Client sends: {"type": "start", "query": "...", "token": "<jwt>", "mode": "step"|"plan",
+                   "idempotency_key": "<optional, reuse it when reconnecting>"}
+    Server streams the real orchestration events as they happen (see
+    orchestrator.astream_query): intent, supervisor/plan decisions,
+    agent_start, token deltas, agent_end, and finally {"type": "final", ...}
+    with ttft_ms / total_ms measured server-side.
+    """
     await websocket.accept()
+    events = None
     try:
         init = await websocket.receive_json()
         query = init.get("query", "")
-
-        # If you can stream events from your orchestrator, send them as they arrive.
-        # For demo we will simulate agent "steps" first, then send final LLM answer.
-        # If you have real orchestrator events, iterate over them and websocket.send_json each one.
-
-        # Example: send agent progress messages (frontend will show)
-        agents_demo = [
-            ("symptom_agent", "Analyzing symptoms..."),
-            ("lifestyle_agent", "Checking lifestyle patterns..."),
-            ("fitness_agent", "Calculating fitness recommendations..."),
-            ("diet_agent", "Building nutrition recommendations..."),
-        ]
-        for agent, text in agents_demo:
-            await websocket.send_json({"type": "agent", "agent": agent, "text": text})
-            await asyncio.sleep(0.8)  # small pause to visualize streaming
-
-        # Call your real orchestrator/LLM and get actual final_text & agents_used
-        # Replace simulate_orchestrator with your function that queries LLM/orchestrator
-        orchestrator_result = await simulate_orchestrator(query)
-        final_text = orchestrator_result.get("final_text", "")
-        agents_used: List[str] = orchestrator_result.get("agents_used", [])
-
-        # Send final result
-        await websocket.send_json({
-            "type": "final",
-            "answer": final_text,
-            "agents_used": agents_used
-        })
-
+        user_id = _resolve_user_id(init)
+        if not user_id:
+            await websocket.send_json({"type": "error", "text": "Missing or invalid token"})
+            return
+
+        events = astream_query(user_id, query, mode=init.get("mode"),
+                               idempotency_key=init.get("idempotency_key"))
+        async for event in events:
+            await websocket.send_json(event)
+
+    except WebSocketDisconnect:
+        # client went away; closing the generator below cancels the in-flight turn
+        return
     except Exception as e:
         await websocket.send_json({"type": "error", "text": f"WebSocket error: {str(e)}"})
     finally:
-        await websocket.close()
+        if events is not None:
+            await events.aclose()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
@@ -1,8 +1,8 @@
 # backend/routers/auth.py
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from database import save_user, get_user_by_email
-from utils.password_hash import hash_password, verify_password
+from database import asave_user, aget_user_by_email
+from utils.password_hash import ahash_password, averify_password, PasswordHashBusy
 from utils.jwt_handler import create_jwt_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -19,23 +19,36 @@ class LoginRequest(BaseModel):
     password: str
 
 
+def _hashing_busy() -> HTTPException:
+    # the password worker pool is saturated (login storm); clients retry shortly
+    return HTTPException(status_code=503, detail="Too many login attempts, please retry",
+                         headers={"Retry-After": "1"})
+
+
+# async routes: Mongo goes through Motor and pbkdf2 through the password
+# process pool, so neither holds a threadpool worker that /chat could use
 @router.post("/signup")
-def signup(req: SignupRequest):
-    existing = get_user_by_email(req.email)
-    if existing:
+async def signup(req: SignupRequest):
+    try:
+        password_hash = await ahash_password(req.password)
+    except PasswordHashBusy:
+        raise _hashing_busy()
+
+    # Save user with profile_complete set to False; the unique email index
+    # rejects an existing address in the same round trip
+    try:
+        saved_user = await asave_user(
+            {
+                "email": req.email,
+                "name": req.name,
+                "password_hash": password_hash,
+                "profile_complete": False,
+            }
+        )
+    except ValueError:
         # keep the same error shape as before
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Save user with profile_complete set to False
-    saved_user = save_user(
-        {
-            "email": req.email,
-            "name": req.name,
-            "password_hash": hash_password(req.password),
-            "profile_complete": False,
-        }
-    )
-
     # create token using the saved user's id (saved_user['id'] is string ObjectId)
     token = create_jwt_token(str(saved_user["id"]))
 
@@ -50,12 +63,17 @@ def signup(req: SignupRequest):
 
 
 @router.post("/login")
-def login(req: LoginRequest):
-    user = get_user_by_email(req.email)
-    if not user:
+async def login(req: LoginRequest):
+    user = await aget_user_by_email(req.email)
+    # accounts created through Google sign-in have no password
+    if not user or not user.get("password_hash"):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    if not verify_password(req.password, user["password_hash"]):
+    try:
+        valid = await averify_password(req.password, user["password_hash"])
+    except PasswordHashBusy:
+        raise _hashing_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     token = create_jwt_token(str(user["id"]))
@@ -1,14 +1,117 @@
-from fastapi import APIRouter
+import asyncio
+import json
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from orchestrator.orchestrator import process_query
+from config import SSE_HEARTBEAT_SECONDS
+from orchestrator.orchestrator import aprocess_query, astream_query
+from utils.jwt_handler import bearer_user_id
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
-    user_id: str
+    # optional when an Authorization: Bearer token is sent (the token wins)
+    user_id: Optional[str] = None
     message: str
+    # optional override of config.ORCHESTRATION_MODE, handy for A/B comparisons
+    mode: Optional[Literal["step", "plan"]] = None
+
+def _resolve_user_id(req: ChatRequest, token_user_id: Optional[str]) -> str:
+    """Prefer the user id inside a valid bearer token; fall back to the body's user_id."""
+    user_id = token_user_id or req.user_id
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Missing or invalid token")
+    return user_id
+
 
 @router.post("/chat")
-def chat(req: ChatRequest):
-    response, trace = process_query(req.user_id, req.message)
+async def chat(req: ChatRequest, idempotency_key: Optional[str] = Header(None),
+               token_user_id: Optional[str] = Depends(bearer_user_id)):
+    # async route: LLM + Mongo calls are awaited, so no threadpool worker is held per request
+    # Idempotency-Key header: a retried request gets the stored result instead of a new turn
+    req.user_id = _resolve_user_id(req, token_user_id)
+    response, trace = await aprocess_query(req.user_id, req.message, mode=req.mode,
+                                           idempotency_key=idempotency_key)
     return {"response": response, "agents_used": trace}
+
+
+# -------------------------------------------------------------------
+# SSE variant: same events as /ws/process-query over plain HTTP
+# -------------------------------------------------------------------
+
+_sse_counters = {"started": 0, "completed": 0, "disconnected": 0, "errors": 0, "heartbeats": 0}
+
+
+def sse_stats() -> dict:
+    return dict(_sse_counters)
+
+
+def _sse_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _sse_stream(request: Request, req: ChatRequest, idempotency_key: Optional[str]):
+    """
+    Run astream_query in its own task and relay its events as SSE frames.
+    While no event is ready we wake up every SSE_HEARTBEAT_SECONDS, send a
+    comment line (keeps proxies from timing out the connection) and check
+    whether the client is still there; if not, the orchestration task is
+    cancelled so the remaining Groq calls are not made.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def produce():
+        try:
+            async for event in astream_query(req.user_id, req.message, mode=req.mode,
+                                             idempotency_key=idempotency_key):
+                await queue.put(event)
+        except Exception as e:
+            await queue.put({"type": "error", "text": str(e)})
+        finally:
+            await queue.put(done)
+
+    _sse_counters["started"] += 1
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    _sse_counters["disconnected"] += 1
+                    return
+                _sse_counters["heartbeats"] += 1
+                yield ": ping\n\n"
+                continue
+
+            if event is done:
+                _sse_counters["completed"] += 1
+                return
+            if event["type"] == "error":
+                _sse_counters["errors"] += 1
+            yield _sse_event(event)
+    except asyncio.CancelledError:
+        # the server noticed the disconnect first and cancelled the response
+        _sse_counters["disconnected"] += 1
+        raise
+    finally:
+        task.cancel()
+
+
+@router.post("/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request,
+                      idempotency_key: Optional[str] = Header(None),
+                      token_user_id: Optional[str] = Depends(bearer_user_id)):
+    """
+    Server-Sent Events version of /chat for clients that cannot keep a websocket
+    open. Streams intent, supervisor/plan, agent_start, token, agent_end and
+    final events (same payloads as /ws/process-query), one SSE frame each.
+    """
+    req.user_id = _resolve_user_id(req, token_user_id)
+    return StreamingResponse(
+        _sse_stream(request, req, idempotency_key),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
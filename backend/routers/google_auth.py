@@ -2,10 +2,10 @@ from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from urllib.parse import urlencode
 import os
-import requests
 
-from database import get_user_by_email, save_user
-from utils.password_hash import hash_password
+from database import aupsert_user_by_email
+from utils.google_oauth import GoogleOAuthError, fetch_identity
+from utils.jwt_handler import create_jwt_token
 
 router = APIRouter(tags=["google-auth"])
 
@@ -37,12 +37,10 @@ def google_login():
 
 
 @router.get("/auth/google/callback")
-def google_callback(request: Request, code: str | None = None, error: str | None = None):
+async def google_callback(request: Request, code: str | None = None, error: str | None = None):
     """Step 2: Google returns here. We get user info and send them back to frontend."""
 
     FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
-    GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-    GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
     GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 
     if error:
@@ -51,60 +49,33 @@ def google_callback(request: Request, code: str | None = None, error: str | None
     if not code:
         raise HTTPException(status_code=400, detail="Missing 'code' in callback")
 
-    # exchange code for tokens
-    token_data = {
-        "code": code,
-        "client_id": GOOGLE_CLIENT_ID,
-        "client_secret": GOOGLE_CLIENT_SECRET,
-        "redirect_uri": GOOGLE_REDIRECT_URI,
-        "grant_type": "authorization_code",
-    }
-    token_resp = requests.post("https://oauth2.googleapis.com/token", data=token_data)
-    if token_resp.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to obtain tokens from Google")
-
-    token_json = token_resp.json()
-    access_token = token_json.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=400, detail="No access token in Google response")
-
-    # get Google profile
-    userinfo_resp = requests.get(
-        "https://www.googleapis.com/oauth2/v3/userinfo",
-        headers={"Authorization": f"Bearer {access_token}"},
-    )
-    if userinfo_resp.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to fetch user info from Google")
-
-    userinfo = userinfo_resp.json()
-    email = userinfo.get("email")
-    name = userinfo.get("name") or "Google User"
+    # exchange code for tokens; the id_token is verified locally (no userinfo call)
+    try:
+        claims = await fetch_identity(code, GOOGLE_REDIRECT_URI)
+    except GoogleOAuthError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    email = claims.get("email")
+    name = claims.get("name") or "Google User"
 
     if not email:
         raise HTTPException(status_code=400, detail="Google account has no email")
+    # the account is matched by email, so only accept addresses Google has verified
+    if claims.get("email_verified") in (False, "false"):
+        raise HTTPException(status_code=400, detail="Google email address is not verified")
 
-    # find or create local user
-    user = get_user_by_email(email)
-    if not user:
-        random_password = os.urandom(16).hex()
-        user = save_user(
-            {
-                "email": email,
-                "name": name,
-                "password_hash": hash_password(random_password),
-            }
-        )
+    # find or create local user in one round trip; Google users get no
+    # password hash, so password login stays impossible for them
+    user = await aupsert_user_by_email(email, {"name": name, "auth_provider": "google"})
 
     # send user to frontend with data in URL
-    from utils.jwt_handler import create_jwt_token
-
     token = create_jwt_token(user["id"])
 
     params = {
         "userId": user["id"],
         "name": user["name"],
         "email": user["email"],
-        "token": token,     
+        "token": token,
         "from": "google",
     }
 
@@ -1,21 +1,45 @@
-from fastapi import APIRouter
-from database import get_conversation_history
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from database import get_conversation_page
+from orchestrator.turn_writer import flush_user
 
 router = APIRouter(prefix="/history", tags=["history"])
 
 @router.get("/{user_id}")
-def fetch_history(user_id: int):
+def fetch_history(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+):
     """
-    Return the conversation history for a given user_id.
+    Return one page of the conversation history for a given user_id.
     Each item contains:
     - timestamp
     - user_message
     - assistant_response
     - agents_used
+
+    Query params:
+    - limit: page size (1-200, default 50)
+    - cursor: pass back next_cursor from the previous page
+    - since / until: inclusive ISO timestamps, e.g. 2025-12-08T17:00:00
+    - order: "asc" (oldest first, default) or "desc" (newest first)
     """
-    turns = get_conversation_history(user_id)
+    # turns still queued by the write-behind writer are written first
+    flush_user(user_id)
+    try:
+        page = get_conversation_page(
+            user_id, limit=limit, cursor=cursor, since=since, until=until, order=order
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
     return {
         "user_id": user_id,
-        "turns": turns,
-        "total_turns": len(turns),
+        "turns": page["turns"],
+        "total_turns": len(page["turns"]),
+        "next_cursor": page["next_cursor"],
     }
@@ -0,0 +1,31 @@
+# backend/routers/metrics.py
+# Prometheus scrape endpoint. Histograms/counters are recorded where the work
+# happens (orchestrator stages, agent LLM calls); the gauges below are read
+# from the existing stats functions at scrape time.
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from agents.groq_client import limiter_stats
+from agents.resilience import resilience_stats
+from utils.metrics import CONTENT_TYPE, Gauge, render
+
+router = APIRouter(tags=["metrics"])
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+Gauge(
+    "wellness_llm_in_flight", "LLM requests currently holding a concurrency slot", ["model"],
+    lambda: {model: s["in_flight"] for model, s in limiter_stats()["models"].items()},
+)
+Gauge(
+    "wellness_llm_queue_depth", "LLM requests waiting for a concurrency slot", ["model"],
+    lambda: {model: s["queue_depth"] for model, s in limiter_stats()["models"].items()},
+)
+Gauge(
+    "wellness_llm_breaker_state", "Circuit breaker per model (0=closed, 1=half_open, 2=open)", ["model"],
+    lambda: {model: BREAKER_STATES[s["breaker_state"]] for model, s in resilience_stats().items()},
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
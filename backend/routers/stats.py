@@ -0,0 +1,54 @@
+# backend/routers/stats.py
+# Runtime counters for the performance features (local classifiers, caches, ...).
+from fastapi import APIRouter
+from agents.local_intent import intent_stats
+from agents.router import router_stats
+from agents.prompt_context import prompt_stats
+from agents.groq_client import limiter_stats
+from agents.resilience import resilience_stats, routing_stats
+from agents.model_profiles import profiles
+from orchestrator.response_cache import response_cache_stats
+from orchestrator.memory_store import memory_store
+from orchestrator.summary_memory import summary_memory_stats
+from orchestrator.turn_index import turn_index
+from orchestrator.singleflight import singleflight_stats
+from orchestrator.turn_writer import turn_writer_stats
+from orchestrator.orchestrator import orchestrator_stats
+from routers.chat import sse_stats
+from database import db_cache_stats
+from utils.google_oauth import google_oauth_stats
+from utils.jwt_handler import jwt_cache_stats
+from utils.password_hash import password_hash_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("")
+def get_stats():
+    turns = orchestrator_stats()["turns"]
+    db_cache = db_cache_stats()
+    # only profile lookups sit on the chat path, so that is what a chat turn saves
+    db_cache["round_trips_saved_per_chat_turn"] = (
+        round(db_cache["profile"]["hits"] / turns, 4) if turns else 0.0
+    )
+    return {
+        "orchestrator": orchestrator_stats(),
+        "db_cache": db_cache,
+        "intent_classifier": intent_stats(),
+        "router": router_stats(),
+        "response_cache": response_cache_stats(),
+        "memory_store": memory_store.stats(),
+        "memory_summary": summary_memory_stats(),
+        "turn_index": turn_index.stats(),
+        "singleflight": singleflight_stats(),
+        "turn_writer": turn_writer_stats(),
+        "sse": sse_stats(),
+        "prompt_tokens": prompt_stats(),
+        "llm_limiter": limiter_stats(),
+        "llm_resilience": resilience_stats(),
+        "llm_profiles": profiles(),
+        "llm_routing": routing_stats(),
+        "password_hash": password_hash_stats(),
+        "jwt_claims_cache": jwt_cache_stats(),
+        "google_oauth": google_oauth_stats(),
+    }
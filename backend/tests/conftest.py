@@ -0,0 +1,10 @@
+# backend/tests/conftest.py
+# Run from backend/:  python -m pytest -q
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# nothing here may reach a real Mongo or Groq
+os.environ.setdefault("MONGODB_URI", "memory://tests")
+os.environ.setdefault("GROQ_API_KEY", "test")
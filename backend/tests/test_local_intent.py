@@ -0,0 +1,18 @@
+# backend/tests/test_local_intent.py
+# Refusals the local intent stages (agents/local_intent) may make without the LLM.
+from agents.local_intent import local_classify
+
+
+def _refused(message: str) -> bool:
+    decision = local_classify(message)
+    return decision is not None and decision["is_wellness"] is False
+
+
+def test_homework_alone_is_not_refused_locally():
+    assert not _refused("help me with my homework on the nervous system")
+    assert not _refused("can you help with my biology homework about digestion")
+
+
+def test_clear_off_topic_is_refused_locally():
+    assert _refused("write a python script for my homework")
+    assert _refused("what are the lyrics of this song")
@@ -0,0 +1,121 @@
+# backend/tests/test_resilience.py
+# agents/resilience: call deadlines vs. the limiter queue, and the circuit breaker.
+import asyncio
+
+from agents import groq_client
+from agents.groq_client import PooledLLM, _TokenBucket
+from agents.model_profiles import ModelProfile
+from agents.resilience import (
+    BREAKER_COOLDOWN_SECONDS,
+    BREAKER_FAILURE_THRESHOLD,
+    ResilientLLM,
+    _Health,
+    _health_for,
+    begin_turn,
+)
+from benchmarks.stubs import StubLLM
+
+
+def _profile(model: str, timeout: float) -> ModelProfile:
+    return ModelProfile(model=model, max_tokens=16, temperature=0.0, timeout=timeout, latency_budget=10.0)
+
+
+def _limits(monkeypatch, rpm_burst: int = 0, rpm_per_second: float = 0.0) -> None:
+    """Fresh module buckets: an optional fast-refilling RPM bucket, no TPM limit."""
+    requests = _TokenBucket(rpm_burst)
+    requests.rate = rpm_per_second
+    monkeypatch.setattr(groq_client, "_requests_bucket", requests)
+    monkeypatch.setattr(groq_client, "_tokens_bucket", _TokenBucket(0))
+
+
+def test_limiter_queue_wait_is_not_a_provider_timeout(monkeypatch):
+    # 45 calls against a 5-request burst refilled at 50/s, and only 2 slots:
+    # the later calls queue for ~0.8 s, several times the per-call timeout
+    _limits(monkeypatch, rpm_burst=5, rpm_per_second=50)
+    pooled = PooledLLM("queue-test", StubLLM(latency=0.02, distribution="const"), concurrency=2)
+    llm = ResilientLLM(pooled, "IntentClassifier", "fallback", _profile("queue-test", timeout=0.1))
+
+    async def scenario():
+        budget = begin_turn(5.0)
+        answers = await asyncio.gather(*(llm.ainvoke("hello") for _ in range(45)))
+        return budget, answers
+
+    budget, answers = asyncio.run(scenario())
+    stats = _health_for("queue-test").stats()
+    assert stats["timeouts"] == 0
+    assert stats["failures"] == 0
+    assert stats["breaker_state"] == "closed"
+    assert not budget.degraded
+    assert all(a.content != "fallback" for a in answers)
+    # samples are provider time only, not time spent in the queue
+    assert stats["latency_p95_ms"] < 60
+
+
+def test_turn_deadline_in_queue_degrades_without_failure(monkeypatch):
+    _limits(monkeypatch)
+    pooled = PooledLLM("queue-deadline-test", StubLLM(latency=0.3, distribution="const"), concurrency=1)
+    llm = ResilientLLM(pooled, "IntentClassifier", "fallback", _profile("queue-deadline-test", timeout=1.0))
+
+    async def scenario():
+        budget = begin_turn(0.5)
+        answers = await asyncio.gather(*(llm.ainvoke("hello") for _ in range(3)))
+        return budget, answers
+
+    budget, answers = asyncio.run(scenario())
+    stats = _health_for("queue-deadline-test").stats()
+    assert [a.content == "fallback" for a in answers] == [False, True, True]
+    assert budget.degraded
+    assert stats["failures"] == 0
+    assert stats["turn_deadline_exceeded"] == 2
+    assert stats["breaker_state"] == "closed"
+
+
+def _open_breaker(model: str):
+    health = _Health(model)
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        assert health.allow()
+        health.failure(timed_out=True)
+    return health
+
+
+def test_breaker_opens_after_threshold_and_short_circuits():
+    health = _open_breaker("breaker-open-test")
+    assert health.state == "open"
+    assert not health.allow()
+    assert health.degraded("call", 10.0) == "breaker_open"
+    assert health.counters["breaker_opened"] == 1
+    assert health.counters["short_circuited"] == 1
+
+
+def test_breaker_lets_one_probe_through_and_closes_on_success():
+    health = _open_breaker("breaker-close-test")
+    health.opened_at -= BREAKER_COOLDOWN_SECONDS  # cooldown over
+
+    assert health.allow()          # the probe
+    assert health.state == "half_open"
+    assert not health.allow()      # only one probe at a time
+    health.success("call", 0.1)
+    assert health.state == "closed"
+    assert health.allow()
+    assert health.consecutive_failures == 0
+
+
+def test_failed_probe_reopens_breaker():
+    health = _open_breaker("breaker-reopen-test")
+    health.opened_at -= BREAKER_COOLDOWN_SECONDS
+
+    assert health.allow()
+    health.failure(timed_out=False)
+    assert health.state == "open"
+    assert not health.allow()
+    assert health.counters["breaker_opened"] == 2
+
+
+def test_abandoned_probe_frees_the_probe_slot():
+    health = _open_breaker("breaker-abandon-test")
+    health.opened_at -= BREAKER_COOLDOWN_SECONDS
+
+    assert health.allow()
+    health.abandon()  # caller cancelled: neither success nor failure
+    assert health.state == "half_open"
+    assert health.allow()
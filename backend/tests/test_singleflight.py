@@ -0,0 +1,92 @@
+# backend/tests/test_singleflight.py
+# Subscribers leaving a coalesced turn in orchestrator/singleflight.
+import asyncio
+
+from orchestrator import singleflight
+
+
+class _Turn:
+    """A slow astream_query stand-in that records whether it ran to the end."""
+
+    def __init__(self):
+        self.finished = False
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def events(self):
+        try:
+            yield {"type": "agent", "agent": "DietAgent"}
+            await self.release.wait()
+            yield {"type": "final", "answer": "eat well", "agents_used": ["DietAgent"], "llm_calls": 2}
+            self.finished = True
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def _collect(key, turn: _Turn, received: list):
+    async for event in singleflight.astream(key, "u1", None, turn.events):
+        received.append(event)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_one_subscriber_leaving_does_not_cancel_the_turn():
+    async def scenario():
+        turn = _Turn()
+        key = singleflight.flight_key("u1", "what should I eat?", "plan", None)
+        first, second = [], []
+        leaving = asyncio.ensure_future(_collect(key, turn, first))
+        staying = asyncio.ensure_future(_collect(key, turn, second))
+        await _settle()
+
+        leaving.cancel()
+        await asyncio.gather(leaving, return_exceptions=True)
+        turn.release.set()
+        await staying
+        return turn, first, second, key
+
+    turn, first, second, key = asyncio.run(scenario())
+    assert turn.finished and not turn.cancelled
+    assert [e["type"] for e in first] == ["agent"]
+    assert [e["type"] for e in second] == ["agent", "final"]
+    assert key not in singleflight._async_flights
+
+
+def test_last_subscriber_leaving_cancels_the_turn():
+    async def scenario():
+        turn = _Turn()
+        key = singleflight.flight_key("u1", "how do I sleep better?", "plan", None)
+        subscribers = [asyncio.ensure_future(_collect(key, turn, [])) for _ in range(2)]
+        await _settle()
+
+        for task in subscribers:
+            task.cancel()
+        await asyncio.gather(*subscribers, return_exceptions=True)
+        await _settle()
+        return turn, key
+
+    turn, key = asyncio.run(scenario())
+    assert turn.cancelled and not turn.finished
+    assert key not in singleflight._async_flights
+
+
+def test_late_joiner_replays_missed_events():
+    async def scenario():
+        turn = _Turn()
+        key = singleflight.flight_key("u1", "any tips for running?", "plan", None)
+        first, late = [], []
+        running = asyncio.ensure_future(_collect(key, turn, first))
+        await _settle()
+        joined = asyncio.ensure_future(_collect(key, turn, late))
+        await _settle()
+        turn.release.set()
+        await asyncio.gather(running, joined)
+        return first, late
+
+    first, late = asyncio.run(scenario())
+    assert first == late
+    assert [e["type"] for e in late] == ["agent", "final"]
@@ -0,0 +1,98 @@
+# backend/tests/test_slots.py
+# Slot accounting of agents/groq_client._Slots when async waiters are cancelled.
+import asyncio
+
+from agents.groq_client import _Slots
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_cancel_during_release_returns_slot_once():
+    async def scenario():
+        slots = _Slots(1)
+        await slots.aacquire()
+        waiter = asyncio.ensure_future(slots.aacquire())
+        await _settle()
+        assert slots.queued == 1
+
+        # cancelled waiter, then a release before the waiter task resumes
+        waiter.cancel()
+        slots.release()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return slots
+
+    slots = asyncio.run(scenario())
+    assert slots.in_use == 0
+    assert slots.queued == 0
+
+
+def test_cancel_after_grant_gives_slot_back():
+    async def scenario():
+        slots = _Slots(1)
+        await slots.aacquire()
+        waiter = asyncio.ensure_future(slots.aacquire())
+        await _settle()
+
+        # release hands the slot over; the cancel lands before the grant callback runs
+        slots.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return slots
+
+    slots = asyncio.run(scenario())
+    assert slots.in_use == 0
+    assert slots.queued == 0
+
+
+def test_cancelled_waiter_is_skipped_for_the_next_one():
+    async def scenario():
+        slots = _Slots(1)
+        await slots.aacquire()
+        first = asyncio.ensure_future(slots.aacquire())
+        second = asyncio.ensure_future(slots.aacquire())
+        await _settle()
+
+        first.cancel()
+        slots.release()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, timeout=1)
+        assert slots.in_use == 1
+        slots.release()
+        return slots
+
+    slots = asyncio.run(scenario())
+    assert slots.in_use == 0
+    assert slots.queued == 0
+
+
+def test_cap_holds_under_cancellation_churn():
+    async def scenario():
+        slots = _Slots(2)
+        peak = 0
+        holding = 0
+
+        async def worker(i: int):
+            nonlocal peak, holding
+            await slots.aacquire()
+            holding += 1
+            peak = max(peak, holding)
+            try:
+                await asyncio.sleep(0.001 * (i % 3))
+            finally:
+                holding -= 1
+                slots.release()
+
+        tasks = [asyncio.ensure_future(worker(i)) for i in range(60)]
+        await asyncio.sleep(0)
+        for task in tasks[::3]:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return slots, peak
+
+    slots, peak = asyncio.run(scenario())
+    assert peak <= 2
+    assert slots.in_use == 0
+    assert slots.queued == 0
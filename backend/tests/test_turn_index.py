@@ -0,0 +1,35 @@
+# backend/tests/test_turn_index.py
+# Size bounds of orchestrator/turn_index: per-user trimming and the total vector cap.
+from orchestrator import turn_index
+from orchestrator.turn_index import HashingEmbedder, TurnIndex
+
+
+def _turns(uid: str, n: int, start: int = 0) -> list[dict]:
+    return [{"_id": f"{uid}-{i}", "user_id": uid, "user_message": f"message {i} about sleep",
+             "assistant_response": "advice"} for i in range(start, start + n)]
+
+
+def test_writes_keep_total_vectors_under_the_cap():
+    index = TurnIndex(HashingEmbedder(dim=32), max_vectors=6)
+    index._install("old", index._build(_turns("old", 3)))
+    index._install("new", index._build(_turns("new", 3)))
+
+    index.add_turns(_turns("new", 2, start=3))
+
+    stats = index.stats()
+    assert stats["vectors"] <= 6
+    assert index._resident("old") is None      # least recently used goes first
+    assert index._resident("new").count == 5
+
+
+def test_trimmed_turns_leave_the_id_set(monkeypatch):
+    monkeypatch.setattr(turn_index, "TURN_INDEX_MAX_TURNS", 3)
+    index = TurnIndex(HashingEmbedder(dim=32))
+    index._install("u1", index._build([]))
+
+    index.add_turns(_turns("u1", 5))
+
+    user = index._resident("u1")
+    assert user.count == 3
+    assert user.ids == {"u1-2", "u1-3", "u1-4"}
+    assert user.turn_ids == ["u1-2", "u1-3", "u1-4"]
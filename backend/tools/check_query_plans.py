@@ -0,0 +1,116 @@
+# backend/tools/check_query_plans.py
+# Explain the hot queries of database.py against the configured MongoDB and
+# fail if any of them is planned as a collection scan (COLLSCAN).
+# Run it in CI / after deploys, next to a real database with representative
+# indexes; --create-indexes applies database.ensure_indexes() first.
+#
+# Usage (from backend/):
+#   python -m tools.check_query_plans [--create-indexes]
+# Exit code 1 if any query uses COLLSCAN, 2 if the database is unreachable.
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson.objectid import ObjectId  # noqa: E402
+
+import database  # noqa: E402
+from config import MEMORY_BACKEND, RESPONSE_CACHE_MONGO  # noqa: E402
+
+SAMPLE_USER = "000000000000000000000000"
+SAMPLE_TIMESTAMP = "2025-01-01T00:00:00"
+
+
+def hot_queries():
+    """(description, cursor) for every query on the request path, shaped like database.py issues them."""
+    users = database.users_collection
+    profiles = database.profiles_collection
+    turns = database.conversation_collection
+    queries = [
+        ("users by email (login, signup, google)", users.find({"email": "someone@example.com"}).limit(1)),
+        ("users by _id (get_user_by_id)", users.find({"_id": ObjectId(SAMPLE_USER)}).limit(1)),
+        ("profiles by user_id (get_profile)", profiles.find({"user_id": SAMPLE_USER}).limit(1)),
+        (
+            "turns: latest N for a user (history, memory rehydration)",
+            turns.find({"user_id": SAMPLE_USER}, database.TURN_FIELDS)
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(10),
+        ),
+        (
+            "turns: legacy document check (migrate_legacy_history)",
+            turns.find({"user_id": SAMPLE_USER, "turns": {"$exists": True}}).limit(1),
+        ),
+        (
+            "turns: history page after a cursor (get_conversation_page)",
+            turns.find({
+                "user_id": SAMPLE_USER,
+                "timestamp": {"$gte": SAMPLE_TIMESTAMP},
+                "$or": [
+                    {"timestamp": {"$gt": SAMPLE_TIMESTAMP}},
+                    {"timestamp": SAMPLE_TIMESTAMP, "_id": {"$gt": ObjectId(SAMPLE_USER)}},
+                ],
+            })
+            .sort([("timestamp", 1), ("_id", 1)])
+            .limit(51),
+        ),
+    ]
+    if MEMORY_BACKEND == "mongo":
+        memory = database.conversation_memory_collection
+        queries.append((
+            "conversation memory by user_id (mongo memory backend)",
+            memory.find({"user_id": SAMPLE_USER}, database.MEMORY_FIELDS).limit(1),
+        ))
+    if RESPONSE_CACHE_MONGO:
+        cache = database.response_cache_collection
+        queries.append(("response cache by key", cache.find({"key": "k"}, {"_id": 0}).limit(1)))
+    return queries
+
+
+def _stages(plan) -> list[str]:
+    """Every stage name in an explain plan tree (classic and slot-based engine shapes)."""
+    found = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.append(plan["stage"])
+        for value in plan.values():
+            found.extend(_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            found.extend(_stages(item))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query is planned as a collection scan")
+    parser.add_argument("--create-indexes", action="store_true", help="run database.ensure_indexes() first")
+    args = parser.parse_args()
+
+    if not database.connect():
+        print("Database not connected; check MONGODB_URI.")
+        sys.exit(2)
+    if args.create_indexes:
+        database.ensure_indexes()
+
+    scans = 0
+    for description, cursor in hot_queries():
+        winning = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = _stages(winning)
+        if "COLLSCAN" in stages:
+            scans += 1
+            verdict = "COLLSCAN"
+        elif stages == ["EOF"]:
+            verdict = "skipped (collection does not exist yet)"
+        else:
+            verdict = "ok"
+        print(f"{verdict:<10} {description}: {' <- '.join(stages)}")
+
+    if scans:
+        print(f"{scans} hot queries use a collection scan; run with --create-indexes or add the missing index.")
+        sys.exit(1)
+    print("No collection scans.")
+
+
+if __name__ == "__main__":
+    main()
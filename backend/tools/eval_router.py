@@ -0,0 +1,118 @@
+# backend/tools/eval_router.py
+# Offline evaluation of the local agent router against the supervisor LLM.
+#
+# Reference labels are the agents_used the supervisor LLM actually chose
+# (stored in conversation_turns or a JSONL export; turns the router routed
+# itself are excluded by load_routing_examples). Reports:
+# - coverage: share of turns the router answers without deferring to the LLM
+# - agreement: exact agent-set match on the turns it answers
+# - per-agent precision / recall
+# - local routing latency (p50/p95/p99)
+# With --live N it also calls the LLM planner on N turns and reports its
+# latency and agreement, for a like-for-like comparison.
+#
+# Usage (from backend/):
+#   python -m tools.eval_router
+#   python -m tools.eval_router --jsonl turns.jsonl --live 20
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.router import MODEL_PATH, LocalRouter  # noqa: E402
+from agents.supervisor_agent import AGENT_NAMES  # noqa: E402
+from tools.train_router import load_routing_examples, split  # noqa: E402
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _agent_set(agents) -> list[str]:
+    return [a for a in AGENT_NAMES if a in agents]
+
+
+async def _live_planner(sample) -> tuple[list[float], int]:
+    """Plan each turn with the LLM planner, one at a time (one event loop for all calls)."""
+    from agents.supervisor_agent import aplan_agents
+
+    latencies: list[float] = []
+    agreed = 0
+    for text, agents in sample:
+        start = time.perf_counter()
+        plan = await aplan_agents(text, None, {})
+        latencies.append(time.perf_counter() - start)
+        agreed += int(_agent_set(plan) == _agent_set(agents))
+    return latencies, agreed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local agent router")
+    parser.add_argument("--jsonl", help="read examples from a JSONL export instead of Mongo")
+    parser.add_argument("--holdout", type=float, default=0.2, help="must match the training split")
+    parser.add_argument("--seed", type=int, default=7, help="must match the training split")
+    parser.add_argument("--all", action="store_true", help="evaluate on every turn, not only the holdout")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--live", type=int, default=0, help="also query the LLM planner on N turns")
+    args = parser.parse_args()
+
+    router = LocalRouter.load(args.model)
+    if router is None:
+        raise SystemExit(f"No router model at {args.model}. Run python -m tools.train_router first.")
+
+    examples = load_routing_examples(args.jsonl)
+    if not args.all:
+        _, examples = split(examples, args.holdout, args.seed)
+    if not examples:
+        raise SystemExit("No routed turns to evaluate.")
+
+    latencies: list[float] = []
+    covered = agreed = 0
+    tp = {a: 0 for a in AGENT_NAMES}
+    fp = {a: 0 for a in AGENT_NAMES}
+    fn = {a: 0 for a in AGENT_NAMES}
+
+    for text, agents in examples:
+        start = time.perf_counter()
+        decision = router.route(text, None, {})
+        latencies.append(time.perf_counter() - start)
+        if decision is None:
+            continue
+
+        covered += 1
+        expected = set(agents)
+        predicted = set(decision.agents)
+        agreed += int(predicted == expected)
+        for agent in AGENT_NAMES:
+            tp[agent] += int(agent in predicted and agent in expected)
+            fp[agent] += int(agent in predicted and agent not in expected)
+            fn[agent] += int(agent not in predicted and agent in expected)
+
+    n = len(examples)
+    print(f"turns evaluated:   {n}")
+    print(f"coverage:          {covered / n:.3f}  (answered locally at min_confidence={router.min_confidence})")
+    print(f"agreement:         {agreed / covered:.3f}" if covered else "agreement:         n/a")
+    print(f"local latency ms:  p50={percentile(latencies, 50) * 1000:.3f} "
+          f"p95={percentile(latencies, 95) * 1000:.3f} p99={percentile(latencies, 99) * 1000:.3f}")
+    print(f"\n{'agent':<16}{'precision':>10}{'recall':>10}")
+    for agent in AGENT_NAMES:
+        precision = tp[agent] / (tp[agent] + fp[agent]) if tp[agent] + fp[agent] else 0.0
+        recall = tp[agent] / (tp[agent] + fn[agent]) if tp[agent] + fn[agent] else 0.0
+        print(f"{agent:<16}{precision:>10.3f}{recall:>10.3f}")
+
+    if args.live:
+        sample = examples[: args.live]
+        live_latencies, live_agreed = asyncio.run(_live_planner(sample))
+        print(f"\nLLM planner on {len(sample)} turns: agreement with history {live_agreed / len(sample):.3f}, "
+              f"latency ms p50={percentile(live_latencies, 50) * 1000:.0f} "
+              f"p95={percentile(live_latencies, 95) * 1000:.0f}")
+
+if __name__ == "__main__":
+    main()
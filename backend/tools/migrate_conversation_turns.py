@@ -0,0 +1,48 @@
+# backend/tools/migrate_conversation_turns.py
+# Online migration of legacy single-document histories
+# ({user_id, turns: [...]}) to one document per turn.
+#
+# Safe to run while the API is serving traffic: every turn is upserted by
+# (user_id, legacy_seq), so a re-run or a concurrent read-time migration
+# never duplicates turns, and the legacy document is deleted only after its
+# turns are written. New turns are already stored per-turn by the API.
+#
+# Usage (from backend/):
+#   python -m tools.migrate_conversation_turns [--dry-run]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split legacy conversation documents into per-turn documents")
+    parser.add_argument("--dry-run", action="store_true", help="only count legacy documents")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between users (throttle)")
+    args = parser.parse_args()
+
+    database.ensure_conversation_indexes()
+
+    users = list(database.iter_legacy_history_users())
+    print(f"{len(users)} users with legacy history documents")
+    if args.dry_run:
+        return
+
+    moved_total = 0
+    for i, user_id in enumerate(users, 1):
+        moved_total += database.migrate_legacy_history(user_id)
+        if i % 100 == 0:
+            print(f"  {i}/{len(users)} users, {moved_total} turns migrated")
+        if args.pause:
+            time.sleep(args.pause)
+
+    print(f"Done: {len(users)} users, {moved_total} turns migrated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# backend/tools/train_intent_model.py
+# Retrain agents/intent_model.json (local intent fast path).
+#
+# Training data:
+# - a small built-in seed corpus (always included, keeps the model sane on day one)
+# - every turn in the conversation_turns collection:
+#     agents_used non-empty            -> wellness
+#     canned non-wellness response     -> not wellness
+#   except turns whose intent was not decided by the LLM classifier
+#   (decided_by.intent lexicon / model / cache / default): training on the
+#   local classifier's own decisions would only reinforce its mistakes
+#
+# Usage (from backend/):
+#   python -m tools.train_intent_model                # seed + Mongo
+#   python -m tools.train_intent_model --seed-only    # no database needed
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.text_features import N_FEATURES, hashed_ngrams  # noqa: E402
+from agents.local_intent import MODEL_PATH  # noqa: E402
+
+NON_WELLNESS_PREFIX = "This message is not related to wellness."
+
+SEED_WELLNESS = [
+    "I feel tired all the time even after sleeping",
+    "how much water should I drink every day",
+    "tips for better sleep",
+    "I get headaches in the afternoon at work",
+    "what should I eat before a workout",
+    "I'm not seeing results from the gym",
+    "how can I lose belly fat",
+    "I feel dizzy when I stand up quickly",
+    "my back hurts from sitting all day",
+    "how do I build a morning routine",
+    "I can't focus and feel burned out",
+    "is it okay to skip breakfast",
+    "how many hours should I sleep",
+    "I feel bloated after dinner",
+    "suggest a vegetarian high protein meal plan",
+    "how do I stay consistent with exercise",
+    "I have been feeling anxious lately",
+    "what are good stretches for neck pain",
+    "how can I improve my stamina for running",
+    "I wake up in the middle of the night",
+    "how do I reduce sugar cravings",
+    "my knees hurt when I do squats",
+    "I feel low on energy in the evening",
+    "what can I do to relax after work",
+    "how much protein do I need to gain muscle",
+    "I keep snacking late at night",
+    "how do I fix my posture",
+    "I feel stressed about exams and can't sleep",
+    "best foods for digestion",
+    "how often should I work out per week",
+    "I have cramps after running",
+    "how do I start meditating",
+    "I feel sluggish after lunch",
+    "what's a healthy weight for my height",
+    "how do I drink more water during the day",
+    "I get out of breath climbing stairs",
+    "how can I manage my time to fit in workouts",
+    "I feel sore for days after training",
+    "what should a vegan eat for iron",
+    "can you help me with my fitness goals",
+    "I am always hungry",
+    "my heart races when I'm nervous",
+    "how to recover from a long day on my feet",
+    "I want to feel more active",
+    "help me feel less overwhelmed",
+    "I skipped meals today and feel weak",
+    "is coffee bad for my sleep",
+    "how do I build a habit of walking daily",
+]
+
+SEED_OFF_TOPIC = [
+    "what's the weather in London tomorrow",
+    "write a python function to reverse a list",
+    "who won the football match last night",
+    "translate hello into French",
+    "what is the capital of Australia",
+    "tell me a joke",
+    "write a poem about the ocean",
+    "how do I fix this javascript bug",
+    "recommend a good movie for tonight",
+    "what is the price of bitcoin",
+    "solve this math equation for x",
+    "who is the president of the united states",
+    "explain how sql joins work",
+    "which phone should I buy",
+    "what are the lyrics of this song",
+    "help me with my history homework",
+    "how do I install minecraft mods",
+    "what time is it in Tokyo",
+    "write an email to my landlord",
+    "summarize the plot of Hamlet",
+    "how do I center a div in css",
+    "what's the best laptop for gaming",
+    "who wrote pride and prejudice",
+    "convert 50 dollars to euros",
+    "how does a car engine work",
+    "plan a trip to Paris",
+    "what is machine learning",
+    "make a playlist for a birthday party",
+    "how do I reset my router",
+    "what's on netflix this week",
+    "explain quantum computing simply",
+    "how do I file my taxes",
+    "what is the score of the cricket game",
+    "recommend a fantasy book series",
+    "how many planets are in the solar system",
+    "how do I learn to play guitar",
+    "write a cover letter for a software job",
+    "what does this error message mean in my code",
+    "who invented the telephone",
+    "how do airplanes stay in the air",
+    "what stocks should I buy",
+    "help me name my startup",
+    "what's the difference between http and https",
+    "how do I make my website faster",
+    "what year did world war two end",
+    "how do I clean my keyboard",
+    "explain blockchain",
+    "what's a good name for a cat",
+]
+
+
+def load_mongo_examples():
+    from database import iter_conversation_turns
+
+    examples = []
+    for _, turn in iter_conversation_turns():
+        message = turn.get("user_message")
+        if not message:
+            continue
+        # turns stored before decided_by existed carry no source and are kept
+        if (turn.get("decided_by") or {}).get("intent", "llm") != "llm":
+            continue
+        if turn.get("agents_used"):
+            examples.append((message, 1))
+        elif (turn.get("assistant_response") or "").startswith(NON_WELLNESS_PREFIX):
+            examples.append((message, 0))
+    return examples
+
+
+def train(examples, epochs: int, lr: float, l2: float, seed: int):
+    """Plain SGD logistic regression on sparse hashed features."""
+    rng = random.Random(seed)
+    data = [(hashed_ngrams(text), label) for text, label in examples]
+    weights: dict[int, float] = {}
+    bias = 0.0
+
+    for epoch in range(epochs):
+        rng.shuffle(data)
+        for features, label in data:
+            z = bias + sum(weights.get(i, 0.0) * v for i, v in features.items())
+            p = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+            grad = p - label
+            bias -= lr * grad
+            for i, v in features.items():
+                w = weights.get(i, 0.0)
+                weights[i] = w - lr * (grad * v + l2 * w)
+
+    return weights, bias
+
+
+def evaluate(weights, bias, examples):
+    correct = 0
+    for text, label in examples:
+        z = bias + sum(weights.get(i, 0.0) * v for i, v in hashed_ngrams(text).items())
+        correct += int((z > 0) == bool(label))
+    return correct / len(examples) if examples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent model")
+    parser.add_argument("--seed-only", action="store_true", help="skip conversation_turns")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--lr", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    examples = [(t, 1) for t in SEED_WELLNESS] + [(t, 0) for t in SEED_OFF_TOPIC]
+    if not args.seed_only:
+        mongo_examples = load_mongo_examples()
+        print(f"Loaded {len(mongo_examples)} examples from conversation_turns")
+        examples += mongo_examples
+
+    weights, bias = train(examples, args.epochs, args.lr, args.l2, args.seed)
+    print(f"Trained on {len(examples)} examples, training accuracy {evaluate(weights, bias, examples):.3f}")
+
+    model = {
+        "n_features": N_FEATURES,
+        "bias": round(bias, 6),
+        "weights": {str(i): round(w, 6) for i, w in weights.items() if abs(w) > 1e-6},
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(model, f, separators=(",", ":"), sort_keys=True)
+    print(f"Wrote {len(model['weights'])} weights to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# backend/tools/train_router.py
+# Train agents/router_model.npz (LocalRouter) from historical routing decisions.
+#
+# Every conversation turn with a non-empty agents_used is one multi-label
+# example: the message text -> which of the four agents the supervisor LLM ran.
+# Turns the local router routed itself (decided_by.routing != "supervisor")
+# are skipped, or retraining would learn from the router's own decisions.
+#
+# Usage (from backend/):
+#   python -m tools.train_router                       # read conversation_turns
+#   python -m tools.train_router --jsonl turns.jsonl   # offline export, one
+#       {"user_message": ..., "agents_used": [...]} object per line
+
+import argparse
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.router import MODEL_PATH, ROUTER_N_FEATURES, LocalRouter, featurize  # noqa: E402
+from agents.supervisor_agent import AGENT_NAMES  # noqa: E402
+
+
+def load_routing_examples(jsonl: str | None = None) -> list[tuple[str, list[str]]]:
+    """(message, agents_used) pairs of supervisor-routed turns, from a JSONL export or conversation_turns."""
+    if jsonl:
+        with open(jsonl, "r", encoding="utf-8") as f:
+            turns = [json.loads(line) for line in f if line.strip()]
+    else:
+        from database import iter_conversation_turns
+
+        turns = [turn for _, turn in iter_conversation_turns()]
+
+    examples = []
+    for turn in turns:
+        # turns stored before decided_by existed were all routed by the supervisor;
+        # newer ones must say so explicitly (cache replays, local routes are skipped)
+        decided_by = turn.get("decided_by")
+        if decided_by is not None and decided_by.get("routing") != "supervisor":
+            continue
+        message = turn.get("user_message")
+        agents = [a for a in (turn.get("agents_used") or []) if a in AGENT_NAMES]
+        if message and agents:
+            examples.append((message, agents))
+    return examples
+
+
+def split(examples, holdout: float, seed: int):
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    cut = int(len(shuffled) * (1 - holdout))
+    return shuffled[:cut], shuffled[cut:]
+
+
+def label_matrix(examples) -> np.ndarray:
+    y = np.zeros((len(examples), len(AGENT_NAMES)), dtype=np.float32)
+    for row, (_, agents) in enumerate(examples):
+        for agent in agents:
+            y[row, AGENT_NAMES.index(agent)] = 1.0
+    return y
+
+
+def compute_idf(texts: list[str], n_features: int, batch_size: int) -> np.ndarray:
+    df = np.zeros(n_features, dtype=np.float64)
+    for start in range(0, len(texts), batch_size):
+        df += (featurize(texts[start:start + batch_size], n_features) > 0).sum(axis=0)
+    return (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+
+def train(examples, epochs: int, lr: float, l2: float, batch_size: int, seed: int) -> LocalRouter:
+    """Mini-batch gradient descent, one sigmoid output per agent."""
+    texts = [text for text, _ in examples]
+    y = label_matrix(examples)
+    idf = compute_idf(texts, ROUTER_N_FEATURES, batch_size)
+
+    router = LocalRouter(
+        weights=np.zeros((ROUTER_N_FEATURES, len(AGENT_NAMES)), dtype=np.float32),
+        bias=np.zeros(len(AGENT_NAMES), dtype=np.float32),
+        idf=idf,
+        labels=list(AGENT_NAMES),
+    )
+
+    rng = np.random.default_rng(seed)
+    order = np.arange(len(texts))
+    for epoch in range(epochs):
+        rng.shuffle(order)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x = router.transform([texts[i] for i in batch])
+            p = 1.0 / (1.0 + np.exp(-np.clip(x @ router.weights + router.bias, -30, 30)))
+            grad = p - y[batch]
+            router.weights -= lr * (x.T @ grad / len(batch) + l2 * router.weights)
+            router.bias -= lr * grad.mean(axis=0)
+
+    return router
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local agent router")
+    parser.add_argument("--jsonl", help="read examples from a JSONL export instead of Mongo")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction kept out for a quick report")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--lr", type=float, default=10.0)
+    parser.add_argument("--l2", type=float, default=1e-5)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    examples = load_routing_examples(args.jsonl)
+    if len(examples) < 20:
+        raise SystemExit(f"Only {len(examples)} routed turns found; need at least 20 to train.")
+
+    train_set, holdout_set = split(examples, args.holdout, args.seed)
+    router = train(train_set, args.epochs, args.lr, args.l2, args.batch_size, args.seed)
+
+    if holdout_set:
+        exact = 0
+        for text, agents in holdout_set:
+            predicted = {label for label, p in zip(router.labels, router.predict_proba(text)) if p >= 0.5}
+            exact += int(predicted == set(agents))
+        print(f"Holdout exact-set agreement: {exact / len(holdout_set):.3f} ({len(holdout_set)} turns)")
+
+    router.save(args.out)
+    print(f"Trained on {len(train_set)} turns, wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# backend/utils/google_oauth.py
+# Google OAuth calls made by routers/google_auth.py.
+#
+# - one shared httpx.AsyncClient (keep-alive pool, timeouts) for every callback
+# - the id_token returned by the code exchange is verified locally against
+#   Google's signing keys (JWKS, cached for the response's max-age), so the
+#   separate userinfo request is no longer needed
+# - if the keys cannot be fetched, or PyJWT has no RSA support (the
+#   `cryptography` package), the userinfo endpoint is used as before
+import asyncio
+import re
+import time
+
+import httpx
+import jwt
+from jwt.algorithms import has_crypto
+
+from config import (
+    GOOGLE_CLIENT_ID,
+    GOOGLE_CLIENT_SECRET,
+    GOOGLE_TOKEN_URL,
+    GOOGLE_USERINFO_URL,
+    GOOGLE_JWKS_URL,
+    GOOGLE_HTTP_TIMEOUT,
+    GOOGLE_JWKS_TTL_SECONDS,
+)
+
+ISSUERS = ("https://accounts.google.com", "accounts.google.com")
+# an unknown key id triggers a JWKS refetch at most this often (Google rotates keys)
+JWKS_MIN_REFRESH_SECONDS = 60
+# clock skew tolerated on exp / iat
+ID_TOKEN_LEEWAY_SECONDS = 30
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+if not has_crypto:
+    print("WARNING: cryptography not installed; Google id_tokens are checked via the userinfo endpoint.")
+
+
+class GoogleOAuthError(Exception):
+    """Google rejected the exchange or returned something we cannot trust."""
+
+
+_client: httpx.AsyncClient | None = None
+_jwks = {"keys": {}, "expires_at": 0.0, "fetched_at": float("-inf")}
+_jwks_lock = asyncio.Lock()
+_stats = {"callbacks": 0, "id_token_verified": 0, "userinfo_fallbacks": 0, "jwks_fetches": 0}
+
+
+def _http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GOOGLE_HTTP_TIMEOUT, connect=min(GOOGLE_HTTP_TIMEOUT, 5.0)),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    """Close the shared client (application shutdown)."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+# -------------------------------------------------------------------
+# JWKS CACHE + ID TOKEN VERIFICATION
+# -------------------------------------------------------------------
+
+async def _refresh_jwks() -> None:
+    resp = await _http_client().get(GOOGLE_JWKS_URL)
+    resp.raise_for_status()
+    keys = {}
+    for jwk in resp.json().get("keys", []):
+        try:
+            keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+        except Exception as e:
+            print("WARNING: skipping unusable Google signing key:", repr(e))
+    match = _MAX_AGE_RE.search(resp.headers.get("cache-control", ""))
+    ttl = float(match.group(1)) if match else GOOGLE_JWKS_TTL_SECONDS
+    now = time.monotonic()
+    _jwks.update(keys=keys, expires_at=now + ttl, fetched_at=now)
+    _stats["jwks_fetches"] += 1
+
+
+async def _signing_key(kid: str | None):
+    key = _jwks["keys"].get(kid)
+    if key is not None and time.monotonic() < _jwks["expires_at"]:
+        return key
+    async with _jwks_lock:
+        # another callback may have refreshed while we waited
+        key = _jwks["keys"].get(kid)
+        fresh = time.monotonic() < _jwks["expires_at"]
+        if key is not None and fresh:
+            return key
+        if not fresh or time.monotonic() - _jwks["fetched_at"] >= JWKS_MIN_REFRESH_SECONDS:
+            try:
+                await _refresh_jwks()
+            except httpx.HTTPError:
+                # expired keys are still better than failing the login
+                if key is None:
+                    raise
+                print("WARNING: Google JWKS refresh failed; using the cached keys.")
+                return key
+        return _jwks["keys"].get(kid)
+
+
+async def verify_id_token(id_token: str) -> dict:
+    """Claims of a Google-signed id_token issued for our client id (raises jwt.InvalidTokenError)."""
+    kid = jwt.get_unverified_header(id_token).get("kid")
+    key = await _signing_key(kid)
+    if key is None:
+        raise jwt.InvalidTokenError(f"unknown signing key {kid!r}")
+    return jwt.decode(
+        id_token, key, algorithms=["RS256"], audience=GOOGLE_CLIENT_ID,
+        issuer=ISSUERS, leeway=ID_TOKEN_LEEWAY_SECONDS,
+    )
+
+
+# -------------------------------------------------------------------
+# CALLBACK FLOW
+# -------------------------------------------------------------------
+
+async def exchange_code(code: str, redirect_uri: str | None) -> dict:
+    resp = await _http_client().post(GOOGLE_TOKEN_URL, data={
+        "code": code,
+        "client_id": GOOGLE_CLIENT_ID,
+        "client_secret": GOOGLE_CLIENT_SECRET,
+        "redirect_uri": redirect_uri,
+        "grant_type": "authorization_code",
+    })
+    if resp.status_code != 200:
+        raise GoogleOAuthError("Failed to obtain tokens from Google")
+    return resp.json()
+
+
+async def fetch_userinfo(access_token: str) -> dict:
+    resp = await _http_client().get(GOOGLE_USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"})
+    if resp.status_code != 200:
+        raise GoogleOAuthError("Failed to fetch user info from Google")
+    return resp.json()
+
+
+async def fetch_identity(code: str, redirect_uri: str | None) -> dict:
+    """Exchange the authorization code and return the user's claims (email, name, ...)."""
+    _stats["callbacks"] += 1
+    try:
+        tokens = await exchange_code(code, redirect_uri)
+    except httpx.HTTPError:
+        raise GoogleOAuthError("Failed to obtain tokens from Google")
+
+    id_token = tokens.get("id_token")
+    if id_token and has_crypto:
+        try:
+            claims = await verify_id_token(id_token)
+            _stats["id_token_verified"] += 1
+            return claims
+        except httpx.HTTPError as e:
+            print("WARNING: Google JWKS unavailable, using userinfo instead:", repr(e))
+        except jwt.InvalidTokenError as e:
+            raise GoogleOAuthError(f"Invalid id_token from Google: {e}")
+
+    access_token = tokens.get("access_token")
+    if not access_token:
+        raise GoogleOAuthError("No access token in Google response")
+    _stats["userinfo_fallbacks"] += 1
+    try:
+        return await fetch_userinfo(access_token)
+    except httpx.HTTPError:
+        raise GoogleOAuthError("Failed to fetch user info from Google")
+
+
+def google_oauth_stats() -> dict:
+    return {**_stats, "jwks_keys": len(_jwks["keys"]),
+            "jwks_expires_in": max(0.0, round(_jwks["expires_at"] - time.monotonic(), 1))}
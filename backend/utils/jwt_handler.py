@@ -2,6 +2,14 @@
 import jwt
 from datetime import datetime, timedelta
 import os
+import time
+from typing import Optional
+
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from config import JWT_CLAIMS_CACHE_SIZE, JWT_CLAIMS_CACHE_TTL_SECONDS
+from utils.ttl_cache import TTLCache
 
 # Read from .env file
 JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "fallback-key-123")
@@ -17,16 +25,54 @@ def create_jwt_token(user_id: int):
     token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=ALGORITHM)
     return token
 
+# Verified claims per token, so a client sending the same bearer token on
+# every request pays the signature check once. An entry never outlives the
+# token's exp; invalid tokens are not cached (they cannot evict good ones).
+_claims_cache = TTLCache(JWT_CLAIMS_CACHE_SIZE, JWT_CLAIMS_CACHE_TTL_SECONDS)
+
+
 def decode_jwt_token(token: str):
     """Decode and verify JWT token"""
+    cached = _claims_cache.get(token)
+    if cached is not None:
+        return dict(cached)
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    ttl = JWT_CLAIMS_CACHE_TTL_SECONDS
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _claims_cache.set(token, dict(payload), ttl=ttl)
+    return payload
 
 def verify_jwt_token(token: str):
     """Verify if token is valid"""
-    return decode_jwt_token(token)
\ No newline at end of file
+    return decode_jwt_token(token)
+
+
+def jwt_cache_stats() -> dict:
+    return _claims_cache.stats()
+
+
+# -------------------------------------------------------------------
+# FASTAPI DEPENDENCY
+# -------------------------------------------------------------------
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+# async so FastAPI calls it on the event loop instead of a threadpool worker
+async def bearer_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[str]:
+    """user_id from a valid `Authorization: Bearer <jwt>` header, else None."""
+    if credentials is None:
+        return None
+    payload = decode_jwt_token(credentials.credentials)
+    if payload and payload.get("user_id"):
+        return str(payload["user_id"])
+    return None
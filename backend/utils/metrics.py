@@ -0,0 +1,218 @@
+# backend/utils/metrics.py
+# Minimal in-process metrics registry rendered in the Prometheus text format.
+#
+# Only counters and histograms (plus callback gauges for values that already
+# live elsewhere, e.g. limiter queue depth). Each observation is one dict
+# lookup, a bisect and a short lock, cheap enough to keep on in production;
+# METRICS_ENABLED=false turns recording into a no-op.
+#
+#   STAGE = Histogram("wellness_stage_duration_seconds", "...", ["stage"])
+#   with STAGE.labels("intent").time():
+#       ...
+#   render()  ->  text for GET /metrics
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Sequence
+
+from config import METRICS_ENABLED
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; covers local stages (sub-millisecond) up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: list = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric) -> None:
+    with _registry_lock:
+        if any(m.name == metric.name for m in _registry):
+            raise ValueError(f"metric {metric.name} already registered")
+        _registry.append(metric)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def labels(self, *values):
+        """Child for one combination of label values (created on first use)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+# -------------------------------------------------------------------
+# COUNTER
+# -------------------------------------------------------------------
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        """Shortcut for a counter without labels."""
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+# -------------------------------------------------------------------
+# HISTOGRAM
+# -------------------------------------------------------------------
+
+class _Timer:
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._started)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the elapsed wall time in seconds."""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Shortcut for a histogram without labels."""
+        self.labels().observe(value)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+# -------------------------------------------------------------------
+# CALLBACK GAUGE (value computed at scrape time)
+# -------------------------------------------------------------------
+
+class Gauge(_Metric):
+    """fn() returns {label values tuple: value}; () for a gauge without labels."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 fn: Callable[[], dict]):
+        self.fn = fn
+        super().__init__(name, documentation, labelnames)
+
+    def _samples(self):
+        try:
+            values = self.fn()
+        except Exception as e:
+            print(f"WARNING: metrics gauge {self.name} failed: {e}")
+            return
+        for key, value in values.items():
+            key = key if isinstance(key, tuple) else (key,)
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(m.render() for m in metrics) + "\n"
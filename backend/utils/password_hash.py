@@ -1,9 +1,130 @@
+# backend/utils/password_hash.py
+# pbkdf2_sha256 password hashing.
+#
+# hash_password / verify_password are the plain blocking calls (~20 ms of CPU
+# at the default rounds). The /auth routes use ahash_password /
+# averify_password instead, which run them in a small dedicated process pool:
+# a login storm then costs PASSWORD_HASH_WORKERS cores, not the threadpool
+# slots and GIL time the chat requests need.
+# - bounded: at most PASSWORD_HASH_MAX_PENDING jobs wait for a worker; past
+#   that PasswordHashBusy is raised (the routes answer 503)
+# - PASSWORD_HASH_WORKERS=0 runs the jobs in a thread instead
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+from config import PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+from utils.metrics import Histogram
+
+# the rounds are stored inside every hash, so changing them only affects new hashes
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"], deprecated="auto", pbkdf2_sha256__rounds=PASSWORD_HASH_ROUNDS
+)
+
+HASH_SECONDS = Histogram(
+    "wellness_password_hash_seconds", "Password hash/verify time including the wait for a worker", ["op"]
+)
+
+
+class PasswordHashBusy(RuntimeError):
+    """Too many hash/verify jobs are already waiting for a worker."""
+
 
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(password: str, hash_val: str):
     return pwd_context.verify(password, hash_val)
+
+
+# -------------------------------------------------------------------
+# PROCESS POOL (used by the async /auth routes)
+# -------------------------------------------------------------------
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, PASSWORD_HASH_MAX_PENDING))
+_stats = {"jobs": 0, "rejected": 0, "pool_restarts": 0}
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process already runs threads (turn
+            # writer, Mongo monitor) and a forked child can inherit held locks
+            _pool = ProcessPoolExecutor(
+                PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+            _stats["pool_restarts"] += 1
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run(op: str, fn, *args):
+    if not _slots.acquire(blocking=False):
+        _stats["rejected"] += 1
+        raise PasswordHashBusy(f"{PASSWORD_HASH_MAX_PENDING} password jobs already pending")
+    _stats["jobs"] += 1
+    started = time.perf_counter()
+    try:
+        pool = _get_pool()
+        if pool is None:
+            return await asyncio.to_thread(fn, *args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM-killed): start a fresh pool and retry once
+            _discard_pool(pool)
+            return await loop.run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _slots.release()
+        HASH_SECONDS.labels(op).observe(time.perf_counter() - started)
+
+
+async def ahash_password(password: str) -> str:
+    return await _run("hash", hash_password, password)
+
+
+async def averify_password(password: str, hash_val: str) -> bool:
+    return await _run("verify", verify_password, password, hash_val)
+
+
+def warm_up() -> None:
+    """Start the worker processes (and import passlib there) ahead of the first login."""
+    pool = _get_pool()
+    if pool is not None:
+        for future in [pool.submit(hash_password, "warm-up") for _ in range(PASSWORD_HASH_WORKERS)]:
+            future.result()
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def password_hash_stats() -> dict:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "rounds": PASSWORD_HASH_ROUNDS,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        **_stats,
+    }
@@ -1,6 +1,24 @@
 // frontend/src/components/AgentStream.jsx
 import React, { useEffect, useState, useRef } from "react";
 
+// human-readable text for each orchestration event type
+const eventText = (payload) => {
+  switch (payload.type) {
+    case "intent":
+      return payload.is_wellness ? "Wellness question detected" : "Not a wellness question";
+    case "supervisor":
+      return payload.next_agent === "FINISH" ? "Done choosing agents" : `Next: ${payload.next_agent}`;
+    case "plan":
+      return `Agents: ${(payload.agents || []).join(", ") || "none"}`;
+    case "agent_start":
+      return "";
+    case "final":
+      return payload.answer || "";
+    default:
+      return payload.text || "";
+  }
+};
+
 export default function AgentStream({ query, token, onFinal }) {
   const [events, setEvents] = useState([]); // array of {type, agent, text, time}
   const wsRef = useRef(null);
@@ -22,11 +40,30 @@ export default function AgentStream({ query, token, onFinal }) {
     ws.onmessage = (ev) => {
       try {
         const payload = JSON.parse(ev.data);
+        const time = new Date().toLocaleTimeString();
+
+        // token deltas are appended to that agent's row instead of adding rows
+        if (payload.type === "token") {
+          setEvents((s) => {
+            const next = [...s];
+            for (let i = next.length - 1; i >= 0; i--) {
+              if (next[i].type === "agent_start" && next[i].agent === payload.agent) {
+                next[i] = { ...next[i], text: next[i].text + payload.text };
+                return next;
+              }
+            }
+            return [...next, { type: "agent_start", agent: payload.agent, text: payload.text, time }];
+          });
+          return;
+        }
+        // the agent's row already holds its streamed text
+        if (payload.type === "agent_end") return;
+
         const item = {
           type: payload.type || "agent",
-          agent: payload.agent || "unknown",
-          text: payload.text || "",
-          time: new Date().toLocaleTimeString(),
+          agent: payload.agent || payload.type || "unknown",
+          text: eventText(payload),
+          time,
         };
         setEvents((s) => [...s, item]);
 